@@ -10,4 +10,105 @@ class Setting:
         self.authors = ["Fernando Garcia Catalan", "Juan Carlos Macias", "Alejandro Rajado Martin", "Vada Velazquez"]
         self.model = os.getenv("MODEL_BASE_URL")
         self.metrics = os.getenv("METRICS_BASE_URL")
+        
+        # Inferencia por lotes
+        self.inference_batch_size = int(os.getenv("INFERENCE_BATCH_SIZE", "16"))
+        
+        # Ajuste adaptativo del micro-lote contra un objetivo de latencia p95 (segundos)
+        self.inference_adaptive_batch = os.getenv("INFERENCE_ADAPTIVE_BATCH", "true").lower() == "true"
+        self.inference_p95_target = float(os.getenv("INFERENCE_P95_TARGET", "0.25"))
+        self.inference_batch_min = int(os.getenv("INFERENCE_BATCH_MIN", "1"))
+        self.inference_batch_max = int(os.getenv("INFERENCE_BATCH_MAX", "128"))
+        
+        # Objetivos de latencia (segundos) por clase de prioridad del scheduler
+        self.inference_latency_targets = {
+            "interactive": float(os.getenv("LATENCY_TARGET_INTERACTIVE", "0.5")),
+            "video_job": float(os.getenv("LATENCY_TARGET_VIDEO_JOB", "60")),
+            "backfill": float(os.getenv("LATENCY_TARGET_BACKFILL", "600"))
+        }
+        
+        # Límite de textos pendientes por clase; por encima las rutas responden 429
+        self.inference_queue_limits = {
+            "interactive": int(os.getenv("QUEUE_LIMIT_INTERACTIVE", "512")),
+            "video_job": int(os.getenv("QUEUE_LIMIT_VIDEO_JOB", "5000")),
+            "backfill": int(os.getenv("QUEUE_LIMIT_BACKFILL", "20000"))
+        }
+        # Ocupación a partir de la cual /ready indica al balanceador que derive tráfico
+        self.inference_ready_threshold = float(os.getenv("INFERENCE_READY_THRESHOLD", "0.8"))
+        
+        # Análisis masivo de ficheros (CSV / JSONL / Parquet)
+        self.bulk_jobs_dir = os.getenv("BULK_JOBS_DIR", os.path.join(os.path.dirname(os.path.dirname(__file__)), "bulk_jobs"))
+        self.bulk_chunk_size = int(os.getenv("BULK_CHUNK_SIZE", "512"))
+        # Segundos que se conservan los resultados de un trabajo terminado (0 = sin límite)
+        self.bulk_job_ttl = float(os.getenv("BULK_JOB_TTL", "86400"))
+
+        # Pool de navegadores Chrome del scraper
+        self.scraper_pool_size = int(os.getenv("SCRAPER_POOL_SIZE", "2"))
+        self.scraper_pool_max_uses = int(os.getenv("SCRAPER_POOL_MAX_USES", "20"))
+        self.scraper_pool_acquire_timeout = float(os.getenv("SCRAPER_POOL_ACQUIRE_TIMEOUT", "300"))
+        self.scraper_pool_warm = os.getenv("SCRAPER_POOL_WARM", "true").lower() == "true"
+        # Pestañas por navegador: con más de 1, varios vídeos se scrapean a la vez en el mismo Chrome
+        self.scraper_pool_max_tabs = int(os.getenv("SCRAPER_POOL_MAX_TABS", "1"))
+        # Procesos worker del scraper (0 = hilos del proceso de la API), cada uno con su propio pool de
+        # Chrome; se reinician tras SCRAPER_WORKER_MAX_JOBS trabajos o al pasar de SCRAPER_WORKER_MAX_RSS_MB
+        # de memoria residente (0 = sin límite)
+        self.scraper_processes = int(os.getenv("SCRAPER_PROCESSES", "1"))
+        self.scraper_worker_max_jobs = int(os.getenv("SCRAPER_WORKER_MAX_JOBS", "200"))
+        self.scraper_worker_max_rss_mb = float(os.getenv("SCRAPER_WORKER_MAX_RSS_MB", "1024"))
+        # Bloqueo de recursos por CDP: perfil ('off', 'light', 'standard') y patrones extra separados por comas
+        self.scraper_block_profile = os.getenv("SCRAPER_BLOCK_PROFILE", "standard")
+        self.scraper_block_extra = [p.strip() for p in os.getenv("SCRAPER_BLOCK_EXTRA", "").split(",") if p.strip()]
+
+        # Extracción de comentarios: 'bulk' (un execute_script por lote), 'network' (JSON de
+        # youtubei/v1/next capturado por CDP) o 'elements' (find_element por campo)
+        self.scraper_extraction_mode = os.getenv("SCRAPER_EXTRACTION_MODE", "bulk")
+
+        # Scroll de comentarios guiado por el DOM (segundos / pasos sin hilos nuevos)
+        self.scraper_comments_timeout = float(os.getenv("SCRAPER_COMMENTS_TIMEOUT", "15"))
+        self.scraper_scroll_step_timeout = float(os.getenv("SCRAPER_SCROLL_STEP_TIMEOUT", "4"))
+        self.scraper_scroll_max_stale = int(os.getenv("SCRAPER_SCROLL_MAX_STALE", "2"))
+
+        # Respuestas por hilo (se siguen los 'mostrar más respuestas' hasta este límite)
+        self.scraper_max_replies = int(os.getenv("SCRAPER_MAX_REPLIES", "50"))
+        self.scraper_more_replies_rounds = int(os.getenv("SCRAPER_MORE_REPLIES_ROUNDS", "5"))
+        self.scraper_replies_timeout = float(os.getenv("SCRAPER_REPLIES_TIMEOUT", "8"))
+
+        # Backend de scraping: 'selenium' (por defecto) o 'http' (opcional: sin navegador, con Selenium de respaldo)
+        self.scraper_backend = os.getenv("SCRAPER_BACKEND", "selenium")
+        self.http_fetcher_base_url = os.getenv("HTTP_FETCHER_BASE_URL", "https://www.youtube.com")
+        self.http_fetcher_max_concurrency = int(os.getenv("HTTP_FETCHER_MAX_CONCURRENCY", "4"))
+        self.http_fetcher_timeout = float(os.getenv("HTTP_FETCHER_TIMEOUT", "15"))
+
+        # Re-scraping incremental: solo comentarios nuevos (orden 'más recientes'), parando tras
+        # esta racha de comentarios ya guardados
+        self.scraper_incremental = os.getenv("SCRAPER_INCREMENTAL", "false").lower() == "true"
+        self.scraper_incremental_stop_after = int(os.getenv("SCRAPER_INCREMENTAL_STOP_AFTER", "10"))
+
+        # Mensajes de progreso por WebSocket: máximo por segundo y sesión (se envía el más reciente)
+        self.progress_max_rate = float(os.getenv("PROGRESS_MAX_RATE", "4"))
+
+        # Memoria de selectores que funcionaron (JSON persistente entre reinicios)
+        self.selector_registry_path = os.getenv("SELECTOR_REGISTRY_PATH", os.path.join(os.path.dirname(os.path.dirname(__file__)), "scraper_state", "selector_registry.json"))
+
+        # Caché de scrapings: segundos de frescura (0 = desactivada), entradas en memoria, tramos de
+        # max_comments y directorio opcional para guardarlos comprimidos en disco (vacío = solo memoria)
+        self.scrape_cache_ttl = float(os.getenv("SCRAPE_CACHE_TTL", "600"))
+        self.scrape_cache_max_entries = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "100"))
+        self.scrape_cache_tiers = [int(t) for t in os.getenv("SCRAPE_CACHE_TIERS", "50,100,250,500,1000").split(",") if t.strip()]
+        self.scrape_cache_dir = os.getenv("SCRAPE_CACHE_DIR", "")
+
+        # Cola de scrapings: simultáneos (0 = navegadores del pool × pestañas por navegador × procesos worker)
+        # y máximo de trabajos en espera
+        self.scrape_queue_concurrency = int(os.getenv("SCRAPE_QUEUE_CONCURRENCY", "0"))
+        self.scrape_queue_max_depth = int(os.getenv("SCRAPE_QUEUE_MAX_DEPTH", "20"))
+
+        # Plazo por análisis de vídeo (segundos): por defecto si la petición no lo indica, máximo que
+        # puede pedir (0 = sin límite) y parte del tiempo que queda al empezar que se da al scraping
+        self.job_deadline_default = float(os.getenv("JOB_DEADLINE_DEFAULT", "300"))
+        self.job_deadline_max = float(os.getenv("JOB_DEADLINE_MAX", "900"))
+        self.job_deadline_scrape_share = float(os.getenv("JOB_DEADLINE_SCRAPE_SHARE", "0.7"))
+
+        # Segundos que se espera a que el cliente vuelva a conectar su WebSocket antes de cancelar
+        # un análisis que ya nadie sigue (0 = cancelar al desconectar)
+        self.job_cancel_grace = float(os.getenv("JOB_CANCEL_GRACE", "15"))
 setting = Setting()
\ No newline at end of file
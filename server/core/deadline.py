@@ -0,0 +1,93 @@
+import time
+import threading
+from typing import Callable, Optional
+
+from server.core.config import setting
+from server.core.print_dev import log_warning
+
+
+class Deadline:
+    """
+    Presupuesto de tiempo de un trabajo (scraping, inferencia y guardado).
+
+    Se crea al recibir la petición y se pasa a cada fase, que consulta
+    `remaining()` para acotar sus esperas y `expired()` para parar y devolver
+    lo que tenga. `seconds=None` es un trabajo sin límite.
+
+    También es el token de cancelación del trabajo: tras `cancel()` el plazo
+    cuenta como agotado, así que cada fase para en su siguiente comprobación
+    (paso de scroll, lote de extracción, micro-lote de inferencia).
+    """
+
+    def __init__(self, seconds: Optional[float] = None, expires_at: Optional[float] = None):
+        self.started_at = time.monotonic()
+        if expires_at is None and seconds is not None:
+            expires_at = self.started_at + seconds
+        self.expires_at = expires_at
+        self.cancel_reason: Optional[str] = None
+        self._on_cancel = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_request(cls, requested: Optional[float] = None) -> "Deadline":
+        """Plazo pedido por el cliente (o el por defecto), recortado al máximo del servidor (0 = sin límite)"""
+        seconds = requested or setting.job_deadline_default or None
+        if setting.job_deadline_max:
+            seconds = min(seconds or setting.job_deadline_max, setting.job_deadline_max)
+        return cls(seconds)
+
+    @property
+    def seconds(self) -> Optional[float]:
+        return None if self.expires_at is None else self.expires_at - self.started_at
+
+    def remaining(self) -> Optional[float]:
+        """Segundos que quedan (nunca negativos), o None sin límite"""
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.cancelled or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_reason is not None
+
+    def cancel(self, reason: str = "cancelado") -> bool:
+        """Cancelar el trabajo (desde cualquier hilo); False si ya estaba cancelado"""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.cancel_reason = reason
+            callbacks, self._on_cancel = self._on_cancel, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                log_warning(f"⚠️ Error avisando de la cancelación: {e}")
+        return True
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Llamar a `callback` al cancelar (en el hilo que cancela; al momento si ya lo está)"""
+        with self._lock:
+            if not self.cancelled:
+                self._on_cancel.append(callback)
+                return
+        callback()
+
+    def timeout(self, default: Optional[float]) -> Optional[float]:
+        """`default` acotado a lo que queda del plazo (para esperas y timeouts de red)"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return remaining if default is None else min(default, remaining)
+
+    def share(self, fraction: float) -> "Deadline":
+        """Plazo para una fase: `fraction` de lo que queda, dejando el resto a las siguientes"""
+        remaining = self.remaining()
+        phase = Deadline() if remaining is None else Deadline(expires_at=time.monotonic() + remaining * fraction)
+        # Cancelar el trabajo cancela también sus fases
+        self.on_cancel(lambda: phase.cancel(self.cancel_reason))
+        return phase
@@ -0,0 +1,74 @@
+import threading
+from collections import deque
+from typing import Callable, Dict, Any, Optional
+
+
+class LatencyWindow:
+    """Ventana deslizante de latencias (segundos) con percentiles básicos"""
+
+    def __init__(self, max_samples: int = 500):
+        self._samples = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self.total_count = 0
+
+    def record(self, value: float):
+        with self._lock:
+            self._samples.append(value)
+            self.total_count += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumen en milisegundos de las muestras de la ventana"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {'count': self.total_count, 'avg_ms': None, 'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+
+        def at(pct):
+            return round(samples[min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))] * 1000, 2)
+
+        return {
+            'count': self.total_count,
+            'avg_ms': round(sum(samples) / len(samples) * 1000, 2),
+            'p50_ms': at(50),
+            'p95_ms': at(95),
+            'max_ms': round(samples[-1] * 1000, 2)
+        }
+
+
+class MetricsRegistry:
+    """
+    Registro central de métricas.
+
+    Cada componente registra una función que devuelve un diccionario con su
+    estado actual; el endpoint de métricas devuelve la unión de todos.
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def register(self, name: str, provider: Callable[[], Dict[str, Any]]):
+        self._providers[name] = provider
+
+    def unregister(self, name: str):
+        self._providers.pop(name, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        result = {}
+        for name, provider in list(self._providers.items()):
+            try:
+                result[name] = provider()
+            except Exception as e:
+                result[name] = {'error': str(e)}
+        return result
+
+
+# Instancia global
+metrics_registry = MetricsRegistry()
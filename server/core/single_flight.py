@@ -0,0 +1,60 @@
+import threading
+from typing import Dict, Any, Hashable, Optional
+
+from server.core.metrics import metrics_registry
+
+
+class SingleFlight:
+    """
+    Registro de trabajos en curso para no repetir el mismo trabajo a la vez.
+
+    Cada clave (p. ej. vídeo + presupuesto de comentarios) tiene como mucho un
+    trabajo líder, identificado por su session_id. Las peticiones idénticas
+    que llegan mientras tanto se unen a él (`follow`) en lugar de lanzar otro.
+    """
+
+    def __init__(self):
+        self._leaders: Dict[Hashable, str] = {}
+        self._followers: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {'started': 0, 'coalesced': 0, 'max_followers': 0}
+
+    def leader(self, key: Hashable) -> Optional[str]:
+        """session_id del trabajo en curso para `key`, o None"""
+        with self._lock:
+            return self._leaders.get(key)
+
+    def start(self, key: Hashable, session_id: str):
+        with self._lock:
+            self._leaders[key] = session_id
+            self._followers[key] = 0
+            self.stats['started'] += 1
+
+    def follow(self, key: Hashable):
+        """Anotar una petición servida por el trabajo en curso"""
+        with self._lock:
+            self._followers[key] = self._followers.get(key, 0) + 1
+            self.stats['coalesced'] += 1
+            self.stats['max_followers'] = max(self.stats['max_followers'], self._followers[key])
+
+    def finish(self, key: Hashable, session_id: str):
+        with self._lock:
+            # Solo el líder actual libera la clave (puede haber sido sustituido)
+            if self._leaders.get(key) == session_id:
+                del self._leaders[key]
+                self._followers.pop(key, None)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.stats['started'] + self.stats['coalesced']
+            return {
+                'in_flight': len(self._leaders),
+                'followers_in_flight': sum(self._followers.values()),
+                'shared_ratio': round(self.stats['coalesced'] / requests, 3) if requests else None,
+                **self.stats
+            }
+
+
+# Instancia global: análisis de vídeo (scraping + inferencia) en curso
+video_jobs = SingleFlight()
+metrics_registry.register("video_jobs", video_jobs.get_metrics)
@@ -6,6 +6,8 @@ from .models import Base, Video, Thread , Request, Author, RequestThread, VideoT
 from dotenv import load_dotenv
 import os
 import argparse
+from collections import Counter
+from server.scraper.incremental import comment_fingerprint, legacy_fingerprint
 
 try:
     load_dotenv()
@@ -89,11 +91,25 @@ def update_video(session, video, data, now):
         except Exception as e:
             raise Exception(f"Error updating video: {e}")
 
+def update_video_incremental(session, video, data, now):
+    """Actualizar el vídeo sumando a sus totales solo los hilos nuevos de un re-scraping incremental"""
+    emoji_stats = Counter(video.emoji_stats or {})
+    emoji_stats.update(data.get("emoji_stats") or {})
+    merged = dict(
+        data,
+        total_threads=(video.total_threads or 0) + data.get("total_threads", 0),
+        total_likes=(video.total_likes or 0) + (data.get("total_likes") or 0),
+        total_comments=(video.total_comments or 0) + (data.get("total_comments") or 0),
+        total_emojis=(video.total_emojis or 0) + (data.get("total_emojis") or 0),
+        emoji_stats=dict(emoji_stats),
+        most_common_emojis=dict(emoji_stats.most_common(10))
+    )
+    update_video(session, video, merged, now)
+
 def create_thread(session, video, request, thread_data, now, parent_comment_id=None):
-    from models import Thread, Author, RequestThread
 
     # 1. Obtener o crear el autor
-    author_name = thread_data.get("author_name")
+    author_name = thread_data.get("author_name") or thread_data.get("author")
     author = session.query(Author).filter_by(name=author_name).first()
     if not author:
         author = Author(name=author_name)
@@ -159,8 +175,8 @@ def insert_threads(session, video, request, threads_data, now):
             )
             created_threads.append(parent_thread)
 
-            # Insertar replies (si existen)
-            if thread_data.get("has_replies") and thread_data.get("replies"):
+            # Insertar replies (si existen; mismo criterio que el análisis, que no mira has_replies)
+            if thread_data.get("replies"):
                 for reply_data in thread_data["replies"]:
                     reply_thread = create_thread(
                         session=session,
@@ -184,9 +200,13 @@ def insert_video_from_scrapper(data):
 
         # Search by youtube_video_id
         video = session.query(Video).filter_by(youtube_video_id=data["video_id"]).first()
+        # Re-scraping incremental: data["threads"] solo trae los hilos nuevos
+        incremental = video is not None and bool(data.get("incremental"))
 
         if video is None:
             video = insert_new_video(session, data, now)
+        elif incremental:
+            update_video_incremental(session, video, data, now)
         else:
             update_video(session, video, data, now)
     
@@ -199,15 +219,67 @@ def insert_video_from_scrapper(data):
         session.flush()  # To ensure request.id is available
 
 
-        insert_threads(session, video, request, data.get("threads", []), now)
+        created_threads = insert_threads(session, video, request, data.get("threads", []), now)
+        if incremental:
+            # La Request enlaza el conjunto completo: los hilos ya guardados más los nuevos
+            link_video_threads(session, request, video)
 
         session.commit()
+        result = {
+            'video_id': video.id,
+            'request_id': request.id,
+            'thread_ids': group_thread_ids(created_threads)
+        }
         session.close()
 
 
         print("💾 Data for current Request succesfully inserted/updated.")
+        return result
     except Exception as e:
         raise Exception(f"Error processing video request: {e}")
+
+def group_thread_ids(created_threads):
+    """IDs de los hilos insertados agrupados como en el scraping: [(id_principal, [ids_respuestas]), ...]"""
+    grouped = []
+    for thread in created_threads:
+        if thread.parent_comment_id is None:
+            grouped.append((thread.id, []))
+        elif grouped:
+            grouped[-1][1].append(thread.id)
+    return grouped
+
+def link_video_threads(session, request, video):
+    """Enlazar a la Request todos los hilos guardados del vídeo (dos consultas en lugar de una por hilo)"""
+    try:
+        linked = {row[0] for row in session.query(RequestThread.fk_thread_id).filter_by(fk_request_id=request.id)}
+        thread_ids = [row[0] for row in session.query(Thread.id).filter_by(fk_video_id=video.id)]
+        session.add_all([
+            RequestThread(fk_request_id=request.id, fk_thread_id=thread_id)
+            for thread_id in thread_ids if thread_id not in linked
+        ])
+        session.flush()
+    except Exception as e:
+        raise Exception(f"Error linking video threads to request: {e}")
+
+def get_known_comment_fingerprints(youtube_video_id):
+    """Huellas (autor + texto) de los comentarios principales ya guardados de un vídeo"""
+    try:
+        session = open_session()
+        rows = session.query(Author.name, Thread.comment).join(
+            Thread, Thread.fk_author_id == Author.id
+        ).join(
+            Video, Thread.fk_video_id == Video.id
+        ).filter(
+            Video.youtube_video_id == youtube_video_id,
+            Thread.parent_comment_id.is_(None)
+        ).all()
+        session.close()
+        # Los hilos guardados antes de usar "author" como respaldo de "author_name" no tienen
+        # autor: su huella es solo el texto, que IncrementalTracker también comprueba
+        return {comment_fingerprint(name, comment) if name else legacy_fingerprint(comment)
+                for name, comment in rows}
+    except Exception as e:
+        raise Exception(f"Error retrieving known comments: {e}")
     
 def get_request_list():
     """Obtener lista de requests con todas las relaciones cargadas"""
@@ -340,12 +412,40 @@ def get_request_with_threads(request_id):
     except Exception as e:
         raise Exception(f"Error retrieving request with threads: {e}")
 
-def save_toxicity_analysis(analysis_data, request_id: int, video_id: int) -> bool:
-    """Guardar resultados del análisis de toxicidad en la base de datos"""
+def save_toxicity_analysis(analysis_data, request_id: int, video_id: int, thread_ids=None) -> bool:
+    """
+    Guardar resultados del análisis de toxicidad en la base de datos
+    
+    `thread_ids` ([(id_principal, [ids_respuestas]), ...] de insert_video_from_scrapper)
+    relaciona cada thread_index del análisis con su fila. Es necesario cuando la
+    Request enlaza más hilos que los analizados (re-scraping incremental).
+    """
     try:
         session = open_session()
         now = datetime.now()
         
+        def find_main_thread(thread_idx):
+            if thread_ids is not None:
+                return session.get(Thread, thread_ids[thread_idx][0]) if thread_idx < len(thread_ids) else None
+            return session.query(Thread).join(
+                RequestThread, Thread.id == RequestThread.fk_thread_id
+            ).filter(
+                RequestThread.fk_request_id == request_id,
+                Thread.parent_comment_id.is_(None)  # Solo comentarios principales
+            ).offset(thread_idx).limit(1).first()
+        
+        def find_reply_thread(thread_idx, reply_idx):
+            if thread_ids is not None:
+                if thread_idx >= len(thread_ids) or reply_idx >= len(thread_ids[thread_idx][1]):
+                    return None
+                return session.get(Thread, thread_ids[thread_idx][1][reply_idx])
+            parent_thread = find_main_thread(thread_idx)
+            if not parent_thread:
+                return None
+            return session.query(Thread).filter(
+                Thread.parent_comment_id == parent_thread.id
+            ).offset(reply_idx).limit(1).first()
+        
         # 🎯 1. GUARDAR RESUMEN GENERAL (VideoToxicitySummary)
         toxicity_summary = VideoToxicitySummary(
             fk_video_id=video_id,
@@ -365,12 +465,7 @@ def save_toxicity_analysis(analysis_data, request_id: int, video_id: int) -> boo
             thread_idx = most_toxic['metadata'].get('thread_index')
             if thread_idx is not None:
                 # Buscar el thread correspondiente
-                thread_query = session.query(Thread).join(
-                    RequestThread, Thread.id == RequestThread.fk_thread_id
-                ).filter(
-                    RequestThread.fk_request_id == request_id,
-                    Thread.parent_comment_id.is_(None)  # Solo comentarios principales
-                ).offset(thread_idx).limit(1).first()
+                thread_query = find_main_thread(thread_idx)
                 
                 if thread_query:
                     toxicity_summary.most_toxic_thread_id = thread_query.id
@@ -387,12 +482,7 @@ def save_toxicity_analysis(analysis_data, request_id: int, video_id: int) -> boo
                 thread_idx = analysis['metadata'].get('thread_index')
                 if thread_idx is not None:
                     # Buscar el thread correspondiente
-                    thread_query = session.query(Thread).join(
-                        RequestThread, Thread.id == RequestThread.fk_thread_id
-                    ).filter(
-                        RequestThread.fk_request_id == request_id,
-                        Thread.parent_comment_id.is_(None)  # Solo comentarios principales
-                    ).offset(thread_idx).limit(1).first()
+                    thread_query = find_main_thread(thread_idx)
                     
                     if thread_query:
                         toxicity_analysis = ToxicityAnalysis(
@@ -415,33 +505,22 @@ def save_toxicity_analysis(analysis_data, request_id: int, video_id: int) -> boo
                 reply_idx = analysis['metadata'].get('reply_index')
                 
                 if thread_idx is not None and reply_idx is not None:
-                    # Buscar el thread de respuesta correspondiente
-                    parent_thread = session.query(Thread).join(
-                        RequestThread, Thread.id == RequestThread.fk_thread_id
-                    ).filter(
-                        RequestThread.fk_request_id == request_id,
-                        Thread.parent_comment_id.is_(None)  # Comentario principal
-                    ).offset(thread_idx).limit(1).first()
+                    # Buscar la respuesta específica
+                    reply_thread = find_reply_thread(thread_idx, reply_idx)
                     
-                    if parent_thread:
-                        # Buscar la respuesta específica
-                        reply_thread = session.query(Thread).filter(
-                            Thread.parent_comment_id == parent_thread.id
-                        ).offset(reply_idx).limit(1).first()
-                        
-                        if reply_thread:
-                            toxicity_analysis = ToxicityAnalysis(
-                                fk_thread_id=reply_thread.id,
-                                fk_request_id=request_id,
-                                is_toxic=analysis.get('is_toxic', False),
-                                toxicity_confidence=analysis.get('toxicity_confidence', 0.0),
-                                categories_detected=analysis.get('categories_detected', []),
-                                category_scores=analysis.get('category_scores', {}),
-                                model_version=analysis_data.get('summary', {}).get('model_info', {}).get('version', '1.0.0'),
-                                analyzed_at=now
-                            )
-                            session.add(toxicity_analysis)
-                            saved_analyses += 1
+                    if reply_thread:
+                        toxicity_analysis = ToxicityAnalysis(
+                            fk_thread_id=reply_thread.id,
+                            fk_request_id=request_id,
+                            is_toxic=analysis.get('is_toxic', False),
+                            toxicity_confidence=analysis.get('toxicity_confidence', 0.0),
+                            categories_detected=analysis.get('categories_detected', []),
+                            category_scores=analysis.get('category_scores', {}),
+                            model_version=analysis_data.get('summary', {}).get('model_info', {}).get('version', '1.0.0'),
+                            analyzed_at=now
+                        )
+                        session.add(toxicity_analysis)
+                        saved_analyses += 1
         
         session.commit()
         session.close()
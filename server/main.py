@@ -1,8 +1,9 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import logging
 import uuid
+import time
 import asyncio
 import uvicorn
 
@@ -11,8 +12,15 @@ import server.database.db_manager as database
 import server.scraper.scrp as scrp
 from server.core.config import setting
 from server.scraper.progress_manager import progress_manager
-from server.scraper.scrp_socket import scrape_youtube_comments_with_progress  # ✅ Usar versión síncrona con WebSocket
+from server.scraper.scrp_socket import scrape_youtube_comments_with_progress, cached_scrape  # ✅ Usar versión síncrona con WebSocket
 from server.ml.api.toxicity_routes import router as toxicity_router
+from server.core.metrics import metrics_registry
+from server.scraper.browser_pool import get_browser_pool
+from server.scraper.process_pool import get_scraper_processes
+from server.scraper.yt_parser import extract_video_id
+from server.core.single_flight import video_jobs
+from server.scraper.job_queue import scrape_queue, QueueFullError
+from server.core.deadline import Deadline
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -36,6 +44,26 @@ app.add_middleware(
 # Incluir las rutas de toxicidad
 app.include_router(toxicity_router)
 
+@app.on_event("startup")
+async def bind_progress_loop():
+    """Loop principal al que el scraper (en hilos del executor) publica el progreso"""
+    progress_manager.bind_loop(asyncio.get_running_loop())
+
+@app.on_event("startup")
+async def warm_browser_pool():
+    """Precalentar el pool de Chrome (o lanzar los procesos del scraper, que lo precalientan) sin retrasar el arranque"""
+    if setting.scraper_processes > 0:
+        asyncio.get_event_loop().run_in_executor(None, get_scraper_processes)
+    elif setting.scraper_pool_warm:
+        asyncio.get_event_loop().run_in_executor(None, get_browser_pool().warm)
+
+@app.on_event("shutdown")
+def close_browser_pool():
+    if setting.scraper_processes > 0:
+        get_scraper_processes().close()
+    else:
+        get_browser_pool().close()
+
 @app.get("/")
 def read_root():
     return {
@@ -47,7 +75,9 @@ def read_root():
             "toxicity_health": "/api/v1/toxicity/health",
             "analyze_comment": "/api/v1/toxicity/analyze-comment",
             "analyze_youtube": "/api/v1/toxicity/analyze-youtube",
+            "bulk_analyze": "/v1/toxicity/bulk-analyze",
             "analyze_video_with_ml": f"/{setting.version}/analyze_video_with_ml",
+            "metrics": f"/{setting.version}/metrics",
             "docs": "/docs"
         }
     }
@@ -121,6 +151,11 @@ async def prediction_detail(id: int):
         "prediction": database.get_request_by_id(id),
     }
 
+@app.get("/"+setting.version+"/metrics")
+def get_metrics():
+    """Métricas de los componentes del servidor (scheduler de inferencia, etc.)"""
+    return metrics_registry.snapshot()
+
 # ✅ WEBSOCKET ENDPOINT
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
@@ -135,7 +170,7 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
 
 # ✅ ÚNICO ENDPOINT CON WEBSOCKET (eliminar duplicado)
 @app.post("/"+setting.version+"/analyze_video_with_ml")
-async def analyze_video_with_ml(data: dict, background_tasks: BackgroundTasks):
+async def analyze_video_with_ml(data: dict, background_tasks: BackgroundTasks, request: Request):
     """Endpoint que combina scraping + análisis ML + base de datos"""
     try:
         # Generar ID único para esta sesión
@@ -151,43 +186,240 @@ async def analyze_video_with_ml(data: dict, background_tasks: BackgroundTasks):
                 detail=f"max_comments debe ser un entero entre 5 y 1000. Recibido: {max_comments}"
             )
         
-        # Iniciar proceso en background
-        background_tasks.add_task(process_video_analysis, data["url"], session_id, max_comments)
+        # Plazo del análisis en segundos (opcional, recortado al máximo del servidor)
+        deadline_seconds = data.get("deadline_seconds")
+        if deadline_seconds is not None and (isinstance(deadline_seconds, bool)
+                                             or not isinstance(deadline_seconds, (int, float))
+                                             or deadline_seconds <= 0):
+            raise HTTPException(
+                status_code=400,
+                detail=f"deadline_seconds debe ser un número positivo. Recibido: {deadline_seconds}"
+            )
+        deadline = Deadline.for_request(deadline_seconds)
+        
+        # Re-scraping incremental: solo comentarios nuevos desde el último análisis del vídeo
+        incremental = bool(data.get("incremental", setting.scraper_incremental))
+        
+        # Si ya se está analizando el mismo vídeo con el mismo presupuesto, unirse a ese trabajo
+        job_key = (extract_video_id(data["url"]) or data["url"].strip(), max_comments, incremental)
+        leader_id = video_jobs.leader(job_key)
+        if leader_id and progress_manager.attach(leader_id, session_id):
+            video_jobs.follow(job_key)
+            logger.info(f"🔗 Análisis de {data['url']} ya en curso, sesión {session_id} unida a {leader_id}")
+            return {
+                "success": True,
+                "session_id": session_id,
+                "max_comments": max_comments,
+                "coalesced": True,
+                "message": f"Análisis de {max_comments} comentarios ya en curso para este video. Conéctate al WebSocket para seguir el progreso."
+            }
+        
+        if scrape_queue.is_full():
+            raise HTTPException(status_code=503, detail="Demasiados análisis en cola, inténtalo en unos minutos")
+        
+        # Iniciar proceso en background (la cola reparte los turnos de scraping por usuario)
+        user_id = str(data.get("user_id") or (request.client.host if request.client else "anonymous"))
+        video_jobs.start(job_key, session_id)
+        background_tasks.add_task(run_video_job, job_key, data["url"], session_id, max_comments, incremental, user_id,
+                                  deadline)
         
         return {
             "success": True,
             "session_id": session_id,
             "max_comments": max_comments,
+            "deadline_seconds": deadline.seconds,
+            "coalesced": False,
             "message": f"Análisis iniciado para {max_comments} comentarios. Conéctate al WebSocket para seguir el progreso."
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error iniciando análisis: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def process_video_analysis(video_url: str, session_id: str, max_comments: int = 50):
-    """Procesar análisis de video en background"""
+@app.post("/"+setting.version+"/cancel_analysis/{session_id}")
+async def cancel_analysis(session_id: str):
+    """Cancelar el análisis que sigue la sesión (libera el navegador y la inferencia en su siguiente paso)"""
+    status = progress_manager.cancel(session_id)
+    if status == 'not_found':
+        raise HTTPException(status_code=404, detail=f"No hay ningún análisis en curso para la sesión {session_id}")
+    return {
+        "session_id": session_id,
+        "cancelled": status == 'cancelled',
+        "message": ("Análisis cancelado" if status == 'cancelled'
+                    else "El análisis sigue para otras sesiones unidas; esta sesión deja de recibirlo")
+    }
+
+async def send_cancelled(session_id: str, deadline: Deadline, stream=None):
+    """Descartar la inferencia pendiente de un trabajo cancelado y avisar a quien siga conectado"""
+    if stream is not None:
+        stream.cancel()
+    logger.info(f"🛑 Análisis de {session_id} cancelado ({deadline.cancel_reason}): no se analiza ni se guarda")
+    await progress_manager.send_completion(session_id, False, error=f"🛑 Análisis cancelado: {deadline.cancel_reason}")
+
+def save_analysis_results(analysis: dict, scrape_data: dict):
+    """Guardar scraping y toxicidad en la BD (bloqueante, se ejecuta en el executor)"""
+    bd_success = False
+    toxicity_bd_success = False
+    request_id = None
+    video_id = None
+    thread_ids = None
+
+    try:
+        # 🎯 GUARDAR DATOS DE SCRAPING
+        enhanced_data = analysis.get('enhanced_scraped_data', scrape_data)
+        saved = database.insert_video_from_scrapper(enhanced_data)
+        logger.info("✅ Datos de scraping guardados en base de datos")
+        bd_success = True
+
+        # 🎯 OBTENER IDs PARA GUARDAR TOXICIDAD
+        video_id_from_data = enhanced_data.get('video_id')
+        if isinstance(saved, dict):
+            request_id = saved['request_id']
+            video_id = saved['video_id']
+            thread_ids = saved['thread_ids']
+        elif video_id_from_data:
+            # Buscar el request recién creado
+            # Obtener el video por youtube_video_id
+            session = database.open_session()
+            from server.database.models import Video, Request
+
+            video = session.query(Video).filter_by(youtube_video_id=video_id_from_data).first()
+            if video:
+                video_id = video.id
+                # Obtener el request más reciente para este video
+                latest_request = session.query(Request).filter_by(fk_video_id=video_id).order_by(Request.request_date.desc()).first()
+                if latest_request:
+                    request_id = latest_request.id
+
+            session.close()
+
+        # 🎯 GUARDAR ANÁLISIS DE TOXICIDAD
+        if request_id and video_id and analysis.get('total_toxic', 0) >= 0:  # Guardar incluso si no hay toxicidad
+            toxicity_bd_success = database.save_toxicity_analysis(analysis, request_id, video_id, thread_ids)
+            if toxicity_bd_success:
+                logger.info("✅ Análisis de toxicidad guardado en base de datos")
+            else:
+                logger.warning("⚠️ Error guardando análisis de toxicidad")
+        else:
+            logger.warning(f"⚠️ No se pudo guardar toxicidad - request_id: {request_id}, video_id: {video_id}")
+
+    except Exception as e:
+        logger.warning(f"⚠️ Error guardando en BD: {e}")
+        import traceback
+        traceback.print_exc()
+    
+    return bd_success, toxicity_bd_success, request_id, video_id
+
+async def run_video_job(job_key: tuple, video_url: str, session_id: str, max_comments: int, incremental: bool,
+                        user_id: str = "anonymous", deadline: Deadline = None):
+    """Análisis en background; al terminar, las peticiones iguales vuelven a lanzar su propio trabajo"""
+    deadline = deadline or Deadline()
+    # Se cancela si todas las sesiones se desconectan más del periodo de gracia o con cancel_analysis
+    progress_manager.track(session_id, deadline)
+    try:
+        await process_video_analysis(video_url, session_id, max_comments, incremental, user_id, deadline)
+    finally:
+        progress_manager.untrack(session_id)
+        video_jobs.finish(job_key, session_id)
+
+async def process_video_analysis(video_url: str, session_id: str, max_comments: int = 50, incremental: bool = False,
+                                 user_id: str = "anonymous", deadline: Deadline = None):
+    """
+    Procesar análisis de video en background
+    
+    Con `deadline` cada fase acota su tiempo: el scraping se queda con una parte
+    de lo que quede al empezar (JOB_DEADLINE_SCRAPE_SHARE) y devuelve lo
+    extraído si se agota; la inferencia deja sin analizar los lotes que no
+    terminan a tiempo. El resultado lleva `partial` si alguna fase se cortó.
+    
+    `deadline` es también el token de cancelación: si se cancela, el trabajo sale
+    de la cola o para el scraping en el siguiente paso, descarta la inferencia
+    pendiente y no guarda nada.
+    """
+    deadline = deadline or Deadline()
     try:
         # 1. Scraping con progreso
         await progress_manager.send_progress(session_id, 5, f"🎬 Iniciando análisis de video ({max_comments} comentarios)...")
-        
-        # ✅ EJECUTAR TU SCRAPER
         loop = asyncio.get_event_loop()
-        scrape_data = await loop.run_in_executor(
-            None,
-            scrape_youtube_comments_with_progress,
-            video_url,
-            max_comments,
-            session_id
-        )
+        
+        # Huellas de los comentarios ya guardados (sin ellas el scraping es completo)
+        known_fingerprints = None
+        youtube_video_id = extract_video_id(video_url)
+        if incremental and youtube_video_id:
+            try:
+                known_fingerprints = await loop.run_in_executor(
+                    None, database.get_known_comment_fingerprints, youtube_video_id
+                )
+                logger.info(f"🔁 Re-scraping incremental: {len(known_fingerprints)} comentarios ya guardados")
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudieron cargar los comentarios guardados, scraping completo: {e}")
+        
+        # La inferencia empieza con los primeros lotes de hilos, en paralelo con el scraping
+        stream = None
+        try:
+            from server.ml.pipeline import get_shared_pipeline, StreamingAnalysis
+            stream = StreamingAnalysis(get_shared_pipeline())
+        except Exception as e:
+            logger.warning(f"⚠️ Análisis incremental no disponible: {e}")
+        
+        # Un scraping reciente en caché no necesita navegador: se sirve sin esperar turno en la cola
+        scrape_data = None
+        if not incremental:
+            scrape_data = await loop.run_in_executor(None, cached_scrape, video_url, max_comments, session_id)
+        
+        if scrape_data is None:
+            # ✅ EJECUTAR TU SCRAPER (esperando turno en la cola de scraping)
+            def report_position(position):
+                return progress_manager.send_progress(session_id, 5, f"⏳ En cola: eres el #{position}")
+            
+            acquiring = asyncio.ensure_future(scrape_queue.acquire(user_id, report_position, deadline.remaining()))
+            # Cancelar el trabajo lo saca de la cola sin esperar turno
+            deadline.on_cancel(lambda: loop.call_soon_threadsafe(acquiring.cancel))
+            try:
+                await acquiring
+            except QueueFullError as e:
+                await progress_manager.send_completion(session_id, False, error=str(e))
+                return
+            except asyncio.TimeoutError:
+                await progress_manager.send_completion(session_id, False, error="⏰ Plazo agotado esperando turno de scraping")
+                return
+            except asyncio.CancelledError:
+                if not deadline.cancelled:
+                    raise
+                await send_cancelled(session_id, deadline, stream)
+                return
+            
+            try:
+                scrape_data = await loop.run_in_executor(
+                    None,
+                    scrape_youtube_comments_with_progress,
+                    video_url,
+                    max_comments,
+                    session_id,
+                    stream.add_threads if stream else None,
+                    known_fingerprints,
+                    deadline.share(setting.job_deadline_scrape_share),
+                    False  # La caché ya se consultó antes de la cola
+                )
+            finally:
+                scrape_queue.release()
+        
+        if deadline.cancelled:
+            await send_cancelled(session_id, deadline, stream)
+            return
         
         # ✅ VALIDAR scrape_data
         if not scrape_data or not isinstance(scrape_data, dict):
             await progress_manager.send_completion(session_id, False, error="Error en el scraping: datos inválidos")
             return
         
-        if 'threads' not in scrape_data or not scrape_data['threads']:
-            await progress_manager.send_completion(session_id, False, error="Error: No se encontraron comentarios para analizar")
+        # En incremental, sin hilos nuevos también se guarda la Request (enlaza los ya guardados)
+        if 'threads' not in scrape_data or (not scrape_data['threads'] and not scrape_data.get('incremental')):
+            error = ("⏰ Plazo agotado antes de cargar ningún comentario" if scrape_data.get('partial')
+                     else "Error: No se encontraron comentarios para analizar")
+            await progress_manager.send_completion(session_id, False, error=error)
             return
         
         logger.info(f"✅ Scraping exitoso: {scrape_data.get('total_comments', 0)} comentarios extraídos")
@@ -196,11 +428,14 @@ async def process_video_analysis(video_url: str, session_id: str, max_comments:
         await progress_manager.send_progress(session_id, 80, "🤖 Analizando toxicidad con IA...")
         
         try:
-            from server.ml.pipeline import ToxicityPipeline
-            pipeline = ToxicityPipeline()
+            from server.ml.pipeline import get_shared_pipeline, StreamingAnalysis
+            if stream is None:
+                stream = StreamingAnalysis(get_shared_pipeline())
             
             logger.info("🤖 Pipeline de toxicidad inicializado correctamente")
-            analysis = pipeline.analyze_youtube_comments(scrape_data)
+            # Espera las predicciones ya encoladas (prioridad video_job) y analiza lo que falte, fuera del event loop;
+            # lo que no termine dentro del plazo queda sin analizar
+            analysis = await loop.run_in_executor(None, stream.finish, scrape_data, deadline)
             
             if analysis is None:
                 raise Exception("El pipeline devolvió None")
@@ -238,53 +473,24 @@ async def process_video_analysis(video_url: str, session_id: str, max_comments:
                 }
             }
         
+        if deadline.cancelled:
+            await send_cancelled(session_id, deadline, stream)
+            return
+        
         # 3. Guardar en base de datos (ACTUALIZADO)
         await progress_manager.send_progress(session_id, 95, "💾 Guardando resultados...")
         
-        bd_success = False
-        toxicity_bd_success = False
-        request_id = None
-        video_id = None
-        
+        # El guardado no se corta a mitad: si se pasa del plazo, el resultado se envía ya y el guardado sigue
+        save_task = loop.run_in_executor(None, save_analysis_results, analysis, scrape_data)
+        save_timed_out = False
         try:
-            # 🎯 GUARDAR DATOS DE SCRAPING
-            enhanced_data = analysis.get('enhanced_scraped_data', scrape_data)
-            database.insert_video_from_scrapper(enhanced_data)
-            logger.info("✅ Datos de scraping guardados en base de datos")
-            bd_success = True
-            
-            # 🎯 OBTENER IDs PARA GUARDAR TOXICIDAD
-            # Buscar el request recién creado
-            video_id_from_data = enhanced_data.get('video_id')
-            if video_id_from_data:
-                # Obtener el video por youtube_video_id
-                session = database.open_session()
-                from server.database.models import Video, Request
-                
-                video = session.query(Video).filter_by(youtube_video_id=video_id_from_data).first()
-                if video:
-                    video_id = video.id
-                    # Obtener el request más reciente para este video
-                    latest_request = session.query(Request).filter_by(fk_video_id=video_id).order_by(Request.request_date.desc()).first()
-                    if latest_request:
-                        request_id = latest_request.id
-                
-                session.close()
-            
-            # 🎯 GUARDAR ANÁLISIS DE TOXICIDAD
-            if request_id and video_id and analysis.get('total_toxic', 0) >= 0:  # Guardar incluso si no hay toxicidad
-                toxicity_bd_success = database.save_toxicity_analysis(analysis, request_id, video_id)
-                if toxicity_bd_success:
-                    logger.info("✅ Análisis de toxicidad guardado en base de datos")
-                else:
-                    logger.warning("⚠️ Error guardando análisis de toxicidad")
-            else:
-                logger.warning(f"⚠️ No se pudo guardar toxicidad - request_id: {request_id}, video_id: {video_id}")
-                
-        except Exception as e:
-            logger.warning(f"⚠️ Error guardando en BD: {e}")
-            import traceback
-            traceback.print_exc()
+            bd_success, toxicity_bd_success, request_id, video_id = await asyncio.wait_for(
+                asyncio.shield(save_task), timeout=deadline.remaining()
+            )
+        except asyncio.TimeoutError:
+            logger.warning("⏰ Plazo agotado guardando resultados: se envía el resultado y el guardado sigue en segundo plano")
+            bd_success, toxicity_bd_success, request_id, video_id = False, False, None, None
+            save_timed_out = True
         
         await asyncio.sleep(1)
         
@@ -294,6 +500,18 @@ async def process_video_analysis(video_url: str, session_id: str, max_comments:
             "max_comments_requested": max_comments,
             "actual_comments_found": scrape_data.get('total_comments', 0),
             "actual_replies_found": scrape_data.get('total_threads', 0),
+            "incremental": scrape_data.get('incremental'),
+            # Si el scraping vino de la caché ({hit, age_seconds})
+            "scrape_cache": scrape_data.get('cache'),
+            # Plazo agotado: comentarios extraídos hasta entonces y/o hilos sin analizar
+            "partial": bool(scrape_data.get('partial') or analysis.get('partial')),
+            "deadline": {
+                "seconds": deadline.seconds,
+                "elapsed_seconds": round(time.monotonic() - deadline.started_at, 1),
+                "scrape_partial": bool(scrape_data.get('partial')),
+                "unanalyzed_threads": analysis.get('unanalyzed_threads', 0),
+                "save_in_background": save_timed_out
+            },
             
             # 🎯 ESTADÍSTICAS DETALLADAS
             "total_analyzed": analysis.get('total_analyzed', 0),
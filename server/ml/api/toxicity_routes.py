@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, BackgroundTasks, UploadFile, File, Form, Response
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import asyncio
 import logging
-from server.ml.pipeline import ToxicityPipeline
+from server.core.config import setting
+from server.ml.pipeline import get_shared_pipeline
+from server.ml.scheduler import QueueFullError, PRIORITY_INTERACTIVE, PRIORITY_VIDEO_JOB
+from server.ml.bulk_jobs import bulk_job_manager
 
 # Configurar router
 router = APIRouter(prefix="/v1/toxicity", tags=["toxicity"])  # ← Quitar /api/
@@ -10,7 +15,7 @@ logger = logging.getLogger(__name__)
 
 # Inicializar pipeline global
 try:
-    toxicity_pipeline = ToxicityPipeline()
+    toxicity_pipeline = get_shared_pipeline()
     PIPELINE_AVAILABLE = True
     logger.info("Pipeline de toxicidad inicializado correctamente")
 except Exception as e:
@@ -28,6 +33,29 @@ class YouTubeAnalysisRequest(BaseModel):
     video_url: str
     scraped_data: Dict[str, Any]
 
+def _queue_full_response(e: QueueFullError):
+    """Respuesta 429 rápida cuando la cola de inferencia está llena"""
+    logger.warning(f"⚠️ {e}")
+    return HTTPException(
+        status_code=429,
+        detail=f"Servidor saturado: cola de inferencia llena. Reintenta en {e.retry_after}s",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def _set_occupancy_header(response: Response, priority: str):
+    """Informar de la ocupación de la cola para que el balanceador pueda derivar tráfico"""
+    occupancy = toxicity_pipeline.scheduler.occupancy()[priority]['occupancy']
+    if occupancy is not None:
+        response.headers["X-Queue-Occupancy"] = str(occupancy)
+
+async def _predict(texts: List[str], priority: str = PRIORITY_INTERACTIVE):
+    """Enviar textos al scheduler (cola acotada) y esperar el resultado sin bloquear el event loop"""
+    try:
+        future = toxicity_pipeline.scheduler.submit(texts, priority, bounded=True)
+    except QueueFullError as e:
+        raise _queue_full_response(e)
+    return await asyncio.wrap_future(future)
+
 @router.get("/health")
 def get_health():
     """Estado de salud del sistema de toxicidad"""
@@ -36,30 +64,54 @@ def get_health():
     
     return toxicity_pipeline.get_health_status()
 
+@router.get("/ready")
+def get_ready():
+    """Readiness para balanceadores: 503 si alguna cola supera el umbral de ocupación"""
+    if not PIPELINE_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Pipeline no disponible")
+    
+    queues = toxicity_pipeline.scheduler.occupancy()
+    saturated = [
+        priority for priority, queue in queues.items()
+        if queue['occupancy'] is not None and queue['occupancy'] >= setting.inference_ready_threshold
+    ]
+    if saturated:
+        raise HTTPException(
+            status_code=503,
+            detail={'ready': False, 'saturated_queues': saturated, 'queues': queues},
+            headers={"Retry-After": "1"}
+        )
+    
+    return {'ready': True, 'queues': queues}
+
 @router.post("/analyze-comment")
-def analyze_single_comment(request: CommentRequest):
+async def analyze_single_comment(request: CommentRequest, response: Response):
     """Analizar un solo comentario"""
     if not PIPELINE_AVAILABLE:
         raise HTTPException(status_code=503, detail="Pipeline no disponible")
     
     try:
-        result = toxicity_pipeline.analyze_single_comment(request.comment)
+        result = (await _predict([request.comment]))[0]
+        _set_occupancy_header(response, PRIORITY_INTERACTIVE)
         return {
             'success': True,
             'result': result
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analizando comentario: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/analyze-comments")
-def analyze_multiple_comments(request: CommentsRequest):
+async def analyze_multiple_comments(request: CommentsRequest, response: Response):
     """Analizar múltiples comentarios"""
     if not PIPELINE_AVAILABLE:
         raise HTTPException(status_code=503, detail="Pipeline no disponible")
     
     try:
-        results = toxicity_pipeline.predictor.predict_batch(request.comments)
+        results = await _predict(request.comments)
+        _set_occupancy_header(response, PRIORITY_INTERACTIVE)
         
         # Estadísticas rápidas
         toxic_count = sum(1 for r in results if r.get('is_toxic', False))
@@ -71,24 +123,111 @@ def analyze_multiple_comments(request: CommentsRequest):
             'toxicity_rate': toxic_count / len(results) if results else 0,
             'results': results
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error analizando comentarios: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/analyze-youtube")
-def analyze_youtube_data(request: YouTubeAnalysisRequest):
+async def analyze_youtube_data(request: YouTubeAnalysisRequest, response: Response):
     """Analizar datos scraped de YouTube"""
     if not PIPELINE_AVAILABLE:
         raise HTTPException(status_code=503, detail="Pipeline no disponible")
     
     try:
-        analysis = toxicity_pipeline.analyze_youtube_comments(request.scraped_data)
+        analysis = await toxicity_pipeline.analyze_youtube_comments_async(request.scraped_data, bounded=True)
+        _set_occupancy_header(response, PRIORITY_VIDEO_JOB)
         
         return {
             'success': True,
             'video_url': request.video_url,
             'analysis': analysis
         }
+    except QueueFullError as e:
+        raise _queue_full_response(e)
     except Exception as e:
         logger.error(f"Error analizando YouTube: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk-analyze")
+async def bulk_analyze_file(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    text_column: Optional[str] = Form(None)
+):
+    """Subir un fichero CSV/JSONL/Parquet y analizarlo en background"""
+    if not PIPELINE_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Pipeline no disponible")
+    
+    loop = asyncio.get_event_loop()
+    try:
+        job = await loop.run_in_executor(None, bulk_job_manager.create_job, file.filename or "", text_column)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # Guardar el fichero en disco por trozos (sin cargarlo entero en memoria ni
+        # bloquear el event loop con la escritura)
+        f = await loop.run_in_executor(None, open, job['input_path'], 'wb')
+        try:
+            while True:
+                data = await file.read(1024 * 1024)
+                if not data:
+                    break
+                await loop.run_in_executor(None, f.write, data)
+        finally:
+            await loop.run_in_executor(None, f.close)
+    except Exception as e:
+        logger.error(f"Error guardando fichero subido: {e}")
+        job['status'] = 'failed'
+        await loop.run_in_executor(None, bulk_job_manager.delete_job, job['job_id'])
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    background_tasks.add_task(bulk_job_manager.run_job, job['job_id'], toxicity_pipeline.scheduler)
+    
+    return {
+        'success': True,
+        'job_id': job['job_id'],
+        'session_id': job['job_id'],
+        'status_url': f"{router.prefix}/bulk-jobs/{job['job_id']}",
+        'download_url': f"{router.prefix}/bulk-jobs/{job['job_id']}/download",
+        'message': "Análisis masivo iniciado. Conéctate al WebSocket con el job_id para seguir el progreso."
+    }
+
+@router.get("/bulk-jobs/{job_id}")
+def get_bulk_job(job_id: str):
+    """Estado de un trabajo de análisis masivo"""
+    job = bulk_job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    
+    return bulk_job_manager.public_view(job)
+
+@router.get("/bulk-jobs/{job_id}/download")
+def download_bulk_job(job_id: str):
+    """Descargar el CSV de resultados de un trabajo completado"""
+    job = bulk_job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    
+    if job['status'] != 'completed':
+        raise HTTPException(status_code=409, detail=f"El trabajo no ha terminado (estado: {job['status']})")
+    
+    return FileResponse(
+        job['output_path'],
+        media_type="text/csv",
+        filename=f"toxicity_{job_id}.csv"
+    )
+
+@router.delete("/bulk-jobs/{job_id}")
+def delete_bulk_job(job_id: str):
+    """Borrar un trabajo terminado y su CSV de resultados"""
+    job = bulk_job_manager.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    
+    if not bulk_job_manager.delete_job(job_id):
+        raise HTTPException(status_code=409, detail=f"El trabajo sigue en curso (estado: {job['status']})")
+    
+    return {'success': True, 'job_id': job_id}
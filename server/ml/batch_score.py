@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Scoring offline de datasets históricos sin pasar por HTTP.
+
+Reparte el fichero de entrada (CSV / JSONL / Parquet) en shards de filas
+consecutivas y los procesa en varios procesos, cada uno con su propio
+ToxicityPredictor cargado una sola vez. Cada shard terminado se escribe como
+un fichero Parquet independiente que actúa de checkpoint: si la ejecución se
+interrumpe, al relanzarla con el mismo directorio de salida solo se procesan
+los shards que faltan.
+
+Uso:
+    python -m server.ml.batch_score mlFlow/data/raw/hatespeech.csv --output-dir scores/ --workers 4
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from typing import List, Dict, Any, Optional
+
+from server.core.config import setting
+from server.core.print_dev import log_info, log_error
+from server.ml import dataset_io
+
+MANIFEST_FILE = "manifest.json"
+
+# Predictor del proceso worker (se carga una vez por proceso en _init_worker)
+_worker_predictor = None
+
+
+def shard_path(output_dir: str, shard_index: int) -> str:
+    return os.path.join(output_dir, f"shard_{shard_index:05d}.parquet")
+
+
+def plan_shards(total_rows: int, shard_size: int) -> List[Dict[str, int]]:
+    """Dividir el rango de filas en shards consecutivos"""
+    return [
+        {'index': i, 'start_row': start, 'end_row': min(start + shard_size, total_rows)}
+        for i, start in enumerate(range(0, total_rows, shard_size))
+    ]
+
+
+def load_or_create_manifest(output_dir: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Guardar la configuración de la ejecución o validar la existente.
+
+    Los checkpoints solo son reutilizables si la entrada y el tamaño de shard
+    no han cambiado; en otro caso se aborta para no mezclar resultados.
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        for key in ('input_path', 'input_size', 'text_column', 'shard_size', 'total_rows'):
+            if manifest.get(key) != config[key]:
+                raise ValueError(
+                    f"El directorio de salida contiene otra ejecución ({key}: {manifest.get(key)} != {config[key]}). "
+                    "Usa otro --output-dir o borra el existente."
+                )
+        return manifest
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    return config
+
+
+def _init_worker():
+    """Inicializador de cada proceso: cargar el modelo una sola vez"""
+    global _worker_predictor
+    from server.ml.predictor import ToxicityPredictor
+    _worker_predictor = ToxicityPredictor()
+
+
+def _score_shard(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Procesar un shard completo y escribirlo de forma atómica"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    started = time.time()
+    rows_out = []
+
+    for chunk in dataset_io.iter_text_chunks(
+        task['input_path'], task['format'], task['text_column'], task['batch_size'],
+        start_row=task['start_row'], end_row=task['end_row']
+    ):
+        predictions = _worker_predictor.predict_batch([row['text'] for row in chunk], task['batch_size'])
+        rows_out.extend(dataset_io.to_output_row(row, pred) for row, pred in zip(chunk, predictions))
+
+    table = pa.Table.from_pylist(rows_out) if rows_out else pa.table({c: [] for c in dataset_io.RESULT_COLUMNS})
+
+    # Escribir en un temporal y renombrar: un shard existe completo o no existe
+    tmp_path = task['output_path'] + ".tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, task['output_path'])
+
+    return {
+        'index': task['index'],
+        'rows': len(rows_out),
+        'seconds': time.time() - started,
+        'pid': os.getpid()
+    }
+
+
+def merge_shards(output_dir: str, shards: List[Dict[str, int]], output_format: str) -> str:
+    """Unir todos los shards en un único fichero Parquet o Arrow"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tables = [pq.read_table(shard_path(output_dir, shard['index'])) for shard in shards]
+    table = pa.concat_tables(tables) if tables else pa.table({c: [] for c in dataset_io.RESULT_COLUMNS})
+
+    if output_format == 'arrow':
+        merged_path = os.path.join(output_dir, "scores.arrow")
+        with pa.OSFile(merged_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    else:
+        merged_path = os.path.join(output_dir, "scores.parquet")
+        pq.write_table(table, merged_path)
+
+    return merged_path
+
+
+def run(input_path: str, output_dir: str, workers: int = 1, shard_size: int = 5000,
+        batch_size: Optional[int] = None, text_column: Optional[str] = None,
+        output_format: str = 'parquet') -> Dict[str, Any]:
+    """Ejecutar (o reanudar) el scoring de un fichero completo"""
+    if not dataset_io.PARQUET_AVAILABLE:
+        raise RuntimeError("El scoring offline escribe Parquet/Arrow: instala 'pyarrow'")
+
+    input_path = os.path.abspath(input_path)
+    file_format = dataset_io.detect_format(input_path)
+    text_column = dataset_io.resolve_text_column(input_path, file_format, text_column)
+    total_rows = dataset_io.count_rows(input_path, file_format)
+    batch_size = batch_size or setting.inference_batch_size
+
+    os.makedirs(output_dir, exist_ok=True)
+    load_or_create_manifest(output_dir, {
+        'input_path': input_path,
+        'input_size': os.path.getsize(input_path),
+        'text_column': text_column,
+        'shard_size': shard_size,
+        'total_rows': total_rows
+    })
+
+    shards = plan_shards(total_rows, shard_size)
+    pending = [shard for shard in shards if not os.path.exists(shard_path(output_dir, shard['index']))]
+    skipped_rows = sum(s['end_row'] - s['start_row'] for s in shards if s not in pending)
+
+    log_info(f"📂 {input_path}: {total_rows} filas en {len(shards)} shards "
+             f"({len(shards) - len(pending)} ya completados, {len(pending)} pendientes)")
+
+    tasks = [{
+        **shard,
+        'input_path': input_path,
+        'format': file_format,
+        'text_column': text_column,
+        'batch_size': batch_size,
+        'output_path': shard_path(output_dir, shard['index'])
+    } for shard in pending]
+
+    started = time.time()
+    scored_rows = 0
+
+    if tasks:
+        workers = max(1, min(workers, len(tasks)))
+        log_info(f"🚀 Lanzando {workers} procesos worker...")
+        # 'spawn' evita heredar estado de torch/CUDA del proceso padre
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(processes=workers, initializer=_init_worker) as pool:
+            for done in pool.imap_unordered(_score_shard, tasks):
+                scored_rows += done['rows']
+                log_info(f"✅ Shard {done['index']} completado: {done['rows']} filas en "
+                         f"{done['seconds']:.1f}s (pid {done['pid']})")
+
+    elapsed = time.time() - started
+    merged_path = merge_shards(output_dir, shards, output_format)
+
+    summary = {
+        'input_path': input_path,
+        'output_path': merged_path,
+        'total_rows': total_rows,
+        'scored_rows': scored_rows,
+        'resumed_rows': skipped_rows,
+        'shards': len(shards),
+        'workers': workers,
+        'elapsed_seconds': round(elapsed, 2),
+        'rows_per_second': round(scored_rows / elapsed, 2) if elapsed > 0 else 0.0
+    }
+    log_info(f"🎉 Scoring completado: {scored_rows} filas en {elapsed:.1f}s "
+             f"({summary['rows_per_second']} filas/s) -> {merged_path}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scoring offline de toxicidad para ficheros CSV/JSONL/Parquet")
+    parser.add_argument("input", type=str, help="Fichero de entrada (.csv, .jsonl o .parquet)")
+    parser.add_argument("--output-dir", type=str, required=True, help="Directorio de salida y checkpoints")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Número de procesos")
+    parser.add_argument("--shard-size", type=int, default=5000, help="Filas por shard (unidad de checkpoint)")
+    parser.add_argument("--batch-size", type=int, default=None, help="Tamaño de micro-lote para el modelo")
+    parser.add_argument("--text-column", type=str, default=None, help="Columna con el texto (auto por defecto)")
+    parser.add_argument("--format", type=str, choices=['parquet', 'arrow'], default='parquet', help="Formato de salida")
+    args = parser.parse_args()
+
+    try:
+        summary = run(
+            args.input, args.output_dir, workers=args.workers, shard_size=args.shard_size,
+            batch_size=args.batch_size, text_column=args.text_column, output_format=args.format
+        )
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    except Exception as e:
+        log_error(f"❌ Error en el scoring offline: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+from server.core.config import setting
+from server.core.metrics import LatencyWindow
+from server.core.print_dev import log_info
+
+
+class AdaptiveBatchSizer:
+    """
+    Ajuste en tiempo de ejecución del tamaño de micro-lote.
+
+    Tras cada micro-lote se registra su latencia. Cada `adjust_every`
+    muestras se calcula el p95 de la ventana: si queda por debajo del
+    objetivo (con margen) el tamaño crece `GROW_STEP` textos, si lo supera
+    se reduce un 30 %. Es un control AIMD sencillo (subida aditiva, bajada
+    multiplicativa) que se adapta a los núcleos disponibles, la longitud de
+    los textos y la carga actual.
+    """
+
+    GROW_STEP = 4
+    SHRINK_FACTOR = 0.7
+    # Solo se crece si el p95 está por debajo de este porcentaje del objetivo
+    GROW_MARGIN = 0.8
+
+    def __init__(self, initial: Optional[int] = None, min_size: Optional[int] = None,
+                 max_size: Optional[int] = None, target_p95: Optional[float] = None,
+                 adjust_every: int = 10, enabled: Optional[bool] = None):
+        self.min_size = max(1, min_size or setting.inference_batch_min)
+        self.max_size = max(self.min_size, max_size or setting.inference_batch_max)
+        self.target_p95 = target_p95 or setting.inference_p95_target
+        self.adjust_every = adjust_every
+        self.enabled = setting.inference_adaptive_batch if enabled is None else enabled
+
+        initial = initial or setting.inference_batch_size
+        self.current = min(self.max_size, max(self.min_size, initial))
+
+        self._window = LatencyWindow(max_samples=adjust_every)
+        self._samples_since_adjust = 0
+        self._lock = threading.Lock()
+        self.history = deque(maxlen=50)
+
+    def record(self, latency: float, batch_size: int):
+        """Registrar la latencia (segundos) de un micro-lote y ajustar si toca"""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            # Los lotes incompletos (final de un trabajo) no dicen nada del tamaño actual
+            if batch_size < self.current:
+                return
+
+            self._window.record(latency)
+            self._samples_since_adjust += 1
+            if self._samples_since_adjust < self.adjust_every:
+                return
+
+            p95 = self._window.percentile(95)
+            previous = self.current
+
+            if p95 > self.target_p95:
+                self.current = max(self.min_size, int(self.current * self.SHRINK_FACTOR))
+                reason = "shrink"
+            elif p95 < self.target_p95 * self.GROW_MARGIN:
+                self.current = min(self.max_size, self.current + self.GROW_STEP)
+                reason = "grow"
+            else:
+                reason = "hold"
+
+            # Empezar una ventana nueva para medir el tamaño nuevo
+            self._window = LatencyWindow(max_samples=self.adjust_every)
+            self._samples_since_adjust = 0
+
+            if self.current != previous:
+                self.history.append({
+                    'timestamp': time.time(),
+                    'from': previous,
+                    'to': self.current,
+                    'p95_ms': round(p95 * 1000, 2),
+                    'reason': reason
+                })
+                log_info(f"📐 Micro-lote ajustado {previous} -> {self.current} (p95 {p95 * 1000:.0f} ms, "
+                         f"objetivo {self.target_p95 * 1000:.0f} ms)")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'adaptive': self.enabled,
+                'current': self.current,
+                'min': self.min_size,
+                'max': self.max_size,
+                'target_p95_ms': round(self.target_p95 * 1000, 2),
+                'window': self._window.summary(),
+                'history': list(self.history)
+            }
@@ -0,0 +1,172 @@
+import os
+import time
+import uuid
+import shutil
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from server.core.config import setting
+from server.ml import dataset_io
+from server.ml.scheduler import PRIORITY_BACKFILL
+from server.scraper.progress_manager import progress_manager
+
+logger = logging.getLogger(__name__)
+
+
+class BulkJobManager:
+    """
+    Gestor de trabajos de análisis masivo de ficheros.
+
+    Cada trabajo lee el fichero subido en trozos, los pasa por el scheduler
+    de inferencia con prioridad 'backfill' y va escribiendo los resultados
+    en un CSV descargable. El progreso se envía por el WebSocket de
+    `progress_manager` usando el `job_id` como `session_id`.
+
+    El fichero subido se borra al terminar el trabajo; el trabajo y su CSV,
+    `ttl` segundos después (o antes con `delete_job`).
+    """
+
+    def __init__(self, jobs_dir: Optional[str] = None, ttl: Optional[float] = None):
+        self.jobs_dir = jobs_dir or setting.bulk_jobs_dir
+        self.ttl = ttl if ttl is not None else setting.bulk_job_ttl
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    def create_job(self, filename: str, text_column: Optional[str] = None) -> Dict[str, Any]:
+        """Registrar un trabajo nuevo y preparar su directorio de trabajo (bloqueante: desde un executor)"""
+        file_format = dataset_io.detect_format(filename)
+        self.sweep()
+        job_id = str(uuid.uuid4())
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+
+        extension = os.path.splitext(filename)[1].lower()
+        job = {
+            'job_id': job_id,
+            'status': 'pending',
+            'filename': filename,
+            'format': file_format,
+            'text_column': text_column,
+            'input_path': os.path.join(job_dir, f"input{extension}"),
+            'output_path': os.path.join(job_dir, "results.csv"),
+            'total_rows': 0,
+            'processed_rows': 0,
+            'toxic_rows': 0,
+            'created_at': datetime.now().isoformat(),
+            'finished_at': None,
+            'error': None
+        }
+        self.jobs[job_id] = job
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.jobs.get(job_id)
+
+    def delete_job(self, job_id: str) -> bool:
+        """Olvidar un trabajo que no está en curso y borrar su directorio"""
+        job = self.jobs.get(job_id)
+        if job is None or job['status'] in ('pending', 'running'):
+            return False
+        del self.jobs[job_id]
+        shutil.rmtree(os.path.join(self.jobs_dir, job_id), ignore_errors=True)
+        return True
+
+    def sweep(self) -> int:
+        """Borrar los trabajos terminados hace más de `ttl` segundos"""
+        if self.ttl <= 0:
+            return 0
+        now = datetime.now()
+        expired = [job_id for job_id, job in list(self.jobs.items())
+                   if job['finished_at'] and (now - datetime.fromisoformat(job['finished_at'])).total_seconds() > self.ttl]
+        for job_id in expired:
+            self.delete_job(job_id)
+        if expired:
+            logger.info(f"🧹 {len(expired)} trabajos masivos caducados eliminados")
+        return len(expired)
+
+    def public_view(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Estado del trabajo sin rutas internas del servidor"""
+        return {k: v for k, v in job.items() if k not in ('input_path', 'output_path')}
+
+    async def run_job(self, job_id: str, scheduler):
+        """Procesar el fichero de un trabajo en trozos (pensado para BackgroundTasks)"""
+        job = self.jobs[job_id]
+        loop = asyncio.get_event_loop()
+        writer = None
+        started = time.time()
+
+        try:
+            job['status'] = 'running'
+            await progress_manager.send_progress(job_id, 1, f"📂 Preparando fichero {job['filename']}...")
+
+            job['text_column'] = await loop.run_in_executor(
+                None, dataset_io.resolve_text_column, job['input_path'], job['format'], job['text_column']
+            )
+            job['total_rows'] = await loop.run_in_executor(
+                None, dataset_io.count_rows, job['input_path'], job['format']
+            )
+            logger.info(f"📂 Trabajo {job_id}: {job['total_rows']} filas, columna '{job['text_column']}'")
+
+            writer = dataset_io.CsvResultWriter(job['output_path'])
+            chunks = dataset_io.iter_text_chunks(
+                job['input_path'], job['format'], job['text_column'], setting.bulk_chunk_size
+            )
+
+            while True:
+                # Leer y escribir fuera del event loop para no bloquear el servidor
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+                if chunk is None:
+                    break
+
+                texts = [row['text'] for row in chunk]
+                predictions = await asyncio.wrap_future(scheduler.submit(texts, PRIORITY_BACKFILL))
+
+                output_rows = [dataset_io.to_output_row(row, pred) for row, pred in zip(chunk, predictions)]
+                await loop.run_in_executor(None, writer.write_rows, output_rows)
+
+                job['processed_rows'] += len(chunk)
+                job['toxic_rows'] += sum(1 for row in output_rows if row['is_toxic'])
+
+                percentage = int(100 * job['processed_rows'] / job['total_rows']) if job['total_rows'] else 100
+                await progress_manager.send_progress(
+                    job_id, min(percentage, 99),
+                    f"🤖 Analizadas {job['processed_rows']}/{job['total_rows']} filas..."
+                )
+
+            writer.close()
+            writer = None
+
+            elapsed = time.time() - started
+            job['status'] = 'completed'
+            job['finished_at'] = datetime.now().isoformat()
+            job['elapsed_seconds'] = round(elapsed, 2)
+            job['rows_per_second'] = round(job['processed_rows'] / elapsed, 2) if elapsed > 0 else 0.0
+            logger.info(f"🎉 Trabajo {job_id} completado: {job['processed_rows']} filas en {elapsed:.1f}s")
+
+            await progress_manager.send_completion(job_id, True, self.public_view(job))
+
+        except Exception as e:
+            logger.error(f"❌ Error en trabajo masivo {job_id}: {e}")
+            job['status'] = 'failed'
+            job['error'] = str(e)
+            job['finished_at'] = datetime.now().isoformat()
+            await progress_manager.send_completion(job_id, False, error=str(e))
+        finally:
+            if writer:
+                writer.close()
+            # El fichero subido ya no hace falta: solo se conserva el CSV de resultados
+            await loop.run_in_executor(None, self._remove_input, job)
+
+    @staticmethod
+    def _remove_input(job: Dict[str, Any]):
+        try:
+            os.remove(job['input_path'])
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo borrar el fichero subido {job['input_path']}: {e}")
+
+
+# Instancia global
+bulk_job_manager = BulkJobManager()
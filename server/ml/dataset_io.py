@@ -0,0 +1,171 @@
+import os
+import csv
+import json
+from typing import List, Dict, Any, Optional, Iterator
+
+from server.core.print_dev import log_info, log_warning
+
+# Parquet es opcional: solo se necesita para leer/escribir ficheros .parquet
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Formatos de entrada soportados (extensión -> formato)
+SUPPORTED_FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.parquet': 'parquet'
+}
+
+# Columnas candidatas para el texto del comentario, por orden de preferencia
+TEXT_COLUMN_CANDIDATES = ['comment', 'Comment', 'text', 'Text', 'content', 'Content', 'Text_Clean']
+
+# Columnas que se añaden a cada fila con el resultado del modelo
+RESULT_COLUMNS = ['row_index', 'text', 'is_toxic', 'toxicity_confidence', 'categories_detected', 'error']
+
+
+def detect_format(path: str) -> str:
+    """Obtener el formato de un fichero a partir de su extensión"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SUPPORTED_FORMATS:
+        raise ValueError(f"Formato no soportado: '{extension}'. Usa uno de: {', '.join(sorted(SUPPORTED_FORMATS))}")
+
+    file_format = SUPPORTED_FORMATS[extension]
+    if file_format == 'parquet' and not PARQUET_AVAILABLE:
+        raise ValueError("Para leer ficheros Parquet es necesario instalar 'pyarrow'")
+    return file_format
+
+
+def read_columns(path: str, file_format: str) -> List[str]:
+    """Leer los nombres de columna de un fichero sin cargarlo entero"""
+    if file_format == 'csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return next(csv.reader(f), [])
+
+    if file_format == 'jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    return list(json.loads(line).keys())
+        return []
+
+    return list(pq.ParquetFile(path).schema_arrow.names)
+
+
+def resolve_text_column(path: str, file_format: str, text_column: Optional[str] = None) -> str:
+    """Validar la columna de texto indicada o detectarla automáticamente"""
+    columns = read_columns(path, file_format)
+
+    if text_column:
+        if text_column not in columns:
+            raise ValueError(f"La columna '{text_column}' no existe. Columnas disponibles: {columns}")
+        return text_column
+
+    for candidate in TEXT_COLUMN_CANDIDATES:
+        if candidate in columns:
+            log_info(f"📄 Columna de texto detectada automáticamente: {candidate}")
+            return candidate
+
+    raise ValueError(f"No se encontró una columna de texto. Indica 'text_column'. Columnas disponibles: {columns}")
+
+
+def count_rows(path: str, file_format: str) -> int:
+    """Contar filas de datos (sin cabecera) para poder reportar progreso"""
+    if file_format == 'csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+    if file_format == 'jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            return sum(1 for line in f if line.strip())
+
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def iter_text_chunks(path: str, file_format: str, text_column: str, chunk_size: int,
+                     start_row: int = 0, end_row: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Leer un fichero en streaming y devolver trozos de filas.
+
+    Cada fila es un diccionario {'row_index', 'text'}; nunca se carga el
+    fichero completo en memoria. `start_row`/`end_row` permiten leer solo
+    un rango de filas (usado para repartir el trabajo entre procesos).
+    """
+    chunk = []
+
+    for row_index, text in _iter_texts(path, file_format, text_column):
+        if row_index < start_row:
+            continue
+        if end_row is not None and row_index >= end_row:
+            break
+
+        chunk.append({'row_index': row_index, 'text': '' if text is None else str(text)})
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def _iter_texts(path: str, file_format: str, text_column: str) -> Iterator:
+    """Iterar (índice de fila, texto) para cualquiera de los formatos soportados"""
+    if file_format == 'csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row_index, row in enumerate(csv.DictReader(f)):
+                yield row_index, row.get(text_column)
+
+    elif file_format == 'jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            row_index = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield row_index, json.loads(line).get(text_column)
+                except json.JSONDecodeError as e:
+                    log_warning(f"⚠️ Línea JSONL inválida en fila {row_index}: {e}")
+                    yield row_index, None
+                row_index += 1
+
+    else:
+        row_index = 0
+        for batch in pq.ParquetFile(path).iter_batches(columns=[text_column]):
+            for text in batch.column(0).to_pylist():
+                yield row_index, text
+                row_index += 1
+
+
+def to_output_row(row: Dict[str, Any], prediction: Dict[str, Any]) -> Dict[str, Any]:
+    """Aplanar una predicción para escribirla como fila de salida"""
+    return {
+        'row_index': row['row_index'],
+        'text': row['text'],
+        'is_toxic': bool(prediction.get('is_toxic', False)),
+        'toxicity_confidence': float(prediction.get('toxicity_confidence', 0.0)),
+        'categories_detected': '|'.join(prediction.get('categories_detected', [])),
+        'error': prediction.get('error', '')
+    }
+
+
+class CsvResultWriter:
+    """Escritor incremental de resultados en CSV"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=RESULT_COLUMNS)
+        self._writer.writeheader()
+        self.rows_written = 0
+
+    def write_rows(self, rows: List[Dict[str, Any]]):
+        self._writer.writerows(rows)
+        self._file.flush()
+        self.rows_written += len(rows)
+
+    def close(self):
+        self._file.close()
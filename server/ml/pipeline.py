@@ -1,5 +1,10 @@
 from typing import List, Dict, Any
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from server.ml.predictor import ToxicityPredictor
+from server.ml.scheduler import InferenceScheduler, PRIORITY_INTERACTIVE, PRIORITY_VIDEO_JOB
+from server.core.metrics import metrics_registry
+import threading
+import asyncio
 import logging
 
 class ToxicityPipeline:
@@ -8,16 +13,47 @@ class ToxicityPipeline:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.predictor = ToxicityPredictor()
+        # Todas las inferencias pasan por el scheduler para respetar prioridades
+        self.scheduler = InferenceScheduler(self.predictor)
+        metrics_registry.register("inference_scheduler", self.scheduler.get_metrics)
         self.logger.info("ToxicityPipeline inicializado")
     
     def analyze_youtube_comments(self, scraped_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analizar comentarios de YouTube scraped - INCLUYENDO RESPUESTAS"""
+        comment_texts, comment_metadata = self._collect_texts(scraped_data)
         
-        # Extraer textos de comentarios Y respuestas
+        if not comment_texts:
+            return self._empty_analysis()
+        
+        # Predecir toxicidad para TODOS los textos (comentarios + respuestas)
+        self.logger.info(f"Analizando {len(comment_texts)} textos total (comentarios + respuestas)")
+        predictions = self.scheduler.predict(comment_texts, PRIORITY_VIDEO_JOB)
+        
+        return self._build_analysis(scraped_data, predictions, comment_metadata)
+    
+    async def analyze_youtube_comments_async(self, scraped_data: Dict[str, Any], bounded: bool = False) -> Dict[str, Any]:
+        """Versión async: espera al scheduler sin ocupar un hilo (QueueFullError si bounded y la cola está llena)"""
+        comment_texts, comment_metadata = self._collect_texts(scraped_data)
+        
+        if not comment_texts:
+            return self._empty_analysis()
+        
+        self.logger.info(f"Analizando {len(comment_texts)} textos total (comentarios + respuestas)")
+        future = self.scheduler.submit(comment_texts, PRIORITY_VIDEO_JOB, bounded=bounded)
+        predictions = await asyncio.wrap_future(future)
+        
+        return self._build_analysis(scraped_data, predictions, comment_metadata)
+    
+    def _collect_texts(self, scraped_data: Dict[str, Any]):
+        """Extraer textos de comentarios Y respuestas junto con su origen"""
+        return self._collect_thread_texts(scraped_data.get("threads", []))
+    
+    def _collect_thread_texts(self, threads: List[Dict[str, Any]]):
+        """Textos y origen de una lista de hilos (thread_index relativo a la lista)"""
         comment_texts = []
         comment_metadata = []  # Para rastrear origen (comentario vs respuesta)
         
-        for thread_idx, thread in enumerate(scraped_data.get("threads", [])):
+        for thread_idx, thread in enumerate(threads):
             # 🎯 ANALIZAR COMENTARIO PRINCIPAL
             if "comment" in thread and thread["comment"]:
                 comment_texts.append(thread["comment"])
@@ -42,25 +78,27 @@ class ToxicityPipeline:
                             'parent_author': thread.get('author', 'Desconocido')
                         })
         
-        if not comment_texts:
-            return {
-                'total_comments': 0,
-                'total_replies': 0,
-                'toxic_comments': 0,
-                'toxic_replies': 0,
-                'toxicity_rate': 0.0,
-                'analysis_results': [],
-                'summary': {
-                    'categories_found': {},
-                    'most_toxic_comment': None,
-                    'most_toxic_reply': None,
-                    'average_toxicity': 0.0
-                }
+        return comment_texts, comment_metadata
+    
+    def _empty_analysis(self) -> Dict[str, Any]:
+        return {
+            'total_comments': 0,
+            'total_replies': 0,
+            'toxic_comments': 0,
+            'toxic_replies': 0,
+            'toxicity_rate': 0.0,
+            'analysis_results': [],
+            'summary': {
+                'categories_found': {},
+                'most_toxic_comment': None,
+                'most_toxic_reply': None,
+                'average_toxicity': 0.0
             }
-        
-        # Predecir toxicidad para TODOS los textos (comentarios + respuestas)
-        self.logger.info(f"Analizando {len(comment_texts)} textos total (comentarios + respuestas)")
-        predictions = self.predictor.predict_batch(comment_texts)
+        }
+    
+    def _build_analysis(self, scraped_data: Dict[str, Any], predictions: List[Dict[str, Any]],
+                        comment_metadata: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Agregar las predicciones en el resumen del vídeo y anotarlas en los threads"""
         
         # 🎯 SEPARAR RESULTADOS POR TIPO
         main_comments_analysis = []
@@ -151,7 +189,7 @@ class ToxicityPipeline:
     
     def analyze_single_comment(self, comment: str) -> Dict[str, Any]:
         """Analizar un solo comentario"""
-        return self.predictor.predict_single(comment)
+        return self.scheduler.predict([comment], PRIORITY_INTERACTIVE)[0]
     
     def get_health_status(self) -> Dict[str, Any]:
         """Estado de salud del pipeline"""
@@ -160,5 +198,104 @@ class ToxicityPipeline:
         return {
             'status': 'healthy' if model_info['model_loaded'] else 'unhealthy',
             'model_info': model_info,
+            'queue': self.scheduler.occupancy(),
+            'batch_size': self.scheduler.batch_sizer.get_metrics(),
+            'scheduler': self.scheduler.get_metrics(),
             'pipeline_version': '1.0.0'
-        }
\ No newline at end of file
+        }
+
+
+class StreamingAnalysis:
+    """
+    Análisis de un vídeo que se alimenta por lotes de hilos mientras el scraping continúa.
+    
+    `add_threads` (llamado desde el hilo del scraper) encola la inferencia del
+    lote en el scheduler sin bloquear; `finish` espera lo pendiente, analiza
+    los hilos que no llegaron por lotes y devuelve lo mismo que
+    `analyze_youtube_comments`. Los lotes de hilos que no acaban en el
+    resultado final (p. ej. backend HTTP que cae a Selenium) se ignoran.
+    Con `deadline`, los lotes que no terminan a tiempo se cancelan y el
+    análisis se marca como parcial (`partial`, `unanalyzed_threads`).
+    `cancel` descarta lo pendiente cuando el trabajo se cancela.
+    """
+    
+    def __init__(self, pipeline: ToxicityPipeline):
+        self.pipeline = pipeline
+        self._batches = []  # (hilos, metadata, future)
+        self._lock = threading.Lock()
+        self.threads_streamed = 0
+        self.cancelled = False
+    
+    def add_threads(self, threads: List[Dict[str, Any]]):
+        if self.cancelled:
+            return
+        texts, metadata = self.pipeline._collect_thread_texts(threads)
+        future = self.pipeline.scheduler.submit(texts, PRIORITY_VIDEO_JOB) if texts else None
+        with self._lock:
+            self._batches.append((list(threads), metadata, future))
+            self.threads_streamed += len(threads)
+    
+    def cancel(self) -> int:
+        """Cancelar los lotes que el scheduler aún no ha empezado; devuelve cuántos"""
+        with self._lock:
+            self.cancelled = True
+            futures = [future for _, _, future in self._batches if future is not None]
+        cancelled = sum(1 for future in futures if future.cancel())
+        if cancelled:
+            self.pipeline.logger.info(f"🛑 Análisis cancelado: {cancelled} lotes descartados")
+        return cancelled
+    
+    def finish(self, scraped_data: Dict[str, Any], deadline=None) -> Dict[str, Any]:
+        threads = scraped_data.get("threads", [])
+        with self._lock:
+            known = {id(thread) for batch_threads, _, _ in self._batches for thread in batch_threads}
+        missing = [thread for thread in threads if id(thread) not in known]
+        if missing:
+            self.add_threads(missing)
+        self.pipeline.logger.info(f"Análisis incremental: {len(threads) - len(missing)} hilos analizados durante "
+                                  f"el scraping, {len(missing)} al final")
+        
+        # Predicciones de cada hilo (por identidad), reordenadas según el resultado final
+        by_thread = {}
+        timed_out = set()
+        with self._lock:
+            batches = list(self._batches)
+        for batch_threads, metadata, future in batches:
+            try:
+                predictions = future.result(timeout=deadline.remaining() if deadline else None) if future else []
+            except FutureTimeoutError:
+                # Plazo agotado: el scheduler descarta el lote si aún no ha empezado
+                future.cancel()
+                timed_out.update(id(thread) for thread in batch_threads)
+                continue
+            for prediction, meta in zip(predictions, metadata):
+                by_thread.setdefault(id(batch_threads[meta['thread_index']]), []).append((prediction, meta))
+        
+        predictions = []
+        comment_metadata = []
+        for thread_idx, thread in enumerate(threads):
+            for prediction, meta in by_thread.get(id(thread), []):
+                predictions.append(prediction)
+                comment_metadata.append({**meta, 'thread_index': thread_idx})
+        
+        analysis = (self.pipeline._build_analysis(scraped_data, predictions, comment_metadata)
+                    if predictions else self.pipeline._empty_analysis())
+        unanalyzed = sum(1 for thread in threads if id(thread) in timed_out)
+        if unanalyzed:
+            self.pipeline.logger.warning(f"⏰ Plazo agotado: {unanalyzed} hilos sin analizar")
+            analysis['partial'] = True
+            analysis['unanalyzed_threads'] = unanalyzed
+        return analysis
+
+
+# Pipeline compartido por las rutas y los trabajos en background (un solo modelo en memoria)
+_shared_pipeline = None
+_shared_pipeline_lock = threading.Lock()
+
+def get_shared_pipeline() -> ToxicityPipeline:
+    """Obtener (creando la primera vez) el pipeline compartido del proceso"""
+    global _shared_pipeline
+    with _shared_pipeline_lock:
+        if _shared_pipeline is None:
+            _shared_pipeline = ToxicityPipeline()
+        return _shared_pipeline
\ No newline at end of file
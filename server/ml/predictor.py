@@ -7,6 +7,7 @@ from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
 from datetime import datetime
 from server.core.print_dev import log_info, log_error, log_warning, log_debug
+from server.core.config import setting
 
 # Importar funciones optimizadas para carga de modelo
 from server.ml.api import get_model_efficiently, suppress_torch_numpy_warnings
@@ -98,15 +99,22 @@ class ToxicityPredictor:
         )
         self.model_metrics = {"model_type": "base", "trained": False}
     
-    def predict_single(self, text: str) -> Dict[str, Any]:
-        """Predecir toxicidad para un solo comentario"""
+    # Etiquetas del modelo multi-label (en el orden de salida de los logits)
+    LABELS = [
+        'IsToxic', 'IsAbusive', 'IsThreat', 'IsProvocative', 
+        'IsObscene', 'IsHatespeech', 'IsRacist', 'IsNationalist',
+        'IsSexist', 'IsHomophobic', 'IsReligiousHate', 'IsRadicalism'
+    ]
+    
+    def _predict_probabilities(self, texts: List[str]) -> np.ndarray:
+        """Tokenizar y ejecutar el modelo sobre un lote de textos en una sola pasada"""
         
         # Preprocesamiento básico
-        cleaned_text = text.strip().lower()
+        cleaned_texts = [text.strip().lower() for text in texts]
         
-        # Tokenización
+        # Tokenización (padding al texto más largo del lote)
         inputs = self.tokenizer(
-            cleaned_text,
+            cleaned_texts,
             truncation=True,
             padding=True,
             max_length=512,
@@ -117,21 +125,19 @@ class ToxicityPredictor:
         # Predicción
         with torch.no_grad():
             outputs = self.model(**inputs)
-            probabilities = torch.sigmoid(outputs.logits).cpu().numpy()[0]
+            probabilities = torch.sigmoid(outputs.logits).cpu().numpy()
+        
+        return probabilities
+    
+    def _build_result(self, text: str, probabilities: np.ndarray) -> Dict[str, Any]:
+        """Construir el resultado estructurado a partir de las probabilidades de un texto"""
         
         # Clasificación binaria
         threshold = 0.5
         predictions = (probabilities > threshold).astype(int)
         
-        # Etiquetas
-        labels = [
-            'IsToxic', 'IsAbusive', 'IsThreat', 'IsProvocative', 
-            'IsObscene', 'IsHatespeech', 'IsRacist', 'IsNationalist',
-            'IsSexist', 'IsHomophobic', 'IsReligiousHate', 'IsRadicalism'
-        ]
-        
         # Ajustar etiquetas
-        labels = labels[:len(probabilities)]
+        labels = self.LABELS[:len(probabilities)]
         
         # Resultado estructurado
         categories_detected = []
@@ -152,25 +158,50 @@ class ToxicityPredictor:
             'model_version': self.get_model_info()['version']
         }
     
-    def predict_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
-        """Predecir toxicidad para múltiples comentarios"""
+    def _build_error_result(self, text: str, error: Exception) -> Dict[str, Any]:
+        """Resultado neutro para un texto que no se pudo procesar"""
+        return {
+            'text': text,
+            'is_toxic': False,
+            'toxicity_confidence': 0.0,
+            'categories_detected': [],
+            'category_scores': {},
+            'error': str(error),
+            'processing_time': datetime.now().isoformat()
+        }
+    
+    def predict_single(self, text: str) -> Dict[str, Any]:
+        """Predecir toxicidad para un solo comentario"""
+        probabilities = self._predict_probabilities([text])[0]
+        return self._build_result(text, probabilities)
+    
+    def predict_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Predecir toxicidad para múltiples comentarios.
+        
+        Los textos se procesan en micro-lotes de `batch_size` (una sola llamada
+        al modelo por micro-lote). Si un micro-lote falla, se reintenta texto a
+        texto para aislar el comentario problemático.
+        """
+        if batch_size is None:
+            batch_size = setting.inference_batch_size
+        batch_size = max(1, int(batch_size))
+        
         results = []
         
-        for text in texts:
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
             try:
-                result = self.predict_single(text)
-                results.append(result)
+                probabilities = self._predict_probabilities(chunk)
+                results.extend(self._build_result(text, probs) for text, probs in zip(chunk, probabilities))
             except Exception as e:
-                log_error(f"Error procesando texto: {e}")
-                results.append({
-                    'text': text,
-                    'is_toxic': False,
-                    'toxicity_confidence': 0.0,
-                    'categories_detected': [],
-                    'category_scores': {},
-                    'error': str(e),
-                    'processing_time': datetime.now().isoformat()
-                })
+                log_warning(f"Error procesando micro-lote de {len(chunk)} textos, reintentando uno a uno: {e}")
+                for text in chunk:
+                    try:
+                        results.append(self.predict_single(text))
+                    except Exception as inner_e:
+                        log_error(f"Error procesando texto: {inner_e}")
+                        results.append(self._build_error_result(text, inner_e))
         
         return results
     
@@ -0,0 +1,263 @@
+import math
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from typing import List, Dict, Any, Optional
+
+from server.core.config import setting
+from server.core.metrics import LatencyWindow
+from server.ml.batch_sizer import AdaptiveBatchSizer
+from server.core.print_dev import log_info, log_error
+
+# Clases de prioridad, de mayor a menor
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_VIDEO_JOB = "video_job"
+PRIORITY_BACKFILL = "backfill"
+PRIORITY_CLASSES = [PRIORITY_INTERACTIVE, PRIORITY_VIDEO_JOB, PRIORITY_BACKFILL]
+
+
+class QueueFullError(Exception):
+    """La cola de una clase de prioridad no admite más textos"""
+
+    def __init__(self, priority: str, pending: int, limit: int, retry_after: int):
+        super().__init__(f"Cola de inferencia '{priority}' llena ({pending}/{limit} textos pendientes)")
+        self.priority = priority
+        self.pending = pending
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+class _InferenceJob:
+    """Petición de inferencia pendiente dentro del scheduler"""
+
+    def __init__(self, texts: List[str], priority: str):
+        self.texts = texts
+        self.priority = priority
+        self.results: List[Dict[str, Any]] = []
+        self.offset = 0
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.offset >= len(self.texts)
+
+
+def _resolve(future: Future, result=None, exception: Optional[BaseException] = None):
+    """Completar el Future salvo que se haya cancelado mientras se ejecutaba"""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+class InferenceScheduler:
+    """
+    Scheduler con prioridades delante del predictor.
+
+    Un único hilo worker ejecuta el modelo. Los trabajos se trocean en
+    micro-lotes y, tras cada micro-lote, se vuelve a elegir la cola de mayor
+    prioridad con trabajo pendiente: una comprobación interactiva espera como
+    mucho un micro-lote de un vídeo de 1000 comentarios, no el vídeo entero.
+    Dentro de una misma clase los trabajos se alternan por turnos.
+
+    El tamaño del micro-lote lo decide un AdaptiveBatchSizer; si se pasa
+    `micro_batch_size` el tamaño queda fijo.
+
+    Cada clase tiene un límite de textos pendientes. Las peticiones enviadas
+    con `bounded=True` (las rutas HTTP) se rechazan con QueueFullError en
+    lugar de esperar cuando la cola está llena.
+    """
+
+    def __init__(self, predictor, micro_batch_size: Optional[int] = None,
+                 latency_targets: Optional[Dict[str, float]] = None,
+                 batch_sizer: Optional[AdaptiveBatchSizer] = None,
+                 queue_limits: Optional[Dict[str, int]] = None):
+        self.predictor = predictor
+        if batch_sizer is None:
+            batch_sizer = AdaptiveBatchSizer(initial=micro_batch_size, enabled=False if micro_batch_size else None)
+        self.batch_sizer = batch_sizer
+        self.latency_targets = latency_targets or setting.inference_latency_targets
+        self.queue_limits = queue_limits or setting.inference_queue_limits
+
+        self._queues = {priority: deque() for priority in PRIORITY_CLASSES}
+        self._pending_texts = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+        # Métricas por clase
+        self._queue_wait = {priority: LatencyWindow() for priority in PRIORITY_CLASSES}
+        self._latency = {priority: LatencyWindow() for priority in PRIORITY_CLASSES}
+        self._target_misses = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._preemptions = 0
+        self._micro_batches = 0
+        self._rejections = {priority: 0 for priority in PRIORITY_CLASSES}
+        # Media móvil de segundos por texto, para estimar el Retry-After
+        self._seconds_per_text = 0.0
+
+    @property
+    def micro_batch_size(self) -> int:
+        return self.batch_sizer.current
+
+    def submit(self, texts: List[str], priority: str = PRIORITY_INTERACTIVE, bounded: bool = False) -> Future:
+        """
+        Encolar textos para inferencia; devuelve un Future con la lista de predicciones.
+
+        Con `bounded=True` lanza QueueFullError si la clase supera su límite
+        de textos pendientes.
+        """
+        if priority not in self._queues:
+            raise ValueError(f"Prioridad desconocida: {priority}. Usa una de {PRIORITY_CLASSES}")
+
+        job = _InferenceJob(list(texts), priority)
+        if not job.texts:
+            job.future.set_result([])
+            return job.future
+
+        with self._condition:
+            pending = self._pending_texts[priority]
+            limit = self.queue_limits.get(priority)
+            if bounded and limit and pending > 0 and pending + len(job.texts) > limit:
+                self._rejections[priority] += 1
+                raise QueueFullError(priority, pending, limit, self._estimate_retry_after(priority))
+
+            self._ensure_worker()
+            self._pending_texts[priority] += len(job.texts)
+            self._queues[priority].append(job)
+            self._condition.notify()
+        return job.future
+
+    def predict(self, texts: List[str], priority: str = PRIORITY_INTERACTIVE,
+                timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Versión bloqueante de submit()"""
+        return self.submit(texts, priority).result(timeout=timeout)
+
+    def _estimate_retry_after(self, priority: str) -> int:
+        """Segundos estimados hasta que se vacíe el trabajo por delante (llamar con el lock)"""
+        ahead = sum(self._pending_texts[p] for p in PRIORITY_CLASSES[:PRIORITY_CLASSES.index(priority) + 1])
+        return max(1, math.ceil(ahead * self._seconds_per_text))
+
+    def occupancy(self) -> Dict[str, Any]:
+        """Ocupación de las colas (textos pendientes / límite) por clase"""
+        with self._condition:
+            classes = {}
+            for priority in PRIORITY_CLASSES:
+                limit = self.queue_limits.get(priority)
+                pending = self._pending_texts[priority]
+                classes[priority] = {
+                    'pending_texts': pending,
+                    'limit': limit,
+                    'occupancy': round(pending / limit, 3) if limit else None
+                }
+        return classes
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+            self._worker.start()
+            log_info(f"🧮 Scheduler de inferencia iniciado (micro-lote: {self.micro_batch_size})")
+
+    def _next_job(self) -> _InferenceJob:
+        """Esperar y devolver el trabajo de la cola de mayor prioridad"""
+        with self._condition:
+            while True:
+                for priority in PRIORITY_CLASSES:
+                    if self._queues[priority]:
+                        return self._queues[priority].popleft()
+                self._condition.wait()
+
+    def _has_higher_priority_work(self, priority: str) -> bool:
+        with self._condition:
+            for other in PRIORITY_CLASSES:
+                if other == priority:
+                    return False
+                if self._queues[other]:
+                    return True
+        return False
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            if job.future.cancelled():
+                # Nadie espera ya el resultado (p. ej. plazo del trabajo agotado)
+                with self._condition:
+                    self._pending_texts[job.priority] -= len(job.texts) - job.offset
+                continue
+            try:
+                self._run_micro_batch(job)
+            except Exception as e:
+                log_error(f"❌ Error en micro-lote de inferencia ({job.priority}): {e}")
+                with self._condition:
+                    self._pending_texts[job.priority] -= len(job.texts) - job.offset
+                _resolve(job.future, exception=e)
+                continue
+
+            if job.done:
+                self._finish(job)
+            else:
+                if self._has_higher_priority_work(job.priority):
+                    self._preemptions += 1
+                # Devolver al final de su cola: turnos dentro de la clase
+                with self._condition:
+                    self._queues[job.priority].append(job)
+
+    def _run_micro_batch(self, job: _InferenceJob):
+        now = time.monotonic()
+        if job.started_at is None:
+            job.started_at = now
+            self._queue_wait[job.priority].record(now - job.enqueued_at)
+
+        chunk = job.texts[job.offset:job.offset + self.micro_batch_size]
+        started = time.monotonic()
+        job.results.extend(self.predictor.predict_batch(chunk, len(chunk)))
+        elapsed = time.monotonic() - started
+        self.batch_sizer.record(elapsed, len(chunk))
+        job.offset += len(chunk)
+        self._micro_batches += 1
+
+        with self._condition:
+            self._pending_texts[job.priority] -= len(chunk)
+            per_text = elapsed / len(chunk)
+            self._seconds_per_text = per_text if not self._seconds_per_text else 0.8 * self._seconds_per_text + 0.2 * per_text
+
+    def _finish(self, job: _InferenceJob):
+        latency = time.monotonic() - job.enqueued_at
+        self._latency[job.priority].record(latency)
+
+        target = self.latency_targets.get(job.priority)
+        if target and latency > target:
+            self._target_misses[job.priority] += 1
+
+        _resolve(job.future, job.results)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas por clase de prioridad (esperas en cola, latencias y objetivos)"""
+        with self._condition:
+            depths = {priority: len(queue) for priority, queue in self._queues.items()}
+        occupancy = self.occupancy()
+
+        classes = {}
+        for priority in PRIORITY_CLASSES:
+            target = self.latency_targets.get(priority)
+            classes[priority] = {
+                'queued_jobs': depths[priority],
+                **occupancy[priority],
+                'rejections': self._rejections[priority],
+                'queue_wait': self._queue_wait[priority].summary(),
+                'latency': self._latency[priority].summary(),
+                'latency_target_ms': round(target * 1000) if target else None,
+                'target_misses': self._target_misses[priority]
+            }
+
+        return {
+            'micro_batch_size': self.micro_batch_size,
+            'batch_sizer': self.batch_sizer.get_metrics(),
+            'micro_batches': self._micro_batches,
+            'preemptions': self._preemptions,
+            'classes': classes
+        }
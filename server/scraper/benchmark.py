@@ -0,0 +1,338 @@
+"""
+Benchmark offline de los backends del scraper (HTTP y Selenium) contra el servidor de replay.
+
+Genera un vídeo sintético con páginas de comentarios grabadas (mismo formato
+que youtubei/v1/next), lo sirve con ReplayServer y mide por backend:
+tiempo hasta N comentarios, tiempo hasta el primer lote, round trips
+(comandos de WebDriver o peticiones HTTP), CPU y memoria residente.
+No necesita conexión: se puede ejecutar en CI para detectar regresiones.
+
+    python -m server.scraper.benchmark --comments 100 --runs 3
+    python -m server.scraper.benchmark --backends http --max-seconds 5 --json benchmark.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+from server.core.print_dev import log_info, log_error
+from server.scraper.replay_server import ReplayServer
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+try:
+    import emoji
+    EMOJI_AVAILABLE = True
+except ImportError:
+    EMOJI_AVAILABLE = False
+
+SYNTHETIC_VIDEO_ID = "ReplayBench"
+
+BACKENDS = ("http", "selenium")
+
+_TEXTS = [
+    "Muy buen video, gracias por explicarlo tan claro 👏",
+    "No estoy de acuerdo con lo que dices en el minuto 3",
+    "¿Alguien más viendo esto en 2025? 😂",
+    "Qué pérdida de tiempo, no aporta nada",
+    "Me encantó la parte final ❤️❤️",
+    "Saludos desde Argentina 🇦🇷",
+]
+
+
+def _continuation(token: str) -> Dict[str, Any]:
+    return {"continuationItemRenderer": {
+        "trigger": "CONTINUATION_TRIGGER_ON_ITEM_SHOWN",
+        "continuationEndpoint": {
+            "commandMetadata": {"webCommandMetadata": {"apiUrl": "/youtubei/v1/next"}},
+            "continuationCommand": {"token": token, "request": "CONTINUATION_REQUEST_TYPE_WATCH_NEXT"}
+        }
+    }}
+
+
+def _entity(key: str, comment_id: str, index: int, reply_count: str = "") -> Dict[str, Any]:
+    return {"entityKey": key, "payload": {"commentEntityPayload": {
+        "key": key,
+        "properties": {"commentId": comment_id, "content": {"content": _TEXTS[index % len(_TEXTS)]},
+                       "publishedTime": f"hace {index % 23 + 1} horas"},
+        "author": {"displayName": f"@usuario{index}"},
+        "toolbar": {"likeCountNotliked": str(index % 50) if index % 3 else "", "replyCount": reply_count}
+    }}}
+
+
+def _write_json(path: str, data: Dict[str, Any]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def write_synthetic_video(fixtures_dir: str, video_id: str = SYNTHETIC_VIDEO_ID, threads: int = 200,
+                          page_size: int = 20, reply_every: int = 5, replies: int = 3) -> str:
+    """
+    Escribir en `fixtures_dir` (watch/ y next/) un vídeo con `threads` hilos en páginas
+    de `page_size`; uno de cada `reply_every` hilos tiene `replies` respuestas.
+    Devuelve el video_id.
+    """
+    os.makedirs(os.path.join(fixtures_dir, "watch"), exist_ok=True)
+    os.makedirs(os.path.join(fixtures_dir, "next"), exist_ok=True)
+
+    pages = max(1, -(-threads // page_size))
+    for page in range(pages):
+        items, mutations = [], []
+        for index in range(page * page_size, min(threads, (page + 1) * page_size)):
+            key, comment_id = f"{video_id}-c{index}", f"Ug{video_id}{index:05d}"
+            thread = {"commentViewModel": {"commentViewModel": {"commentKey": key, "commentId": comment_id}}}
+            has_replies = reply_every and replies and index % reply_every == 0
+            if has_replies:
+                reply_token = f"{video_id}_R{index}"
+                thread["replies"] = {"commentRepliesRenderer": {"contents": [_continuation(reply_token)]}}
+                _write_json(os.path.join(fixtures_dir, "next", f"{reply_token}.json"),
+                            _replies_page(video_id, index, comment_id, replies))
+            items.append({"commentThreadRenderer": thread})
+            mutations.append(_entity(key, comment_id, index, str(replies) if has_replies else ""))
+        if page + 1 < pages:
+            items.append(_continuation(f"{video_id}_P{page + 2}"))
+
+        action = "reloadContinuationItemsCommand" if page == 0 else "appendContinuationItemsAction"
+        _write_json(os.path.join(fixtures_dir, "next", f"{video_id}_P{page + 1}.json"), {
+            "onResponseReceivedEndpoints": [{action: {"targetId": "comments-section", "continuationItems": items}}],
+            "frameworkUpdates": {"entityBatchUpdate": {"mutations": mutations}}
+        })
+
+    player = {"videoDetails": {"videoId": video_id, "title": f"Vídeo sintético con {threads} comentarios",
+                               "author": "Canal de Benchmark", "shortDescription": "Página grabada para el benchmark."}}
+    initial_data = {"contents": {"twoColumnWatchNextResults": {"results": {"results": {"contents": [
+        {"itemSectionRenderer": {"sectionIdentifier": "comment-item-section", "targetId": "comments-section",
+                                 "contents": [_continuation(f"{video_id}_P1")]}}
+    ]}}}}}
+    config = {"INNERTUBE_API_KEY": "AIzaReplayKey",
+              "INNERTUBE_CONTEXT": {"client": {"clientName": "WEB", "clientVersion": "2.20251001.00.00"}}}
+    html = (
+        '<!DOCTYPE html>\n<html lang="es"><head><meta charset="utf-8">'
+        f'<title>{player["videoDetails"]["title"]} - YouTube</title>\n'
+        f'<script>var ytcfg = {{set: function () {{}}}}; ytcfg.set({json.dumps(config)});</script>\n'
+        '</head><body>\n<ytd-app></ytd-app>\n'
+        f'<script>var ytInitialPlayerResponse = {json.dumps(player, ensure_ascii=False)};</script>\n'
+        f'<script>var ytInitialData = {json.dumps(initial_data)};</script>\n'
+        '</body></html>\n'
+    )
+    with open(os.path.join(fixtures_dir, "watch", f"{video_id}.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+    return video_id
+
+
+def _replies_page(video_id: str, thread_index: int, thread_id: str, replies: int) -> Dict[str, Any]:
+    items, mutations = [], []
+    for reply in range(replies):
+        key = f"{video_id}-c{thread_index}-r{reply}"
+        items.append({"commentViewModel": {"commentKey": key, "commentId": f"{thread_id}.r{reply}"}})
+        mutations.append(_entity(key, f"{thread_id}.r{reply}", thread_index + reply + 1))
+    return {
+        "onResponseReceivedEndpoints": [{"appendContinuationItemsAction": {
+            "targetId": f"comment-replies-item-{thread_id}", "continuationItems": items}}],
+        "frameworkUpdates": {"entityBatchUpdate": {"mutations": mutations}}
+    }
+
+
+def _extract_emojis(text: str) -> List[str]:
+    if not EMOJI_AVAILABLE:
+        return []
+    return [char for char in text if char in emoji.EMOJI_DATA]
+
+
+def _process_rss_mb() -> Optional[float]:
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss / 2 ** 20
+    try:
+        import resource
+        # Pico de memoria del proceso (KB en Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+
+def count_webdriver_commands(driver) -> Counter:
+    """
+    Contar los comandos que el driver envía a chromedriver (un round trip cada uno).
+
+    Los WebElement también envían sus comandos con `driver.execute`, así que
+    quedan incluidos.
+    """
+    commands = Counter()
+    execute = driver.execute
+
+    def counted(command, params=None):
+        commands[command] += 1
+        return execute(command, params)
+
+    driver.execute = counted
+    return commands
+
+
+def _measure_http(base_url: str, video_url: str, max_comments: int) -> Dict[str, Any]:
+    from server.scraper.http_fetcher import HttpCommentFetcher
+
+    fetcher = HttpCommentFetcher(base_url=base_url)
+    first_batch = []
+    cpu_started, started = time.process_time(), time.perf_counter()
+    page = fetcher.fetch(video_url, max_comments, _extract_emojis,
+                         thread_callback=lambda batch: first_batch.append(time.perf_counter()))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'threads': len(page['threads']),
+        'replies': sum(len(thread['replies']) for thread in page['threads']),
+        'time_to_n_s': elapsed,
+        'time_to_first_batch_s': (first_batch[0] - started) if first_batch else None,
+        'round_trips': fetcher.stats['requests'],
+        'cpu_s': time.process_time() - cpu_started,
+        'rss_mb': _process_rss_mb(),
+    }
+
+
+def _measure_selenium(video_url: str, max_comments: int, extraction_mode: str, headless: bool) -> Dict[str, Any]:
+    from server.scraper.scrp_socket import YouTubeCommentScraperChrome
+    from server.scraper.browser_tabs import browser_cpu_seconds, browser_rss_bytes
+
+    class MeasuredScraper(YouTubeCommentScraperChrome):
+        """Scraper que cuenta los comandos de WebDriver y lee CPU y memoria de Chrome antes de cerrarlo"""
+
+        def setup_driver(self):
+            super().setup_driver()
+            self.commands = count_webdriver_commands(self.driver)
+            self.browser_cpu_started = browser_cpu_seconds(self.driver)
+            self.browser_cpu = self.browser_rss = None
+
+        def release_driver(self, failed=False):
+            if self.driver is not None:
+                cpu = browser_cpu_seconds(self.driver)
+                if cpu is not None and self.browser_cpu_started is not None:
+                    self.browser_cpu = cpu - self.browser_cpu_started
+                self.browser_rss = browser_rss_bytes(self.driver)
+            super().release_driver(failed)
+
+    first_batch = []
+    scraper = MeasuredScraper(headless=headless, extraction_mode=extraction_mode,
+                              thread_callback=lambda batch: first_batch.append(time.perf_counter()))
+    cpu_started, started = time.process_time(), time.perf_counter()
+    data = scraper.scrape_video_comments(video_url, max_comments)
+    elapsed = time.perf_counter() - started
+    if not data:
+        raise RuntimeError("El scraper Selenium no devolvió resultados")
+
+    rss_mb = _process_rss_mb()
+    return {
+        'threads': data['total_comments'],
+        'replies': data['total_threads'],
+        'time_to_n_s': elapsed,
+        'time_to_first_batch_s': (first_batch[0] - started) if first_batch else None,
+        'round_trips': sum(scraper.commands.values()),
+        'cpu_s': time.process_time() - cpu_started + (scraper.browser_cpu or 0),
+        'browser_cpu_s': scraper.browser_cpu,
+        'rss_mb': rss_mb + scraper.browser_rss / 2 ** 20 if rss_mb and scraper.browser_rss else rss_mb,
+        'browser_rss_mb': scraper.browser_rss / 2 ** 20 if scraper.browser_rss else None,
+    }
+
+
+def _median(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = {}
+    for key in samples[0]:
+        values = [sample[key] for sample in samples if sample[key] is not None]
+        summary[key] = round(statistics.median(values), 3) if values else None
+    summary['runs'] = len(samples)
+    return summary
+
+
+def run_benchmark(max_comments: int = 100, backends=BACKENDS, runs: int = 3, fixtures_dir: Optional[str] = None,
+                  video_id: Optional[str] = None, latency: float = 0.0, extraction_mode: str = "bulk",
+                  headless: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Medianas de `runs` ejecuciones por backend contra el replay.
+
+    Sin `fixtures_dir` se genera un vídeo sintético con más de `max_comments`
+    hilos en un directorio temporal. `latency` añade un retardo por respuesta
+    para simular la red.
+    """
+    with tempfile.TemporaryDirectory(prefix="replay-bench-") as tmp:
+        if fixtures_dir is None:
+            fixtures_dir = tmp
+            video_id = write_synthetic_video(tmp, threads=max_comments + 20)
+        video_id = video_id or SYNTHETIC_VIDEO_ID
+
+        results = {}
+        with ReplayServer(fixtures_dir, latency=latency, render_comments=True) as server:
+            video_url = f"{server.base_url}/watch?v={video_id}"
+            for backend in backends:
+                samples = []
+                for _ in range(runs):
+                    if backend == "http":
+                        samples.append(_measure_http(server.base_url, video_url, max_comments))
+                    else:
+                        samples.append(_measure_selenium(video_url, max_comments, extraction_mode, headless))
+                results[backend] = _median(samples)
+                log_info(f"⏱️ {backend}: {results[backend]['threads']} hilos en {results[backend]['time_to_n_s']}s, "
+                         f"{results[backend]['round_trips']} round trips (mediana de {runs})")
+        return results
+
+
+def check_budget(results: Dict[str, Dict[str, Any]], max_comments: int,
+                 max_seconds: Optional[float] = None) -> List[str]:
+    """Regresiones: backends que no llegaron a `max_comments` hilos o tardaron más de `max_seconds`"""
+    failures = []
+    for backend, summary in results.items():
+        if (summary['threads'] or 0) < max_comments:
+            failures.append(f"{backend}: {summary['threads']} hilos de {max_comments}")
+        if max_seconds is not None and summary['time_to_n_s'] > max_seconds:
+            failures.append(f"{backend}: {summary['time_to_n_s']}s hasta {max_comments} hilos (máximo {max_seconds}s)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de los backends del scraper")
+    parser.add_argument("--comments", type=int, default=100, help="Hilos a extraer (N)")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Backends separados por comas")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--dir", default=None, help="Fixtures grabados (por defecto, un vídeo sintético)")
+    parser.add_argument("--video-id", default=None, help="Vídeo de los fixtures de --dir")
+    parser.add_argument("--latency", type=float, default=0.0, help="Retardo por respuesta del replay (s)")
+    parser.add_argument("--mode", default="bulk", choices=["bulk", "network", "elements"],
+                        help="Modo de extracción del backend Selenium")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Fallar si un backend tarda más")
+    parser.add_argument("--json", default=None, help="Guardar los resultados en este fichero")
+    parser.add_argument("--show-browser", action="store_true")
+    args = parser.parse_args()
+
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    unknown = set(backends) - set(BACKENDS)
+    if unknown:
+        parser.error(f"Backends desconocidos: {', '.join(sorted(unknown))}")
+
+    results = run_benchmark(args.comments, backends, args.runs, args.dir, args.video_id, args.latency,
+                            args.mode, headless=not args.show_browser)
+    columns = ['threads', 'time_to_n_s', 'time_to_first_batch_s', 'round_trips', 'cpu_s', 'rss_mb']
+    print(f"{'':10}" + "".join(f"{column:>22}" for column in columns))
+    for backend, summary in results.items():
+        print(f"{backend:10}" + "".join(f"{str(summary[column]):>22}" for column in columns))
+
+    if args.json:
+        _write_json(args.json, results)
+        log_info(f"💾 Resultados guardados en {args.json}")
+
+    failures = check_budget(results, args.comments, args.max_seconds)
+    for failure in failures:
+        log_error(f"❌ Regresión del scraper: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
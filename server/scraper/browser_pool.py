@@ -0,0 +1,449 @@
+import time
+import uuid
+import threading
+from collections import deque
+from typing import Callable, Dict, Any, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+from server.core.config import setting
+from server.core.metrics import LatencyWindow, metrics_registry
+from server.core.print_dev import log_info, log_error, log_warning
+from server.scraper.browser_tabs import BrowserTab, browser_rss_bytes
+
+# Ruta del chromedriver resuelta por ChromeDriverManager (se instala una sola vez por proceso)
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+def build_chrome_options(headless=True, network_log=None):
+    """
+    Opciones de Chrome para Docker (compartidas por el scraper y el pool).
+
+    `network_log` activa el performance log con eventos de red; por defecto
+    solo con SCRAPER_EXTRACTION_MODE=network, el único modo que lo lee.
+    """
+    if network_log is None:
+        network_log = setting.scraper_extraction_mode == "network"
+    chrome_options = Options()
+
+    # Configuraciones obligatorias para Docker
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-plugins")
+    chrome_options.add_argument("--disable-images")
+    chrome_options.add_argument("--disable-web-security")
+    chrome_options.add_argument("--allow-running-insecure-content")
+    chrome_options.add_argument("--disable-webgl")
+    chrome_options.add_argument("--disable-features=VizDisplayCompositor")
+
+    # Las pestañas en segundo plano siguen cargando y haciendo scroll (varias pestañas por navegador)
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+
+    # User agent
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+
+    # Configuraciones adicionales para estabilidad
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option('useAutomationExtension', False)
+
+    # Performance log con eventos de red para capturar las respuestas de comentarios (CDP).
+    # Sin nadie que lo lea, Chrome acumularía todos los eventos de red del navegador
+    if network_log:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+    return chrome_options
+
+
+def create_chrome_driver(headless=True, network_log=None):
+    """
+    Lanzar un Chrome nuevo.
+
+    ChromeDriverManager().install() solo se ejecuta la primera vez; después
+    se reutiliza la ruta del binario. Si falla se usa el Chrome del sistema.
+    """
+    global _chromedriver_path
+    chrome_options = build_chrome_options(headless, network_log)
+    driver = None
+
+    try:
+        with _chromedriver_lock:
+            if _chromedriver_path is None:
+                _chromedriver_path = ChromeDriverManager().install()
+        driver = webdriver.Chrome(service=Service(_chromedriver_path), options=chrome_options)
+    except Exception as e:
+        log_error("❌ ChromeDriverManager falló: " + str(e))
+
+    if driver is None:
+        try:
+            driver = webdriver.Chrome(options=chrome_options)
+        except Exception as e:
+            log_error("❌ Chrome del sistema falló: " + str(e))
+            raise Exception(f"Error configurando Chrome en Docker: {e}")
+
+    # Configurar script para evitar detección
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+    return driver
+
+
+class PooledBrowser:
+    """Sesión de Chrome prestada por el pool"""
+
+    def __init__(self, driver):
+        self.id = str(uuid.uuid4())[:8]
+        self.driver = driver
+        self.uses = 0
+        self.created_at = time.time()
+        self.failed = False
+        
+        # Pestañas abiertas cuando el navegador se comparte entre varios trabajos
+        self.tabs: Dict[str, BrowserTab] = {}
+        self.lock = threading.RLock()
+        self.current_handle = None
+        self.base_handle = None
+
+    def mark_failed(self):
+        """Marcar la sesión como dañada para que se recicle al devolverla"""
+        self.failed = True
+
+
+class BrowserPool:
+    """
+    Pool acotado de sesiones de Chrome precalentadas.
+
+    Los trabajos piden prestada una sesión con acquire()/release() (o con
+    `with pool.borrow() as browser`). Al devolverla se resetea (storage,
+    cookies y about:blank) y se recicla tras `max_uses` usos, si el trabajo
+    falló o si no supera el health-check al volver a prestarse.
+
+    Con acquire_tab()/release_tab() varios trabajos comparten un navegador,
+    cada uno en su pestaña (hasta `max_tabs`). Las pestañas se agrupan en los
+    navegadores ya compartidos antes de lanzar otro; el navegador vuelve al
+    pool al cerrarse su última pestaña. Cada pestaña cuenta como un uso.
+    """
+
+    def __init__(self, size: Optional[int] = None, max_uses: Optional[int] = None,
+                 acquire_timeout: Optional[float] = None, driver_factory: Callable = create_chrome_driver,
+                 max_tabs: Optional[int] = None):
+        self.size = size or setting.scraper_pool_size
+        self.max_uses = max_uses or setting.scraper_pool_max_uses
+        self.acquire_timeout = acquire_timeout or setting.scraper_pool_acquire_timeout
+        self.max_tabs = max_tabs or setting.scraper_pool_max_tabs
+        self.driver_factory = driver_factory
+
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._closed = False
+
+        # Métricas
+        self._wait = LatencyWindow()
+        self._created = 0
+        self._recycled = {'max_uses': 0, 'error': 0, 'unhealthy': 0}
+        self._borrows = 0
+        self._timeouts = 0
+
+        # Navegadores compartidos por pestañas
+        self._shared = []
+        self._tabs_changed = threading.Condition(self._lock)
+        self._tab_stats = {'opened': 0, 'closed': 0, 'max_open': 0}
+        self._tab_heap = deque(maxlen=100)
+        self._tab_rss = deque(maxlen=100)
+
+    def warm(self, count: Optional[int] = None):
+        """Lanzar sesiones por adelantado para que el primer trabajo no pague el arranque"""
+        count = min(count or self.size, self.size)
+        launched = []
+        for _ in range(count):
+            if not self._slots.acquire(blocking=False):
+                break
+            try:
+                launched.append(self._launch())
+            except Exception as e:
+                self._slots.release()
+                log_error(f"❌ Error precalentando navegador: {e}")
+                break
+        for browser in launched:
+            self._put_idle(browser)
+        log_info(f"🔥 Pool de navegadores precalentado: {len(launched)}/{self.size} sesiones")
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledBrowser:
+        """Pedir prestada una sesión sana (espera si todas están ocupadas)"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+
+        if not self._slots.acquire(timeout=timeout):
+            self._timeouts += 1
+            raise TimeoutError(f"No hay navegadores libres en el pool tras {timeout:.0f}s")
+
+        browser = self._checkout()
+        self._wait.record(time.monotonic() - started)
+        return browser
+
+    def _checkout(self) -> PooledBrowser:
+        """Sesión sana para un hueco ya reservado en `_slots`"""
+        try:
+            browser = self._take_healthy_idle() or self._launch()
+        except Exception:
+            self._slots.release()
+            raise
+
+        browser.uses += 1
+        with self._lock:
+            self._in_use += 1
+            self._borrows += 1
+        return browser
+
+    def release(self, browser: PooledBrowser):
+        """Devolver una sesión al pool, reseteada o reciclada (o cerrada si el pool ya se cerró)"""
+        with self._lock:
+            self._in_use -= 1
+            closed = self._closed
+
+        try:
+            if closed:
+                self._quit(browser)
+            elif browser.failed:
+                self._recycle(browser, 'error')
+            elif browser.uses >= self.max_uses:
+                self._recycle(browser, 'max_uses')
+            elif self._reset(browser):
+                self._put_idle(browser)
+            else:
+                self._recycle(browser, 'error')
+        finally:
+            self._slots.release()
+            with self._tabs_changed:
+                self._tabs_changed.notify_all()
+
+    def acquire_tab(self, timeout: Optional[float] = None) -> BrowserTab:
+        """Abrir una pestaña en un navegador compartido (espera si todos tienen `max_tabs`)"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        # Reserva del hueco de pestaña mientras se abre (fuera del lock del pool)
+        reservation = f"pending-{uuid.uuid4()}"
+
+        while True:
+            with self._lock:
+                browser = next((b for b in self._shared
+                                if len(b.tabs) < self.max_tabs and not b.failed and b.uses < self.max_uses), None)
+                if browser:
+                    browser.uses += 1
+                    self._borrows += 1
+                    browser.tabs[reservation] = None
+            if browser:
+                break
+            # Sin pestañas libres: compartir un navegador más si el pool lo permite
+            if self._slots.acquire(blocking=False):
+                browser = self._checkout()
+                with self._lock:
+                    self._shared.append(browser)
+                    browser.tabs[reservation] = None
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    self._timeouts += 1
+                raise TimeoutError(f"No hay pestañas libres en el pool tras {timeout:.0f}s")
+            with self._tabs_changed:
+                self._tabs_changed.wait(min(remaining, 0.5))
+
+        try:
+            tab = self._open_tab(browser)
+        except Exception:
+            browser.mark_failed()
+            with self._lock:
+                browser.tabs.pop(reservation, None)
+            self._close_shared_if_empty(browser)
+            raise
+
+        with self._lock:
+            browser.tabs.pop(reservation, None)
+            browser.tabs[tab.id] = tab
+            self._tab_stats['opened'] += 1
+            self._tab_stats['max_open'] = max(self._tab_stats['max_open'], len(browser.tabs))
+        self._wait.record(time.monotonic() - started)
+        log_info(f"🗂️ Pestaña {tab.id} abierta en el navegador {browser.id} ({len(browser.tabs)}/{self.max_tabs})")
+        return tab
+
+    def release_tab(self, tab: BrowserTab):
+        """Cerrar la pestaña; el navegador vuelve al pool cuando no le quedan pestañas"""
+        browser = tab.browser
+        heap = tab.js_heap_bytes()
+        rss = browser_rss_bytes(browser.driver)
+        try:
+            with browser.lock:
+                driver = browser.driver
+                if browser.current_handle != tab.handle:
+                    driver.switch_to.window(tab.handle)
+                driver.close()
+                driver.switch_to.window(browser.base_handle)
+                browser.current_handle = browser.base_handle
+        except Exception as e:
+            log_warning(f"⚠️ Error cerrando pestaña {tab.id}: {e}")
+            browser.mark_failed()
+
+        with self._lock:
+            open_tabs = len(browser.tabs)
+            browser.tabs.pop(tab.id, None)
+            self._tab_stats['closed'] += 1
+            if heap:
+                self._tab_heap.append(heap)
+            if rss and open_tabs:
+                self._tab_rss.append(rss / open_tabs)
+        self._close_shared_if_empty(browser)
+
+    def _open_tab(self, browser: PooledBrowser) -> BrowserTab:
+        with browser.lock:
+            driver = browser.driver
+            if browser.base_handle is None:
+                browser.base_handle = driver.current_window_handle
+            driver.switch_to.new_window('tab')
+            browser.current_handle = driver.current_window_handle
+            return BrowserTab(browser, browser.current_handle)
+
+    def _close_shared_if_empty(self, browser: PooledBrowser):
+        with self._lock:
+            empty = not browser.tabs and browser in self._shared
+            if empty:
+                self._shared.remove(browser)
+            self._tabs_changed.notify_all()
+        if empty:
+            self.release(browser)
+
+    def borrow(self, timeout: Optional[float] = None):
+        """Context manager: `with pool.borrow() as browser: browser.driver.get(...)`"""
+        return _BrowserLease(self, timeout)
+
+    def close(self):
+        """Cerrar las sesiones libres; las prestadas se cierran al devolverlas"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for browser in idle:
+            self._quit(browser)
+
+    def _launch(self) -> PooledBrowser:
+        log_info("🐳 Lanzando nueva sesión de Chrome para el pool...")
+        browser = PooledBrowser(self.driver_factory())
+        with self._lock:
+            self._created += 1
+        return browser
+
+    def _put_idle(self, browser: PooledBrowser):
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._idle.append(browser)
+        if closed:
+            self._quit(browser)
+
+    def _take_healthy_idle(self) -> Optional[PooledBrowser]:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                browser = self._idle.popleft()
+            if self._is_healthy(browser):
+                return browser
+            self._recycle(browser, 'unhealthy')
+
+    def _is_healthy(self, browser: PooledBrowser) -> bool:
+        try:
+            return browser.driver.execute_script("return 1") == 1
+        except Exception as e:
+            log_warning(f"⚠️ Navegador {browser.id} no responde: {e}")
+            return False
+
+    def _reset(self, browser: PooledBrowser) -> bool:
+        """Limpiar estado del trabajo anterior (storage, cookies) y volver a about:blank"""
+        try:
+            driver = browser.driver
+            driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            log_warning(f"⚠️ Error reseteando navegador {browser.id}: {e}")
+            return False
+
+    def _recycle(self, browser: PooledBrowser, reason: str):
+        with self._lock:
+            self._recycled[reason] += 1
+        log_info(f"♻️ Reciclando navegador {browser.id} ({reason}, {browser.uses} usos)")
+        self._quit(browser)
+
+    def _quit(self, browser: PooledBrowser):
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            log_warning(f"⚠️ Error cerrando navegador {browser.id}: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'size': self.size,
+                'max_uses': self.max_uses,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'created': self._created,
+                'borrows': self._borrows,
+                'acquire_timeouts': self._timeouts,
+                'recycled': dict(self._recycled),
+                'wait': self._wait.summary(),
+                'tabs': {
+                    'max_per_browser': self.max_tabs,
+                    'shared_browsers': len(self._shared),
+                    'open': sum(len(b.tabs) for b in self._shared),
+                    **self._tab_stats,
+                    # Memoria por pestaña al cerrarla: heap JS propio y RSS de Chrome repartido entre pestañas
+                    'js_heap_mb_avg': round(sum(self._tab_heap) / len(self._tab_heap) / 2**20, 1) if self._tab_heap else None,
+                    'rss_mb_per_tab_avg': round(sum(self._tab_rss) / len(self._tab_rss) / 2**20, 1) if self._tab_rss else None
+                }
+            }
+
+
+class _BrowserLease:
+    """Préstamo de una sesión del pool; marca la sesión como fallida si hay excepción"""
+
+    def __init__(self, pool: BrowserPool, timeout: Optional[float]):
+        self.pool = pool
+        self.timeout = timeout
+        self.browser = None
+
+    def __enter__(self) -> PooledBrowser:
+        self.browser = self.pool.acquire(self.timeout)
+        return self.browser
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.browser.mark_failed()
+        self.pool.release(self.browser)
+        return False
+
+
+# Pool global del proceso (se crea al primer uso)
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            _browser_pool = BrowserPool()
+            metrics_registry.register("browser_pool", _browser_pool.get_metrics)
+        return _browser_pool
@@ -0,0 +1,156 @@
+import time
+import uuid
+from typing import Any, Optional
+
+from selenium.webdriver.remote.webelement import WebElement
+
+from server.core.print_dev import log_warning
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Memoria del heap JS de la pestaña (Chrome), en bytes
+TAB_HEAP_JS = "return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : null;"
+
+
+class BrowserTab:
+    """
+    Pestaña de un navegador compartido del pool.
+
+    Varias pestañas del mismo Chrome se usan a la vez desde hilos distintos:
+    cada comando de WebDriver toma el lock del navegador y cambia a la
+    pestaña si hace falta, así que las esperas (scroll, carga de respuestas)
+    de una pestaña dejan avanzar a las demás.
+    """
+
+    def __init__(self, browser, handle: str):
+        self.id = str(uuid.uuid4())[:8]
+        self.browser = browser
+        self.handle = handle
+        self.opened_at = time.time()
+        self.driver = TabDriver(browser.driver, self)
+
+    def activate(self):
+        """Lock del navegador con esta pestaña activa (`with tab.activate(): ...`)"""
+        return _ActiveTab(self)
+
+    def mark_failed(self):
+        self.browser.mark_failed()
+
+    def js_heap_bytes(self) -> Optional[int]:
+        try:
+            with self.activate():
+                return self.browser.driver.execute_script(TAB_HEAP_JS)
+        except Exception:
+            return None
+
+
+class _ActiveTab:
+    def __init__(self, tab: BrowserTab):
+        self.tab = tab
+
+    def __enter__(self):
+        browser = self.tab.browser
+        browser.lock.acquire()
+        try:
+            if browser.current_handle != self.tab.handle:
+                browser.driver.switch_to.window(self.tab.handle)
+                browser.current_handle = self.tab.handle
+        except Exception:
+            browser.lock.release()
+            raise
+        return browser.driver
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tab.browser.lock.release()
+        return False
+
+
+class TabDriver:
+    """
+    Driver de una pestaña: mismo interfaz que el WebDriver, pero cada llamada
+    se ejecuta con la pestaña activa. Los WebElement devueltos se envuelven
+    igual, para que `element.text` tampoco lea de otra pestaña.
+    """
+
+    def __init__(self, target: Any, tab: BrowserTab):
+        self._target = target
+        self._tab = tab
+
+    def __getattr__(self, name):
+        with self._tab.activate():
+            value = getattr(self._target, name)
+        if not callable(value):
+            return self._tab_wrap(value)
+
+        def call(*args, **kwargs):
+            args = [_unwrap(arg) for arg in args]
+            with self._tab.activate():
+                return self._tab_wrap(value(*args, **kwargs))
+        return call
+
+    def get(self, url: str, timeout: float = 30):
+        """
+        Navegar sin bloquear el navegador mientras carga la página.
+
+        `driver.get` retiene el lock hasta el evento load; aquí se lanza la
+        navegación por JS y se espera con el lock libre entre comprobaciones.
+        """
+        if self._target is not self._tab.browser.driver:
+            return self.__getattr__('get')(url)
+
+        with self._tab.activate():
+            self._target.execute_script("window.location.href = arguments[0];", url)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.2)
+            try:
+                with self._tab.activate():
+                    state = self._target.execute_script(
+                        "return [document.readyState, window.location.href];"
+                    )
+                if state and state[0] == 'complete' and state[1] != 'about:blank':
+                    return
+            except Exception:
+                # Entre documentos el script puede fallar; se reintenta
+                continue
+        log_warning(f"⏳ La pestaña {self._tab.id} no terminó de cargar {url} en {timeout:.0f}s")
+
+    def _tab_wrap(self, value):
+        if isinstance(value, WebElement):
+            return TabDriver(value, self._tab)
+        if isinstance(value, list):
+            return [self._tab_wrap(item) for item in value]
+        return value
+
+
+def _unwrap(value):
+    return value._target if isinstance(value, TabDriver) else value
+
+
+def _browser_processes(driver):
+    root = psutil.Process(driver.service.process.pid)
+    return [root] + root.children(recursive=True)
+
+
+def browser_rss_bytes(driver) -> Optional[int]:
+    """Memoria residente de Chrome (chromedriver y todos sus procesos hijos), si psutil está disponible"""
+    if not PSUTIL_AVAILABLE:
+        return None
+    try:
+        return sum(p.memory_info().rss for p in _browser_processes(driver))
+    except Exception:
+        return None
+
+
+def browser_cpu_seconds(driver) -> Optional[float]:
+    """CPU (usuario + sistema) consumida por Chrome y chromedriver, si psutil está disponible"""
+    if not PSUTIL_AVAILABLE:
+        return None
+    try:
+        return sum(sum(p.cpu_times()[:2]) for p in _browser_processes(driver))
+    except Exception:
+        return None
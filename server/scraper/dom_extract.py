@@ -0,0 +1,261 @@
+import re
+from typing import List, Dict, Any, Optional, Callable
+
+from server.core.print_dev import log_info
+
+# Máximo de respuestas guardadas por comentario en la extracción elemento a elemento
+MAX_REPLIES_PER_THREAD = 8
+
+# Funciones JS compartidas: mismos selectores (y en el mismo orden) que la extracción elemento a elemento
+_JS_HELPERS = r"""
+var AUTHOR = ['#author-text', '.ytd-comment-renderer #author-text', 'a#author-text', "[id*='author-text']"];
+var CONTENT = ['#content-text', '.ytd-comment-renderer #content-text', '#comment-content #content-text', "[id*='content-text']"];
+var LIKES = ['#vote-count-middle', '.ytd-comment-action-buttons-renderer #vote-count-middle', "[id*='vote-count']"];
+var TIME = ['.published-time-text', "[class*='published-time']", "a[href*='lc=']"];
+var REPLY_AUTHOR = AUTHOR.concat(["a[href*='@']"]);
+var REPLY_CONTENT = CONTENT.concat(['.comment-text']);
+var REPLY_LIKES = LIKES.concat(['.vote-count-middle']);
+var REPLY_BUTTON = ['#more-replies', "button[aria-label*='respuesta']", "button[aria-label*='reply']",
+                    "button[aria-label*='replies']", 'ytd-button-renderer[is-paper-button] button',
+                    '.more-button', '#replies-button'];
+var REPLY_CONTAINER = ['#replies', 'ytd-comment-replies-renderer', '.ytd-comment-replies-renderer', '#expander-contents'];
+var REPLY_ITEM = ['ytd-comment-view-model', '.ytd-comment-view-model', 'ytd-comment-renderer',
+                  '.ytd-comment-renderer', '#comment', '.comment'];
+
+function visibleText(el) {
+    var text = el.innerText != null ? el.innerText : el.textContent;
+    return (text || '').trim();
+}
+
+function firstText(root, selectors) {
+    for (var i = 0; i < selectors.length; i++) {
+        var el = root.querySelector(selectors[i]);
+        if (el) return visibleText(el);
+    }
+    return null;
+}
+
+function findRepliesButton(thread) {
+    for (var i = 0; i < REPLY_BUTTON.length; i++) {
+        var candidates = thread.querySelectorAll(REPLY_BUTTON[i]);
+        for (var j = 0; j < candidates.length; j++) {
+            var label = (visibleText(candidates[j]) + ' ' + (candidates[j].getAttribute('aria-label') || '')).toLowerCase();
+            if (label.indexOf('respuesta') !== -1 || label.indexOf('repl') !== -1) return candidates[j];
+        }
+    }
+    return null;
+}
+
+function replyItems(thread) {
+    for (var i = 0; i < REPLY_CONTAINER.length; i++) {
+        var container = thread.querySelector(REPLY_CONTAINER[i]);
+        if (!container) continue;
+        for (var j = 0; j < REPLY_ITEM.length; j++) {
+            var items = container.querySelectorAll(REPLY_ITEM[j]);
+            if (items.length) return items;
+        }
+    }
+    return [];
+}
+"""
+
+# Devuelve los hilos cargados (desde arguments[0], como mucho arguments[1]) con sus respuestas visibles
+EXTRACT_THREADS_JS = _JS_HELPERS + r"""
+var start = arguments[0] || 0;
+var limit = arguments[1] || 1000000;
+var threads = document.querySelectorAll('ytd-comment-thread-renderer');
+var out = [];
+for (var t = start; t < threads.length && out.length < limit; t++) {
+    var thread = threads[t];
+    var button = findRepliesButton(thread);
+    var replies = [];
+    var items = replyItems(thread);
+    for (var r = 0; r < items.length; r++) {
+        replies.push({
+            author: firstText(items[r], REPLY_AUTHOR),
+            comment: firstText(items[r], REPLY_CONTENT),
+            likes: firstText(items[r], REPLY_LIKES)
+        });
+    }
+    out.push({
+        index: t,
+        author: firstText(thread, AUTHOR),
+        comment: firstText(thread, CONTENT),
+        likes: firstText(thread, LIKES),
+        published_time: firstText(thread, TIME),
+        replies_button: button ? {text: visibleText(button), aria: button.getAttribute('aria-label') || ''} : null,
+        replies: replies
+    });
+}
+return out;
+"""
+
+# Clic en todos los botones de respuestas aún no expandidos (hilos desde arguments[0], como mucho arguments[1])
+EXPAND_REPLIES_JS = _JS_HELPERS + r"""
+var start = arguments[0] || 0;
+var limit = arguments[1] || 1000000;
+var threads = document.querySelectorAll('ytd-comment-thread-renderer');
+var clicked = 0;
+for (var t = start; t < threads.length && t < start + limit; t++) {
+    var thread = threads[t];
+    // Marcar el hilo: un segundo clic en el mismo botón volvería a plegar las respuestas
+    if (thread.dataset.repliesExpanded) continue;
+    var button = findRepliesButton(thread);
+    if (!button) continue;
+    thread.dataset.repliesExpanded = '1';
+    button.click();
+    clicked++;
+}
+return clicked;
+"""
+
+# Clic en 'mostrar más respuestas' de los hilos expandidos con menos de arguments[0] respuestas
+MORE_REPLIES_JS = _JS_HELPERS + r"""
+var maxReplies = arguments[0];
+var threads = document.querySelectorAll('ytd-comment-thread-renderer[data-replies-expanded]');
+var clicked = 0;
+for (var t = 0; t < threads.length; t++) {
+    if (replyItems(threads[t]).length >= maxReplies) continue;
+    var more = threads[t].querySelector(
+        '#replies ytd-continuation-item-renderer button, #replies ytd-continuation-item-renderer tp-yt-paper-button'
+    );
+    if (more) {
+        more.click();
+        clicked++;
+    }
+}
+return clicked;
+"""
+
+# Hilos expandidos cuyas respuestas aún se están cargando
+PENDING_REPLIES_JS = _JS_HELPERS + r"""
+var threads = document.querySelectorAll('ytd-comment-thread-renderer[data-replies-expanded]');
+var pending = 0;
+for (var t = 0; t < threads.length; t++) {
+    var spinner = threads[t].querySelector('#replies tp-yt-paper-spinner[active]');
+    if (spinner || replyItems(threads[t]).length === 0) pending++;
+}
+return pending;
+"""
+
+# Número de hilos cargados en la página
+COUNT_THREADS_JS = "return document.querySelectorAll('ytd-comment-thread-renderer').length;"
+
+# Scroll hasta el spinner de continuación de comentarios (o hasta la sección si aún no existe)
+SCROLL_TO_CONTINUATION_JS = r"""
+var spinner = document.querySelector('#comments ytd-continuation-item-renderer');
+var target = spinner || document.querySelector('#comments');
+if (target) {
+    target.scrollIntoView();
+} else {
+    window.scrollBy(0, window.innerHeight);
+}
+return {
+    count: document.querySelectorAll('ytd-comment-thread-renderer').length,
+    has_continuation: !!spinner
+};
+"""
+
+# Cambiar el orden de los comentarios a 'más recientes primero' (segunda opción del menú de orden)
+SORT_NEWEST_JS = r"""
+var trigger = document.querySelector(
+    '#comments #sort-menu #trigger, #comments #sort-menu tp-yt-paper-button, #comments #sort-menu #label'
+);
+if (!trigger) return false;
+trigger.click();
+var options = document.querySelectorAll(
+    '#comments #sort-menu tp-yt-paper-listbox a, #comments #sort-menu tp-yt-paper-listbox tp-yt-paper-item'
+);
+if (options.length < 2) return false;
+options[1].click();
+return true;
+"""
+
+# Metadatos del vídeo desde el JSON embebido en la página: solo videoDetails y los renderers
+# principal y secundario de ytInitialData (para yt_parser.parse_video_metadata), no el JSON entero
+PAGE_METADATA_JS = r"""
+var player = window.ytInitialPlayerResponse || null;
+var data = window.ytInitialData || null;
+var contents = [];
+try {
+    contents = data.contents.twoColumnWatchNextResults.results.results.contents || [];
+} catch (e) {}
+return {
+    player: player && player.videoDetails ? {videoDetails: player.videoDetails} : null,
+    initial: {contents: contents.filter(function (c) {
+        return c.videoPrimaryInfoRenderer || c.videoSecondaryInfoRenderer;
+    })}
+};
+"""
+
+
+def parse_count(text: Optional[str]) -> int:
+    """Convertir un contador de YouTube ('', '12', '1.5K', '2M') en entero"""
+    text = (text or '').strip()
+    try:
+        if text == '':
+            return 0
+        if 'K' in text:
+            return int(float(text.replace('K', '')) * 1000)
+        if 'M' in text:
+            return int(float(text.replace('M', '')) * 1000000)
+        return int(text) if text.isdigit() else 0
+    except ValueError:
+        return 0
+
+
+def build_reply(raw: Dict[str, Any], extract_emojis: Callable[[str], List[str]]) -> Optional[Dict[str, Any]]:
+    """Respuesta con el mismo formato que extract_reply_data (None si faltan datos)"""
+    author = (raw.get('author') or '').strip()
+    content = (raw.get('comment') or '').strip()
+    if not author or not content:
+        log_info(f"⚠️ Saltando respuesta con datos inválidos: author='{author}', content='{content}'")
+        return None
+
+    emojis = extract_emojis(content)
+    return {
+        'author': author,
+        'comment': content,
+        'likes': parse_count(raw.get('likes')),
+        'emojis': emojis,
+        'emoji_count': len(emojis)
+    }
+
+
+def build_thread(raw: Dict[str, Any], extract_emojis: Callable[[str], List[str]],
+                 max_replies: int = MAX_REPLIES_PER_THREAD) -> Optional[Dict[str, Any]]:
+    """Hilo con el mismo formato que extract_comment_data (None si faltan datos)"""
+    author = (raw.get('author') or '').strip()
+    content = (raw.get('comment') or '').strip()
+    if not author or not content:
+        log_info(f"⚠️ Saltando comentario con datos inválidos: author='{author}', content='{content}'")
+        return None
+
+    emojis = extract_emojis(content)
+
+    has_replies = False
+    replies_count = 0
+    button = raw.get('replies_button')
+    if button:
+        has_replies = True
+        numbers = re.findall(r'\d+', f"{button.get('text', '')} {button.get('aria', '')}")
+        if numbers:
+            replies_count = int(numbers[0])
+
+    replies = []
+    for raw_reply in (raw.get('replies') or [])[:max_replies]:
+        reply = build_reply(raw_reply, extract_emojis)
+        if reply:
+            replies.append(reply)
+
+    return {
+        'author': author,
+        'comment': content,
+        'likes': parse_count(raw.get('likes')),
+        'published_time': (raw.get('published_time') or '').strip() or "Desconocido",
+        'emojis': emojis,
+        'emoji_count': len(emojis),
+        'has_replies': has_replies,
+        'replies_count': max(replies_count, len(replies)),
+        'replies': replies
+    }
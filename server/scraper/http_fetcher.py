@@ -0,0 +1,240 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Optional, Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from server.core.config import setting
+from server.core.print_dev import log_info, log_warning
+from server.scraper.yt_parser import (
+    extract_video_id, extract_json_var, extract_innertube_config, find_comments_continuation,
+    parse_next_response, parse_video_metadata, build_threads, newest_first_continuation
+)
+
+USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/120.0.0.0 Safari/537.36")
+
+
+class HttpFetchError(Exception):
+    """La página no trae los datos necesarios para el backend HTTP"""
+
+
+# Límite global de peticiones simultáneas a YouTube (compartido por todos los trabajos)
+_request_slots = threading.BoundedSemaphore(setting.http_fetcher_max_concurrency)
+
+# Sesión HTTP compartida con pool de conexiones keep-alive
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=setting.http_fetcher_max_concurrency)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                'User-Agent': USER_AGENT,
+                'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8'
+            })
+            # Evitar la página de consentimiento de cookies
+            session.cookies.set('CONSENT', 'YES+cb', domain='.youtube.com')
+            _session = session
+        return _session
+
+
+class HttpCommentFetcher:
+    """
+    Backend de scraping sin navegador.
+
+    Descarga la página de watch, lee ytInitialData / ytInitialPlayerResponse
+    y el token de comentarios, y recorre las continuaciones de
+    `youtubei/v1/next`. Las páginas de hilos van en cadena (cada una trae el
+    token de la siguiente); las respuestas de los hilos se piden en paralelo
+    con un máximo de `max_concurrency` peticiones, mientras se descarga la
+    página siguiente. Cada página terminada se entrega a `thread_callback`.
+
+    Con `incremental` (IncrementalTracker) los comentarios se piden en orden
+    'más recientes primero', se saltan los ya guardados y se deja de paginar
+    tras una racha de comentarios conocidos.
+
+    Con `deadline` (Deadline) se deja de paginar al agotarse el plazo y se
+    devuelven los hilos descargados hasta entonces con `partial=True`.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, session: Optional[requests.Session] = None,
+                 max_concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                 max_replies: Optional[int] = None):
+        self.base_url = (base_url or setting.http_fetcher_base_url).rstrip('/')
+        self.session = session or get_http_session()
+        self.max_concurrency = max_concurrency or setting.http_fetcher_max_concurrency
+        self.timeout = timeout or setting.http_fetcher_timeout
+        self.max_replies = max_replies or setting.scraper_max_replies
+        self.stats = {'requests': 0, 'bytes': 0, 'comment_pages': 0, 'reply_pages': 0, 'elapsed_seconds': 0.0}
+        self._stats_lock = threading.Lock()
+        self.deadline = None
+        self.partial = False
+
+    def fetch(self, video_url: str, max_comments: int, extract_emojis: Callable[[str], List[str]],
+              progress_callback: Optional[Callable[[int, str], None]] = None,
+              thread_callback: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+              incremental=None, deadline=None) -> Dict[str, Any]:
+        """Descargar metadatos e hilos de un vídeo con el formato del scraper"""
+        progress = progress_callback or (lambda percentage, message: None)
+        started = time.monotonic()
+        self.deadline = deadline
+        self.partial = False
+
+        video_id = extract_video_id(video_url)
+        if not video_id:
+            raise HttpFetchError(f"URL de YouTube no válida: {video_url}")
+
+        progress(10, "🌐 Descargando página del video (HTTP)...")
+        html = self._get(f"{self.base_url}/watch", params={'v': video_id})
+        initial_data = extract_json_var(html, 'ytInitialData')
+        if not initial_data:
+            raise HttpFetchError("La página no contiene ytInitialData")
+
+        metadata = parse_video_metadata(extract_json_var(html, 'ytInitialPlayerResponse'), initial_data)
+        config = extract_innertube_config(html)
+        token = find_comments_continuation(initial_data)
+        if not token:
+            raise HttpFetchError("No se encontró el token de comentarios en ytInitialData")
+        progress(25, f"✅ Metadatos: {(metadata['title'] or '')[:50]}")
+        if incremental is not None:
+            token = self._newest_first_token(token, config, incremental)
+
+        threads = []
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            # Las respuestas de una página se descargan mientras se pide la siguiente
+            previous = None
+            for records, reply_tokens in self._iter_thread_pages(token, config, max_comments, progress, incremental):
+                futures = [executor.submit(self._fetch_replies, reply_token, config)
+                           for reply_token in reply_tokens.values()]
+                if previous:
+                    threads.extend(self._finish_page(*previous, extract_emojis, thread_callback))
+                previous = (records, futures)
+            if previous:
+                progress(80, f"💬 Descargando respuestas de {len(previous[1])} hilos...")
+                threads.extend(self._finish_page(*previous, extract_emojis, thread_callback))
+
+        self.stats['elapsed_seconds'] = round(time.monotonic() - started, 2)
+        log_info(f"🌐 HTTP: {len(threads)} hilos en {self.stats['elapsed_seconds']}s "
+                 f"({self.stats['requests']} peticiones, {self.stats['bytes'] // 1024} KB)")
+
+        return {
+            'video_id': metadata['video_id'] or video_id,
+            'title': metadata['title'],
+            'author': metadata['author'],
+            'description': metadata['description'],
+            'threads': threads,
+            'stats': dict(self.stats),
+            'partial': self.partial
+        }
+
+    def _newest_first_token(self, token: str, config: Dict[str, Any], incremental) -> str:
+        """Cambiar al orden 'más recientes primero' (sin él no se puede parar en la racha de conocidos)"""
+        newest = newest_first_continuation(self._post_next(token, config))
+        if newest:
+            incremental.sorted_newest = True
+            return newest
+        log_warning("⚠️ Sin menú de orden en los comentarios: se recorren todos y se filtran los conocidos")
+        incremental.allow_stop = False
+        return token
+
+    def _iter_thread_pages(self, token: str, config: Dict[str, Any], max_comments: int, progress, incremental=None):
+        """Recorrer las páginas de hilos hasta `max_comments`; devuelve (hilos, tokens de respuestas) por página"""
+        thread_count = 0
+        seen = set()
+
+        while token and thread_count < max_comments:
+            if self._expired():
+                break
+            try:
+                parsed = parse_next_response(self._post_next(token, config))
+            except requests.RequestException:
+                # Una petición cortada por el plazo no es un fallo del backend
+                if self._expired():
+                    break
+                raise
+            self.stats['comment_pages'] += 1
+            records = []
+            reply_tokens = {}
+            for record in parsed['comments']:
+                if record['parent_id'] is None and thread_count < max_comments and record['comment_id'] not in seen:
+                    seen.add(record['comment_id'])
+                    if incremental is not None and not incremental.is_new(record['author'], record['comment']):
+                        if incremental.stopped:
+                            break
+                        continue
+                    thread_count += 1
+                    records.append(record)
+                    if record['comment_id'] in parsed['reply_continuations']:
+                        reply_tokens[record['comment_id']] = parsed['reply_continuations'][record['comment_id']]
+            token = None if incremental is not None and incremental.stopped else parsed['continuation']
+
+            percentage = 25 + int(50 * min(thread_count / max_comments, 1))
+            progress(percentage, f"📝 Comentarios cargados: {thread_count}")
+            yield records, reply_tokens
+
+    def _finish_page(self, records: List[Dict[str, Any]], futures, extract_emojis, thread_callback) -> List[Dict[str, Any]]:
+        """Esperar las respuestas de una página y construir sus hilos"""
+        for future in futures:
+            try:
+                records.extend(future.result(timeout=self.deadline.remaining() if self.deadline else None))
+            except FutureTimeoutError:
+                # Plazo agotado: el hilo se queda con las respuestas que ya tenga
+                self.partial = True
+        threads = build_threads(records, extract_emojis, max_replies=self.max_replies)
+        if thread_callback and threads:
+            thread_callback(threads)
+        return threads
+
+    def _fetch_replies(self, token: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Respuestas de un hilo, siguiendo 'mostrar más respuestas' hasta `max_replies`"""
+        records = []
+        while token and len(records) < self.max_replies and not self._expired():
+            try:
+                parsed = parse_next_response(self._post_next(token, config))
+            except Exception as e:
+                log_warning(f"⚠️ Error descargando respuestas: {e}")
+                break
+            with self._stats_lock:
+                self.stats['reply_pages'] += 1
+            records.extend(parsed['comments'])
+            token = parsed['continuation']
+        return records
+
+    def _post_next(self, token: str, config: Dict[str, Any]) -> Dict[str, Any]:
+        params = {'prettyPrint': 'false'}
+        if config['api_key']:
+            params['key'] = config['api_key']
+        response = self._request('POST', f"{self.base_url}/youtubei/v1/next", params=params,
+                                 json={'context': config['context'], 'continuation': token})
+        return response.json()
+
+    def _expired(self) -> bool:
+        """True si el plazo se agotó (y el resultado queda marcado como parcial)"""
+        if not (self.deadline and self.deadline.expired()):
+            return False
+        if not self.partial:
+            log_warning("⏰ Plazo agotado: se devuelven los comentarios descargados hasta ahora")
+        self.partial = True
+        return True
+
+    def _get(self, url: str, params: Optional[Dict[str, str]] = None) -> str:
+        return self._request('GET', url, params=params).text
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        with _request_slots:
+            timeout = self.deadline.timeout(self.timeout) if self.deadline else self.timeout
+            response = self.session.request(method, url, timeout=max(timeout, 0.1), **kwargs)
+        response.raise_for_status()
+        with self._stats_lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += len(response.content)
+        return response
@@ -0,0 +1,64 @@
+import re
+import hashlib
+from typing import Iterable, Optional, Dict, Any
+
+from server.core.config import setting
+
+_SPACES = re.compile(r'\s+')
+
+
+def comment_fingerprint(author: Optional[str], comment: Optional[str]) -> str:
+    """Huella de un comentario (autor + texto normalizados) para reconocerlo entre scrapings"""
+    normalized = f"{_SPACES.sub(' ', (author or '').strip().lower())}\n{_SPACES.sub(' ', (comment or '').strip())}"
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:20]
+
+
+def legacy_fingerprint(comment: Optional[str]) -> str:
+    """Huella de un comentario guardado sin autor (filas anteriores a guardar `author`): solo el texto"""
+    return comment_fingerprint(None, comment)
+
+
+class IncrementalTracker:
+    """
+    Seguimiento de un re-scraping incremental con orden 'más recientes primero'.
+
+    Recibe las huellas de los hilos ya guardados del vídeo. Cada hilo nuevo
+    reinicia la racha; tras `stop_after` hilos conocidos seguidos se da por
+    hecho que el resto ya está guardado (`stopped`). El comentario fijado,
+    que aparece primero aunque sea antiguo, solo suma uno a la racha.
+
+    Si no se pudo ordenar por más recientes, `allow_stop=False`: se recorre
+    todo y solo se filtran los conocidos. Los hilos guardados sin autor se
+    reconocen por el texto (`legacy_fingerprint`).
+    """
+
+    def __init__(self, known_fingerprints: Iterable[str], stop_after: Optional[int] = None):
+        self.known = set(known_fingerprints)
+        self.stop_after = stop_after or setting.scraper_incremental_stop_after
+        self.allow_stop = True
+        self.sorted_newest = False
+        self.run = 0
+        self.known_seen = 0
+        self.new_threads = 0
+        self.stopped = False
+
+    def is_new(self, author: Optional[str], comment: Optional[str]) -> bool:
+        """Registrar un hilo principal; devuelve True si no estaba guardado"""
+        if comment_fingerprint(author, comment) in self.known or legacy_fingerprint(comment) in self.known:
+            self.known_seen += 1
+            self.run += 1
+            if self.allow_stop and self.run >= self.stop_after:
+                self.stopped = True
+            return False
+        self.run = 0
+        self.new_threads += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'known_threads': len(self.known),
+            'known_seen': self.known_seen,
+            'new_threads': self.new_threads,
+            'sorted_newest': self.sorted_newest,
+            'stopped_early': self.stopped
+        }
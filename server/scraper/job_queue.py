@@ -0,0 +1,154 @@
+import time
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Any, Optional, List
+
+from server.core.config import setting
+from server.core.metrics import LatencyWindow, metrics_registry
+from server.core.print_dev import log_info, log_warning
+
+
+class QueueFullError(Exception):
+    """La cola de scraping alcanzó su profundidad máxima"""
+
+
+class _Waiter:
+    def __init__(self, user_id: str, future: asyncio.Future, on_position: Optional[Callable]):
+        self.user_id = user_id
+        self.future = future
+        self.on_position = on_position
+        self.enqueued_at = time.monotonic()
+        self.position = None
+
+
+class ScrapeJobQueue:
+    """
+    Cola de trabajos de scraping con concurrencia limitada (por defecto, la capacidad de los pools de Chrome).
+
+    Cada usuario tiene su propia cola FIFO y los turnos se reparten en rueda
+    entre usuarios: una ráfaga de un usuario no retrasa a los demás más de un
+    trabajo por vuelta. Los trabajos en espera reciben su posición con
+    `on_position(pos)` (función o corrutina) cada vez que cambia. Con
+    `max_depth` trabajos esperando, los nuevos se rechazan con QueueFullError.
+    Con `timeout`, un trabajo que no consigue hueco a tiempo sale de la cola
+    con asyncio.TimeoutError.
+
+    Se usa desde el event loop (no es thread-safe).
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, max_depth: Optional[int] = None):
+        self.concurrency = (concurrency or setting.scrape_queue_concurrency
+                            or setting.scraper_pool_size * max(1, setting.scraper_pool_max_tabs)
+                            * max(1, setting.scraper_processes))
+        self.max_depth = max_depth or setting.scrape_queue_max_depth
+        self._waiting: "OrderedDict[str, deque]" = OrderedDict()
+        self._running = 0
+        self.wait_times = LatencyWindow()
+        self.stats = {'enqueued': 0, 'started': 0, 'completed': 0, 'rejected': 0, 'cancelled': 0, 'timed_out': 0}
+
+    def depth(self) -> int:
+        return sum(len(waiters) for waiters in self._waiting.values())
+
+    def is_full(self) -> bool:
+        return self._running >= self.concurrency and self.depth() >= self.max_depth
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, on_position: Optional[Callable] = None, timeout: Optional[float] = None):
+        """Esperar turno, ejecutar el bloque y liberar el hueco"""
+        await self.acquire(user_id, on_position, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, user_id: str, on_position: Optional[Callable] = None, timeout: Optional[float] = None):
+        if self._running < self.concurrency and not self._waiting:
+            self._start(0.0)
+            return
+        if self.depth() >= self.max_depth:
+            self.stats['rejected'] += 1
+            raise QueueFullError(f"Cola de scraping llena ({self.max_depth} trabajos esperando)")
+
+        waiter = _Waiter(user_id, asyncio.get_running_loop().create_future(), on_position)
+        self._waiting.setdefault(user_id, deque()).append(waiter)
+        self.stats['enqueued'] += 1
+        self._notify_positions()
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Tenía hueco asignado: devolverlo
+                self.release()
+            else:
+                self._remove(waiter)
+                self.stats['timed_out' if isinstance(e, asyncio.TimeoutError) else 'cancelled'] += 1
+                self._notify_positions()
+            raise
+
+    def release(self):
+        self._running -= 1
+        self.stats['completed'] += 1
+        self._dispatch()
+
+    def _start(self, waited: float):
+        self._running += 1
+        self.stats['started'] += 1
+        self.wait_times.record(waited)
+
+    def _dispatch(self):
+        while self._running < self.concurrency and self._waiting:
+            # Siguiente usuario de la rueda; vuelve al final si le quedan trabajos
+            user_id, waiters = self._waiting.popitem(last=False)
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiting[user_id] = waiters
+            self._start(time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+        self._notify_positions()
+
+    def _remove(self, waiter: _Waiter):
+        waiters = self._waiting.get(waiter.user_id)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiting[waiter.user_id]
+
+    def _order(self) -> List[_Waiter]:
+        """Trabajos en espera en el orden en que se atenderán"""
+        queues = [list(waiters) for waiters in self._waiting.values()]
+        order = []
+        for turn in range(max((len(q) for q in queues), default=0)):
+            order.extend(q[turn] for q in queues if turn < len(q))
+        return order
+
+    def _notify_positions(self):
+        for position, waiter in enumerate(self._order(), 1):
+            if waiter.position == position:
+                continue
+            waiter.position = position
+            if waiter.on_position is None:
+                continue
+            try:
+                result = waiter.on_position(position)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                log_warning(f"⚠️ Error notificando la posición en cola: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            'concurrency': self.concurrency,
+            'running': self._running,
+            'depth': self.depth(),
+            'max_depth': self.max_depth,
+            'users_waiting': len(self._waiting),
+            'wait': self.wait_times.summary(),
+            **self.stats
+        }
+
+
+# Instancia global
+scrape_queue = ScrapeJobQueue()
+metrics_registry.register("scrape_queue", scrape_queue.get_metrics)
+log_info(f"🚦 Cola de scraping: {scrape_queue.concurrency} simultáneos, hasta {scrape_queue.max_depth} en espera")
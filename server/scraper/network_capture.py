@@ -0,0 +1,79 @@
+import json
+import base64
+from typing import List, Dict, Any
+
+from server.core.print_dev import log_info, log_warning
+
+# Endpoint por el que YouTube carga los comentarios (y sus continuaciones)
+NEXT_ENDPOINT = "/youtubei/v1/next"
+
+
+class NetworkCapture:
+    """
+    Captura de respuestas JSON de red con el performance log de Chrome (CDP).
+
+    Requiere que el driver se haya lanzado con `goog:loggingPrefs`
+    {'performance': 'ALL'} (build_chrome_options con `network_log`). Cada
+    poll() lee las entradas nuevas del log, busca las respuestas del
+    endpoint que ya terminaron de cargarse y pide su cuerpo con
+    Network.getResponseBody.
+    Hay que llamar a poll() con frecuencia (p. ej. tras cada scroll) porque
+    Chrome descarta los cuerpos antiguos.
+    """
+
+    def __init__(self, driver, url_fragment: str = NEXT_ENDPOINT):
+        self.driver = driver
+        self.url_fragment = url_fragment
+        self.responses: List[Dict[str, Any]] = []
+        self.failed = 0
+        self._pending = set()
+
+    def start(self):
+        """Activar el dominio Network y descartar el log de trabajos anteriores"""
+        self.driver.execute_cdp_cmd('Network.enable', {})
+        self.driver.get_log('performance')
+        self._pending.clear()
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Leer el log y devolver las respuestas nuevas ya parseadas"""
+        new_responses = []
+        for request_id in self._finished_requests(self.driver.get_log('performance')):
+            data = self._response_json(request_id)
+            if data is not None:
+                new_responses.append(data)
+
+        self.responses.extend(new_responses)
+        if new_responses:
+            log_info(f"📡 Capturadas {len(new_responses)} respuestas de {self.url_fragment}")
+        return new_responses
+
+    def _finished_requests(self, entries: List[Dict[str, Any]]) -> List[str]:
+        """requestIds del endpoint cuyo cuerpo ya está disponible"""
+        finished = []
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, TypeError, ValueError):
+                continue
+
+            method = message.get('method')
+            params = message.get('params', {})
+            if method == 'Network.responseReceived':
+                if self.url_fragment in params.get('response', {}).get('url', ''):
+                    self._pending.add(params.get('requestId'))
+            elif method == 'Network.loadingFinished' and params.get('requestId') in self._pending:
+                self._pending.discard(params['requestId'])
+                finished.append(params['requestId'])
+        return finished
+
+    def _response_json(self, request_id: str):
+        try:
+            body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+            text = body.get('body', '')
+            if body.get('base64Encoded'):
+                text = base64.b64decode(text).decode('utf-8')
+            return json.loads(text)
+        except Exception as e:
+            self.failed += 1
+            log_warning(f"⚠️ No se pudo leer la respuesta {request_id}: {e}")
+            return None
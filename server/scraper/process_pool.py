@@ -0,0 +1,448 @@
+"""
+Procesos worker del scraper.
+
+El scraping (Selenium, parseo de hilos, conteo de emojis, logs) se ejecuta en
+procesos aparte para no competir por el GIL con las peticiones y el WebSocket
+del proceso de la API. Cada worker atiende varios trabajos a la vez (un hilo
+por trabajo) con su propio pool de Chrome, y devuelve los lotes de hilos y el
+resultado como JSON comprimido. Un worker que muere se sustituye al momento
+(sus trabajos en curso fallan); uno que llega al máximo de trabajos o de
+memoria deja de recibir trabajos y se para al terminar los que tiene. La
+memoria de selectores la escribe solo la API, con los contadores que cada
+worker envía junto a sus resultados.
+"""
+
+import os
+import sys
+import json
+import zlib
+import queue
+import itertools
+import importlib
+import threading
+import multiprocessing
+from typing import Any, Callable, Dict, List, Optional
+
+from server.core.config import setting
+from server.core.deadline import Deadline
+from server.core.metrics import metrics_registry
+from server.core.print_dev import log_info, log_warning, log_error
+from server.scraper.progress_manager import progress_manager
+from server.scraper.selector_registry import selector_registry
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Función que ejecuta cada trabajo dentro del worker ("módulo:función")
+DEFAULT_TARGET = "server.scraper.scrp_socket:_run_scraper"
+
+# Hilo ya entregado en un lote: el resultado final lo referencia por su posición
+STREAMED_REF = "$streamed"
+
+# Métricas del worker que se publican en las del pool
+WORKER_METRICS = ("browser_pool", "resource_blocking", "selector_registry")
+
+# Workers seguidos que mueren al arrancar antes de dejar de relanzarlos
+MAX_STARTUP_FAILURES = 3
+
+
+class ScraperProcessError(Exception):
+    """El proceso worker falló o terminó durante el scraping"""
+
+
+class ScraperPoolUnavailable(ScraperProcessError):
+    """Los procesos worker no consiguen arrancar (p. ej. falta una dependencia)"""
+
+
+def pack(data: Any) -> bytes:
+    """JSON compacto y comprimido (lotes de hilos y resultados entre procesos)"""
+    return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 1)
+
+
+def unpack(payload: bytes) -> Any:
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+def _rss_mb() -> Optional[float]:
+    """Memoria residente del proceso actual (sin los procesos de Chrome)"""
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss / 2 ** 20
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Lado del worker
+# ---------------------------------------------------------------------------
+
+def _worker_status() -> Dict[str, Any]:
+    snapshot = metrics_registry.snapshot()
+    return {'rss_mb': _rss_mb(), 'metrics': {name: snapshot[name] for name in WORKER_METRICS if name in snapshot},
+            'selectors': selector_registry.take_changes()}
+
+
+def _reference_streamed(data: Optional[Dict[str, Any]], streamed: List[Dict[str, Any]]):
+    """Sustituir en el resultado los hilos ya entregados por su posición (no se envían dos veces)"""
+    if not data or not streamed:
+        return data
+    index = {id(thread): i for i, thread in enumerate(streamed)}
+    return dict(data, threads=[{STREAMED_REF: index[id(thread)]} if id(thread) in index else thread
+                               for thread in data.get('threads', [])])
+
+
+def _run_job(scrape: Callable, job_id: int, args: Dict[str, Any], deadline: Deadline, send: Callable,
+             jobs: Dict[int, Deadline]):
+    streamed = []
+
+    def deliver(threads):
+        streamed.extend(threads)
+        send(('threads', job_id, pack(threads)))
+
+    try:
+        data = scrape(args['video_url'], args['max_comments'], args['session_id'],
+                      deliver if args['stream'] else None, args['known_fingerprints'], deadline)
+        send(('done', job_id, pack(_reference_streamed(data, streamed)), _worker_status()))
+    except Exception as e:
+        send(('error', job_id, str(e), _worker_status()))
+    finally:
+        jobs.pop(job_id, None)
+
+
+def _close_browsers():
+    browser_pool = sys.modules.get("server.scraper.browser_pool")
+    if browser_pool is not None:
+        browser_pool.get_browser_pool().close()
+
+
+def _worker_main(conn, target: str, warm: bool):
+    """Bucle del proceso worker: recibe trabajos y cancelaciones, y responde por `conn`"""
+    module_name, _, function_name = target.partition(":")
+    scrape = getattr(importlib.import_module(module_name), function_name)
+
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    # El progreso del scraper se publica en el progress_manager de la API, y los
+    # aciertos de selectores se envían con cada resultado (la API guarda el fichero)
+    selector_registry.readonly = True
+    progress_manager.relay = lambda *message: send(('relay', message))
+    send(('ready', os.getpid()))
+
+    if warm:
+        from server.scraper.browser_pool import get_browser_pool
+        threading.Thread(target=get_browser_pool().warm, daemon=True).start()
+
+    jobs: Dict[int, Deadline] = {}
+    running = []
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        kind = message[0]
+        if kind == 'scrape':
+            _, job_id, args = message
+            deadline = Deadline(args.pop('deadline_seconds'))
+            jobs[job_id] = deadline
+            thread = threading.Thread(target=_run_job, args=(scrape, job_id, args, deadline, send, jobs),
+                                      name=f"scrape-{job_id}", daemon=True)
+            thread.start()
+            running = [t for t in running if t.is_alive()] + [thread]
+        elif kind == 'cancel':
+            deadline = jobs.get(message[1])
+            if deadline is not None:
+                deadline.cancel(message[2])
+        elif kind == 'stop':
+            break
+
+    # Apagado: lo que siga en curso para en su siguiente paso y se cierran los navegadores
+    for deadline in list(jobs.values()):
+        deadline.cancel("servidor apagándose")
+    for thread in running:
+        thread.join(timeout=30)
+    _close_browsers()
+    conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Lado de la API
+# ---------------------------------------------------------------------------
+
+class _Worker:
+    """Proceso worker visto desde la API"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.jobs: Dict[int, queue.Queue] = {}
+        self.jobs_done = 0
+        self.rss_mb: Optional[float] = None
+        self.metrics: Dict[str, Any] = {}
+        self.ready = False
+        self.retiring = False
+        self.dead = False
+        self._send_lock = threading.Lock()
+
+    def send(self, message) -> bool:
+        try:
+            with self._send_lock:
+                self.conn.send(message)
+            return True
+        except (OSError, ValueError):
+            return False
+
+
+class ScraperProcessPool:
+    """
+    Pool de procesos worker para el scraping, con reinicio automático.
+
+    `run()` (bloqueante, desde un hilo del executor) envía el trabajo al
+    worker con menos trabajos en curso y espera sus mensajes: el progreso se
+    publica en el progress_manager de la API, los lotes de hilos se entregan
+    a `thread_callback` y el resultado final reutiliza esos mismos hilos (el
+    análisis incremental los reconoce por identidad). Cancelar el `deadline`
+    cancela el trabajo dentro del worker.
+    """
+
+    def __init__(self, processes: Optional[int] = None, max_jobs: Optional[int] = None,
+                 max_rss_mb: Optional[float] = None, target: str = DEFAULT_TARGET, warm: Optional[bool] = None):
+        self.processes = processes or max(1, setting.scraper_processes)
+        self.max_jobs = setting.scraper_worker_max_jobs if max_jobs is None else max_jobs
+        self.max_rss_mb = setting.scraper_worker_max_rss_mb if max_rss_mb is None else max_rss_mb
+        self.target = target
+        self.warm = setting.scraper_pool_warm if warm is None else warm
+
+        # 'spawn': el worker no hereda el estado del proceso de la API (modelo, event loop, hilos)
+        self._context = multiprocessing.get_context('spawn')
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._closed = False
+        self._startup_failures = 0
+        self.stats = {'jobs': 0, 'failed': 0, 'crashes': 0, 'recycled': 0, 'spawned': 0, 'bytes_received': 0}
+
+    def start(self):
+        with self._lock:
+            self._fill()
+
+    def run(self, video_url: str, max_comments: int, session_id: Optional[str] = None,
+            thread_callback: Optional[Callable] = None, known_fingerprints=None,
+            deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """Scraping en un worker (mismos argumentos y resultado que _run_scraper)"""
+        worker, job_id, inbox = self._submit({
+            'video_url': video_url,
+            'max_comments': max_comments,
+            'session_id': session_id,
+            'stream': thread_callback is not None,
+            'known_fingerprints': known_fingerprints,
+            'deadline_seconds': deadline.remaining() if deadline else None
+        })
+        if deadline is not None:
+            deadline.on_cancel(lambda: worker.send(('cancel', job_id, deadline.cancel_reason)))
+
+        streamed = []
+        try:
+            while True:
+                kind, payload = inbox.get()
+                if kind == 'threads':
+                    threads = unpack(payload)
+                    streamed.extend(threads)
+                    if thread_callback:
+                        try:
+                            thread_callback(threads)
+                        except Exception as e:
+                            log_warning(f"⚠️ Error entregando lote de {len(threads)} hilos: {e}")
+                elif kind == 'done':
+                    data = unpack(payload)
+                    if data and streamed:
+                        data['threads'] = [streamed[thread[STREAMED_REF]] if STREAMED_REF in thread else thread
+                                           for thread in data.get('threads', [])]
+                    return data
+                else:
+                    with self._lock:
+                        self.stats['failed'] += 1
+                    # 'unavailable': el worker murió al arrancar, el trabajo ni empezó
+                    raise (ScraperPoolUnavailable if kind == 'unavailable' else ScraperProcessError)(payload)
+        finally:
+            self._finish_job(worker, job_id)
+
+    def _submit(self, args: Dict[str, Any]):
+        while True:
+            with self._lock:
+                if self._closed:
+                    raise ScraperProcessError("El pool de procesos del scraper está cerrado")
+                self._fill()
+                candidates = [w for w in self._workers if not w.retiring]
+                if not candidates:
+                    raise ScraperPoolUnavailable(f"Los procesos del scraper fallan al arrancar "
+                                                 f"({self._startup_failures} intentos seguidos)")
+                worker = min(candidates, key=lambda w: len(w.jobs))
+                job_id = next(self._job_ids)
+                inbox = queue.Queue()
+                worker.jobs[job_id] = inbox
+                self.stats['jobs'] += 1
+            if worker.send(('scrape', job_id, args)):
+                return worker, job_id, inbox
+            # Worker muerto antes de recibir el trabajo: lo sustituye su hilo lector
+            with self._lock:
+                worker.jobs.pop(job_id, None)
+
+    def _fill(self):
+        # Con el lock tomado; sin relanzar workers que mueren al arrancar una y otra vez
+        while (not self._closed and self._startup_failures < MAX_STARTUP_FAILURES
+               and sum(1 for w in self._workers if not w.retiring) < self.processes):
+            self._workers.append(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        # Con el lock tomado
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn, self.target, self.warm),
+                                        name="scraper-worker", daemon=True)
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        threading.Thread(target=self._read, args=(worker,), name=f"scraper-worker-{process.pid}",
+                         daemon=True).start()
+        self.stats['spawned'] += 1
+        log_info(f"🧵 Proceso worker del scraper iniciado (pid {process.pid})")
+        return worker
+
+    def _read(self, worker: _Worker):
+        """Hilo lector de un worker: reparte sus mensajes a los trabajos y detecta si muere"""
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == 'ready':
+                with self._lock:
+                    worker.ready = True
+                    self._startup_failures = 0
+                continue
+            if kind == 'relay':
+                kind, session_id, *args = message[1]
+                if kind == 'progress':
+                    progress_manager.post_progress(session_id, *args)
+                else:
+                    progress_manager.post_completion(session_id, *args)
+                continue
+
+            _, job_id, payload, *status = message
+            with self._lock:
+                if status:
+                    worker.rss_mb = status[0]['rss_mb']
+                    worker.metrics = status[0]['metrics']
+                if kind != 'error':
+                    self.stats['bytes_received'] += len(payload)
+                inbox = worker.jobs.get(job_id)
+            if status and status[0]['selectors']:
+                selector_registry.merge(status[0]['selectors'])
+                selector_registry.save()
+            if inbox is not None:
+                inbox.put((kind, payload))
+        self._on_exit(worker)
+
+    def _on_exit(self, worker: _Worker):
+        worker.process.join(timeout=5)
+        exitcode = worker.process.exitcode
+        with self._lock:
+            worker.dead = True
+            failed = list(worker.jobs.values())
+            worker.jobs.clear()
+            if worker in self._workers:
+                self._workers.remove(worker)
+            crashed = bool(failed) or not (worker.retiring or self._closed)
+            if crashed:
+                self.stats['crashes'] += 1
+                if not worker.ready:
+                    self._startup_failures += 1
+            self._fill()
+        worker.conn.close()
+
+        if crashed:
+            log_error(f"💥 El proceso worker del scraper (pid {worker.process.pid}) terminó inesperadamente "
+                      f"(código {exitcode}); {len(failed)} trabajos fallidos")
+        if worker.ready:
+            message = ('error', f"El proceso del scraper terminó inesperadamente (código {exitcode})")
+        else:
+            message = ('unavailable', f"El proceso del scraper no pudo arrancar (código {exitcode})")
+        for inbox in failed:
+            inbox.put(message)
+
+    def _retire_reason(self, worker: _Worker) -> Optional[str]:
+        if self.max_jobs and worker.jobs_done >= self.max_jobs:
+            return f"{worker.jobs_done} trabajos"
+        if self.max_rss_mb and worker.rss_mb and worker.rss_mb > self.max_rss_mb:
+            return f"{worker.rss_mb:.0f} MB de memoria"
+        return None
+
+    def _finish_job(self, worker: _Worker, job_id: int):
+        with self._lock:
+            worker.jobs.pop(job_id, None)
+            worker.jobs_done += 1
+            if not worker.retiring and not worker.dead:
+                reason = self._retire_reason(worker)
+                if reason:
+                    # Deja de recibir trabajos; el sustituto arranca ya
+                    worker.retiring = True
+                    self.stats['recycled'] += 1
+                    log_info(f"♻️ Reiniciando el proceso worker del scraper (pid {worker.process.pid}): {reason}")
+                    self._fill()
+            stop = worker.retiring and not worker.jobs and not worker.dead
+        if stop:
+            worker.send(('stop',))
+
+    def close(self, timeout: float = 30):
+        """Parar los workers (cancela lo que tengan en curso y cierran sus navegadores)"""
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+        for worker in workers:
+            worker.send(('stop',))
+        for worker in workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                log_warning(f"⚠️ El proceso worker del scraper (pid {worker.process.pid}) no terminó, se fuerza")
+                worker.process.terminate()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'processes': self.processes,
+                'max_jobs': self.max_jobs,
+                'max_rss_mb': self.max_rss_mb,
+                'workers': [{
+                    'pid': worker.process.pid,
+                    'active_jobs': len(worker.jobs),
+                    'jobs_done': worker.jobs_done,
+                    'rss_mb': round(worker.rss_mb, 1) if worker.rss_mb else None,
+                    'retiring': worker.retiring,
+                    **worker.metrics
+                } for worker in self._workers],
+                **self.stats
+            }
+
+
+# Pool global del proceso de la API (se crea al primer uso)
+_scraper_processes = None
+_scraper_processes_lock = threading.Lock()
+
+
+def get_scraper_processes() -> ScraperProcessPool:
+    global _scraper_processes
+    with _scraper_processes_lock:
+        if _scraper_processes is None:
+            _scraper_processes = ScraperProcessPool()
+            _scraper_processes.start()
+            metrics_registry.register("scraper_processes", _scraper_processes.get_metrics)
+        return _scraper_processes
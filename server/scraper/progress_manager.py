@@ -1,21 +1,134 @@
 import asyncio
 import json
-from typing import Dict, Optional
+import time
+import threading
+from typing import Callable, Dict, List, Optional
 from fastapi import WebSocket
 import logging
+from server.core.config import setting
+from server.core.deadline import Deadline
+from server.core.metrics import metrics_registry
 
 logger = logging.getLogger(__name__)
 
 class ProgressManager:
-    def __init__(self):
+    def __init__(self, max_rate: Optional[float] = None, cancel_grace: Optional[float] = None):
         self.active_connections: Dict[str, WebSocket] = {}
         self.progress_data: Dict[str, Dict] = {}
+        
+        # Puente para hilos (scraper en executor): mensajes por segundo y sesión
+        self.max_rate = max_rate or setting.progress_max_rate
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[str, tuple] = {}
+        self._scheduled = set()
+        self._last_sent: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.stats = {'posted': 0, 'sent': 0, 'coalesced': 0, 'dropped': 0, 'jobs_cancelled': 0}
+        
+        # Sesiones unidas a un trabajo en curso: reciben lo que se envía a la sesión líder
+        self._followers: Dict[str, List[str]] = {}
+        self._leader_of: Dict[str, str] = {}
+        self._completing = set()
+        
+        # Token de cancelación (Deadline) del trabajo de cada sesión líder; se cancela si todas
+        # sus sesiones se desconectan y ninguna vuelve en `cancel_grace` segundos
+        self.cancel_grace = setting.job_cancel_grace if cancel_grace is None else cancel_grace
+        self._jobs: Dict[str, Deadline] = {}
+        
+        # En un proceso worker del scraper no hay WebSockets: lo publicado se reenvía al proceso de la API
+        self.relay: Optional[Callable] = None
+    
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Event loop principal donde se envían los mensajes publicados desde otros hilos"""
+        self.loop = loop
     
     async def connect(self, websocket: WebSocket, session_id: str):
         """Conectar un cliente WebSocket"""
         await websocket.accept()
         self.active_connections[session_id] = websocket
+        if self.loop is None:
+            self.bind_loop(asyncio.get_running_loop())
         logger.info(f"📡 Cliente conectado: {session_id}")
+        
+        # Último progreso enviado antes de conectar (p. ej. posición en cola), o el del
+        # trabajo al que se unió la sesión
+        snapshot = self.progress_data.get(self._leader_of.get(session_id, session_id))
+        if snapshot:
+            try:
+                await websocket.send_text(json.dumps(snapshot))
+            except Exception as e:
+                logger.error(f"❌ Error enviando progreso a {session_id}: {e}")
+    
+    def attach(self, leader_id: str, session_id: str) -> bool:
+        """
+        Unir `session_id` al trabajo de `leader_id`: recibirá su progreso y su finalización.
+        
+        Devuelve False si el trabajo ya está enviando su finalización (hay que lanzar otro).
+        """
+        with self._lock:
+            if leader_id in self._completing:
+                return False
+            self._followers.setdefault(leader_id, []).append(session_id)
+            self._leader_of[session_id] = leader_id
+        logger.info(f"🔗 Sesión {session_id} unida al trabajo de {leader_id}")
+        return True
+    
+    def _targets(self, session_id: str) -> List[str]:
+        """Sesión líder y sesiones unidas a su trabajo"""
+        with self._lock:
+            return [session_id] + self._followers.get(session_id, [])
+    
+    def _has_listeners(self, session_id: str) -> bool:
+        return any(target in self.active_connections for target in self._targets(session_id))
+    
+    def track(self, session_id: str, token: Deadline):
+        """Registrar el token de cancelación del trabajo que lidera `session_id`"""
+        with self._lock:
+            self._jobs[session_id] = token
+    
+    def untrack(self, session_id: str):
+        with self._lock:
+            self._jobs.pop(session_id, None)
+    
+    def cancel(self, session_id: str, reason: str = "cancelado por el cliente") -> str:
+        """
+        Cancelar el trabajo que sigue `session_id` (endpoint de cancelación).
+        
+        Si otras sesiones unidas al trabajo siguen conectadas, el trabajo continúa
+        para ellas y esta sesión deja de recibirlo. Devuelve 'cancelled',
+        'detached' o 'not_found'.
+        """
+        with self._lock:
+            leader = self._leader_of.pop(session_id, None)
+            if leader is not None and session_id in self._followers.get(leader, []):
+                self._followers[leader].remove(session_id)
+            leader = leader or session_id
+            token = self._jobs.get(leader)
+            others = [target for target in [leader] + self._followers.get(leader, [])
+                      if target != session_id and target in self.active_connections]
+        if token is None:
+            return 'not_found'
+        if others:
+            if session_id == leader:
+                # Los mensajes se siguen enviando con su id, pero ya no a su WebSocket
+                self.active_connections.pop(session_id, None)
+            logger.info(f"🔌 Sesión {session_id} sale del trabajo de {leader} ({len(others)} sesiones siguen)")
+            return 'detached'
+        self._cancel_job(leader, token, reason)
+        return 'cancelled'
+    
+    def _cancel_job(self, leader_id: str, token: Deadline, reason: str):
+        if token.cancel(reason):
+            with self._lock:
+                self.stats['jobs_cancelled'] += 1
+            logger.info(f"🛑 Trabajo de {leader_id} cancelado: {reason}")
+    
+    def _cancel_if_abandoned(self, leader_id: str):
+        # Se ejecuta dentro del event loop, pasado el periodo de gracia
+        with self._lock:
+            token = self._jobs.get(leader_id)
+        if token is not None and not self._has_listeners(leader_id):
+            self._cancel_job(leader_id, token, f"cliente desconectado más de {self.cancel_grace:g}s")
     
     def disconnect(self, session_id: str):
         """Desconectar un cliente"""
@@ -23,35 +136,162 @@ class ProgressManager:
             del self.active_connections[session_id]
         if session_id in self.progress_data:
             del self.progress_data[session_id]
+        with self._lock:
+            self._pending.pop(session_id, None)
+            self._last_sent.pop(session_id, None)
+            leader = self._leader_of.get(session_id, session_id)
+            tracked = leader in self._jobs
         logger.info(f"📡 Cliente desconectado: {session_id}")
+        
+        # Si nadie vuelve a conectar en el periodo de gracia, el trabajo se cancela
+        if tracked and self.loop is not None and not self.loop.is_closed():
+            try:
+                self.loop.call_soon_threadsafe(self.loop.call_later, self.cancel_grace,
+                                               self._cancel_if_abandoned, leader)
+            except RuntimeError:
+                pass
     
-    async def send_progress(self, session_id: str, percentage: int, message: str, status: str = "processing"):
-        """Enviar progreso a un cliente específico"""
-        if session_id not in self.active_connections:
+    def post_progress(self, session_id: str, percentage: int, message: str, status: str = "processing"):
+        """
+        Publicar progreso desde cualquier hilo sin bloquear.
+        
+        El envío se programa en el event loop principal con call_soon_threadsafe.
+        Si llegan actualizaciones más rápido que `max_rate` por segundo, solo se
+        envía la más reciente de cada intervalo. Sin nadie escuchando no se
+        envía nada, pero el progreso se guarda para mandarlo al conectar.
+        """
+        if self.relay is not None:
+            self.relay('progress', session_id, percentage, message, status)
             return
+        if self.loop is None or self.loop.is_closed() or not self._has_listeners(session_id):
+            self.progress_data[session_id] = self._progress_info(percentage, message, status)
+            with self._lock:
+                self.stats['dropped'] += 1
+            return
+        
+        with self._lock:
+            self.stats['posted'] += 1
+            if session_id in self._pending:
+                self.stats['coalesced'] += 1
+            self._pending[session_id] = (percentage, message, status)
+            if session_id in self._scheduled:
+                return
+            self._scheduled.add(session_id)
+            delay = max(0.0, self._last_sent.get(session_id, 0.0) + 1.0 / self.max_rate - time.monotonic())
         
-        progress_info = {
+        try:
+            self.loop.call_soon_threadsafe(self._schedule_flush, session_id, delay)
+        except RuntimeError:
+            # Loop cerrado durante el apagado
+            with self._lock:
+                self._scheduled.discard(session_id)
+    
+    def post_completion(self, session_id: str, success: bool, data: Optional[dict] = None, error: Optional[str] = None):
+        """Publicar la finalización desde cualquier hilo (después del último progreso pendiente)"""
+        if self.relay is not None:
+            self.relay('completion', session_id, success, data, error)
+            return
+        if self.loop is None or self.loop.is_closed():
+            self.progress_data.pop(session_id, None)
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._flush_and_complete(session_id, success, data, error), self.loop)
+        except RuntimeError:
+            pass
+    
+    def _schedule_flush(self, session_id: str, delay: float):
+        # Se ejecuta dentro del event loop
+        if delay > 0:
+            self.loop.call_later(delay, lambda: asyncio.ensure_future(self._flush(session_id)))
+        else:
+            asyncio.ensure_future(self._flush(session_id))
+    
+    def _take_pending(self, session_id: str) -> Optional[tuple]:
+        with self._lock:
+            self._scheduled.discard(session_id)
+            pending = self._pending.pop(session_id, None)
+            if pending is not None:
+                self._last_sent[session_id] = time.monotonic()
+                self.stats['sent'] += 1
+            return pending
+    
+    async def _flush(self, session_id: str):
+        pending = self._take_pending(session_id)
+        if pending is not None:
+            await self._send_progress(session_id, *pending)
+    
+    async def _flush_and_complete(self, session_id: str, success: bool, data: Optional[dict], error: Optional[str]):
+        await self._flush(session_id)
+        await self.send_completion(session_id, success, data, error)
+    
+    def get_metrics(self) -> Dict:
+        with self._lock:
+            return {
+                'connections': len(self.active_connections),
+                'max_rate': self.max_rate,
+                'pending': len(self._pending),
+                'attached_sessions': len(self._leader_of),
+                'tracked_jobs': len(self._jobs),
+                'cancel_grace': self.cancel_grace,
+                **self.stats
+            }
+    
+    async def send_progress(self, session_id: str, percentage: int, message: str, status: str = "processing"):
+        """Enviar progreso a un cliente específico"""
+        # Un envío directo desde el loop sustituye a lo publicado por hilos que siga pendiente
+        with self._lock:
+            if self._pending.pop(session_id, None) is not None:
+                self.stats['coalesced'] += 1
+        await self._send_progress(session_id, percentage, message, status)
+    
+    @staticmethod
+    def _progress_info(percentage: int, message: str, status: str) -> Dict:
+        return {
             "type": "progress",
             "percentage": percentage,
             "message": message,
             "status": status,
-            "timestamp": asyncio.get_event_loop().time()
+            # Mismo reloj que loop.time() del event loop
+            "timestamp": time.monotonic()
         }
+    
+    async def _send_progress(self, session_id: str, percentage: int, message: str, status: str = "processing"):
+        progress_info = self._progress_info(percentage, message, status)
         
-        # Guardar progreso
+        # Guardar progreso (se envía al conectar si aún no hay cliente)
         self.progress_data[session_id] = progress_info
         
-        try:
-            websocket = self.active_connections[session_id]
-            await websocket.send_text(json.dumps(progress_info))
-            logger.debug(f"📤 Progreso enviado a {session_id}: {percentage}% - {message}")
-        except Exception as e:
-            logger.error(f"❌ Error enviando progreso a {session_id}: {e}")
-            self.disconnect(session_id)
+        for target in self._targets(session_id):
+            websocket = self.active_connections.get(target)
+            if websocket is None:
+                continue
+            try:
+                await websocket.send_text(json.dumps(progress_info))
+                logger.debug(f"📤 Progreso enviado a {target}: {percentage}% - {message}")
+            except Exception as e:
+                logger.error(f"❌ Error enviando progreso a {target}: {e}")
+                self.disconnect(target)
     
     async def send_completion(self, session_id: str, success: bool, data: Optional[dict] = None, error: Optional[str] = None):
-        """Enviar notificación de finalización"""
+        """Enviar notificación de finalización (también a las sesiones unidas al trabajo)"""
+        # Desde aquí ninguna sesión nueva puede unirse a este trabajo
+        with self._lock:
+            self._completing.add(session_id)
+            self._jobs.pop(session_id, None)
+            followers = self._followers.pop(session_id, [])
+            for follower in followers:
+                self._leader_of.pop(follower, None)
+        
+        try:
+            for target in [session_id] + followers:
+                await self._send_completion(target, success, data, error)
+        finally:
+            with self._lock:
+                self._completing.discard(session_id)
+    
+    async def _send_completion(self, session_id: str, success: bool, data: Optional[dict], error: Optional[str]):
         if session_id not in self.active_connections:
+            self.progress_data.pop(session_id, None)
             return
         
         completion_info = {
@@ -73,4 +313,5 @@ class ProgressManager:
             self.disconnect(session_id)
 
 # Instancia global
-progress_manager = ProgressManager()
\ No newline at end of file
+progress_manager = ProgressManager()
+metrics_registry.register("progress", progress_manager.get_metrics)
@@ -0,0 +1,347 @@
+"""
+Servidor local que imita a YouTube reproduciendo páginas grabadas.
+
+Estructura del directorio de fixtures:
+    watch/<video_id>.html   página de watch (con ytInitialData, ytcfg...)
+    next/<token>.json       respuesta de youtubei/v1/next para ese token de continuación
+
+Las rutas /_assets/... devuelven un recurso sintético (vídeo, imagen, fuente,
+script de anuncios...) según la extensión, con `asset_latency` de retardo:
+imitan los subrecursos pesados de una página real para medir su bloqueo.
+
+Con `render_comments` las páginas de watch incluyen /_replay/comments.js, que
+pinta la sección de comentarios como YouTube (hilos al hacer scroll hasta el
+spinner, botones de respuestas) pidiendo las continuaciones grabadas: así el
+backend Selenium también puede ejecutarse contra el replay.
+
+Uso: python -m server.scraper.replay_server --dir server/tests/fixtures/replay --port 8765
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from server.core.print_dev import log_info
+
+_SAFE_NAME = re.compile(r'^[\w\-=%.]+$')
+
+_ASSET_TYPES = {
+    '.js': 'application/javascript', '.css': 'text/css', '.woff2': 'font/woff2', '.jpg': 'image/jpeg',
+    '.webp': 'image/webp', '.png': 'image/png', '.mp4': 'video/mp4',
+}
+
+
+# Sección de comentarios mínima con los mismos elementos que leen los scripts de dom_extract
+REPLAY_COMMENTS_JS = r"""
+(function () {
+    function find(value, key) {
+        if (!value || typeof value !== 'object') return null;
+        if (key in value) return value[key];
+        for (var k in value) {
+            var found = find(value[k], key);
+            if (found) return found;
+        }
+        return null;
+    }
+
+    function token(item) {
+        var command = find(item, 'continuationCommand');
+        return command ? command.token : null;
+    }
+
+    function el(tag, attrs, text) {
+        var node = document.createElement(tag);
+        for (var name in attrs || {}) node.setAttribute(name, attrs[name]);
+        if (text != null) node.textContent = text;
+        return node;
+    }
+
+    function fetchNext(continuation) {
+        return fetch('/youtubei/v1/next?prettyPrint=false', {
+            method: 'POST', headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({continuation: continuation})
+        }).then(function (r) { return r.ok ? r.json() : {}; }).catch(function () { return {}; });
+    }
+
+    function parse(data) {
+        var entities = {};
+        ((((data.frameworkUpdates || {}).entityBatchUpdate) || {}).mutations || []).forEach(function (m) {
+            if (m.payload && m.payload.commentEntityPayload) entities[m.entityKey] = m.payload.commentEntityPayload;
+        });
+        var items = [];
+        (data.onResponseReceivedEndpoints || []).forEach(function (endpoint) {
+            var action = endpoint.reloadContinuationItemsCommand || endpoint.appendContinuationItemsAction || {};
+            items = items.concat(action.continuationItems || []);
+        });
+        return {entities: entities, items: items};
+    }
+
+    function commentNode(tag, entity) {
+        var node = tag === 'div' ? el('div', {id: 'comment'}) : el(tag);
+        var properties = entity.properties || {}, toolbar = entity.toolbar || {};
+        node.appendChild(el('a', {id: 'author-text', href: '#'}, (entity.author || {}).displayName || ''));
+        node.appendChild(el('a', {'class': 'published-time-text', href: '?lc=' + (properties.commentId || '')},
+                            properties.publishedTime || ''));
+        node.appendChild(el('span', {id: 'content-text'}, (properties.content || {}).content || ''));
+        node.appendChild(el('span', {id: 'vote-count-middle'}, toolbar.likeCountNotliked || ''));
+        return node;
+    }
+
+    function loadReplies(replies, continuation) {
+        var spinner = el('tp-yt-paper-spinner', {active: ''});
+        replies.appendChild(spinner);
+        fetchNext(continuation).then(function (data) {
+            var page = parse(data);
+            spinner.remove();
+            page.items.forEach(function (item) {
+                var model = item.commentViewModel;
+                if (model && page.entities[model.commentKey]) {
+                    replies.appendChild(commentNode('ytd-comment-view-model', page.entities[model.commentKey]));
+                } else if (item.continuationItemRenderer && token(item)) {
+                    var more = el('ytd-continuation-item-renderer');
+                    var button = el('button', {}, 'Mostrar más respuestas');
+                    button.addEventListener('click', function () { more.remove(); loadReplies(replies, token(item)); });
+                    more.appendChild(button);
+                    replies.appendChild(more);
+                }
+            });
+        });
+    }
+
+    function threadNode(item, entities) {
+        var thread = item.commentThreadRenderer;
+        var entity = entities[((thread.commentViewModel || {}).commentViewModel || {}).commentKey];
+        if (!entity) return null;
+        var node = el('ytd-comment-thread-renderer');
+        node.appendChild(commentNode('div', entity));
+        var repliesToken = thread.replies ? token(thread.replies) : null;
+        if (repliesToken) {
+            var count = (entity.toolbar || {}).replyCount;
+            var label = (count ? count + ' ' : '') + 'respuestas';
+            var replies = el('div', {id: 'replies'});
+            var button = el('button', {id: 'more-replies', 'aria-label': label}, label);
+            button.addEventListener('click', function () {
+                if (!replies.dataset.loaded) {
+                    replies.dataset.loaded = '1';
+                    loadReplies(replies, repliesToken);
+                }
+            });
+            node.appendChild(button);
+            node.appendChild(replies);
+        }
+        return node;
+    }
+
+    function start() {
+        var section = find(window.ytInitialData || {}, 'itemSectionRenderer');
+        var first = section ? token(section) : null;
+        var comments = el('div', {id: 'comments', style: 'margin-top: 1500px'});
+        var contents = el('div', {id: 'contents'});
+        comments.appendChild(contents);
+        document.body.appendChild(comments);
+        if (!first) return;
+
+        var spinner = el('ytd-continuation-item-renderer', {}, 'Cargando...');
+        spinner.dataset.token = first;
+        comments.appendChild(spinner);
+        var loading = false;
+        var observer = new IntersectionObserver(function (entries) {
+            if (loading || !entries.some(function (e) { return e.isIntersecting; })) return;
+            loading = true;
+            fetchNext(spinner.dataset.token).then(function (data) {
+                var page = parse(data), next = null;
+                page.items.forEach(function (item) {
+                    if (item.commentThreadRenderer) {
+                        var node = threadNode(item, page.entities);
+                        if (node) contents.appendChild(node);
+                    } else if (item.continuationItemRenderer) {
+                        next = token(item);
+                    }
+                });
+                loading = false;
+                observer.unobserve(spinner);
+                if (next) {
+                    spinner.dataset.token = next;
+                    // Volver a observar: si el spinner sigue visible se pide la siguiente página
+                    observer.observe(spinner);
+                } else {
+                    spinner.remove();
+                }
+            });
+        });
+        observer.observe(spinner);
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', start);
+    } else {
+        start();
+    }
+})();
+"""
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    server_version = "YouTubeReplay/1.0"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/watch':
+            video_id = parse_qs(url.query).get('v', [''])[0]
+            self._serve_file('watch', f"{video_id}.html", 'text/html; charset=utf-8')
+        elif url.path == '/_replay/comments.js':
+            self._send(200, 'application/javascript', REPLAY_COMMENTS_JS.encode('utf-8'))
+        elif url.path.startswith('/_assets/'):
+            self._serve_asset(url.path)
+        else:
+            self._not_found()
+
+    def _serve_asset(self, path):
+        replay = self.server.replay
+        replay.record('asset')
+        if replay.asset_latency:
+            time.sleep(replay.asset_latency)
+        extension = os.path.splitext(path)[1]
+        content_type = _ASSET_TYPES.get(extension, 'application/octet-stream')
+        content = b'/* recurso de replay */' if extension == '.js' else b'\0' * replay.asset_size
+        self._send(200, content_type, content)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else b''
+        if url.path != '/youtubei/v1/next':
+            self._not_found()
+            return
+        try:
+            token = json.loads(body or b'{}').get('continuation', '')
+        except ValueError:
+            token = ''
+        self._serve_file('next', f"{token}.json", 'application/json')
+
+    def _serve_file(self, folder, name, content_type):
+        replay = self.server.replay
+        replay.record(folder)
+        if not _SAFE_NAME.match(name):
+            self._not_found()
+            return
+
+        path = os.path.join(replay.fixtures_dir, folder, name)
+        if not os.path.isfile(path):
+            self._not_found()
+            return
+
+        if replay.latency:
+            time.sleep(replay.latency)
+        with open(path, 'rb') as f:
+            content = f.read()
+        if folder == 'watch' and replay.render_comments:
+            content = content.replace(b'</body>', b'<script src="/_replay/comments.js"></script></body>', 1)
+        self._send(200, content_type, content)
+
+    def _send(self, status, content_type, content):
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente dejó de esperar (timeout o plazo agotado)
+            pass
+
+    def _not_found(self):
+        self.server.replay.record('not_found')
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        # Silenciar el log por petición de http.server
+        pass
+
+
+class ReplayServer:
+    """
+    Servidor HTTP local con respuestas grabadas de YouTube.
+
+    Sirve de sustituto de youtube.com para el backend HTTP del scraper en
+    tests y benchmarks (`HttpCommentFetcher(base_url=server.base_url)`).
+    `latency` añade un retardo fijo por respuesta para simular la red;
+    `asset_latency` y `asset_size`, lo mismo para los recursos de /_assets/.
+    Con `render_comments` la página pinta los comentarios en el DOM (para Selenium).
+    """
+
+    def __init__(self, fixtures_dir: str, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 asset_latency: float = 0.0, asset_size: int = 64 * 1024, render_comments: bool = False):
+        self.fixtures_dir = fixtures_dir
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.asset_latency = asset_latency
+        self.asset_size = asset_size
+        self.render_comments = render_comments
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def record(self, kind: str):
+        with self._lock:
+            self.requests[kind] += 1
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _ReplayHandler)
+        self._server.daemon_threads = True
+        self._server.replay = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        log_info(f"📼 Servidor de replay en {self.base_url} ({self.fixtures_dir})")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que reproduce páginas grabadas de YouTube")
+    parser.add_argument("--dir", required=True, help="Directorio con watch/ y next/")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Retardo por respuesta (segundos)")
+    parser.add_argument("--asset-latency", type=float, default=0.0, help="Retardo por recurso de /_assets/ (segundos)")
+    parser.add_argument("--render-comments", action="store_true", help="Pintar los comentarios en el DOM")
+    args = parser.parse_args()
+
+    server = ReplayServer(args.dir, args.host, args.port, args.latency, args.asset_latency,
+                          render_comments=args.render_comments).start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Bloqueo de recursos de red (CDP Network.setBlockedURLs) para acelerar la carga
+de la página de watch y el scroll de comentarios.
+
+Benchmark A/B (tiempos de carga y de scroll con y sin bloqueo contra el
+servidor de replay):
+    python -m server.scraper.resource_blocking --benchmark --runs 3
+"""
+
+import time
+import argparse
+import threading
+from fnmatch import fnmatchcase
+from typing import List, Dict, Any, Optional
+
+from server.core.config import setting
+from server.core.metrics import metrics_registry
+from server.core.print_dev import log_info, log_warning
+
+# Grupos de patrones (comodín '*', como en Network.setBlockedURLs)
+BLOCK_GROUPS = {
+    'media': ["*googlevideo.com/*", "*/videoplayback*", "*.m4s*", "*.mp4*", "*.webm*"],
+    'images': ["*i.ytimg.com/*", "*yt3.ggpht.com/*", "*.jpg*", "*.jpeg*", "*.png*", "*.webp*", "*.gif*"],
+    'fonts': ["*fonts.gstatic.com/*", "*fonts.googleapis.com/*", "*.woff2*", "*.woff*", "*.ttf*"],
+    'ads': ["*doubleclick.net/*", "*googlesyndication.com/*", "*googleadservices.com/*",
+            "*imasdk.googleapis.com/*", "*/pagead/*", "*/ptracking*", "*/get_midroll_info*"],
+    'tracking': ["*google-analytics.com/*", "*googletagmanager.com/*", "*/api/stats/*",
+                 "*/youtubei/v1/log_event*", "*/generate_204*", "*/csi_204*", "*play.google.com/log*"],
+}
+
+BLOCK_PROFILES = {
+    'off': [],
+    'light': ['media', 'images', 'fonts'],
+    'standard': ['media', 'images', 'fonts', 'ads', 'tracking'],
+}
+
+# URLs que el scraper necesita: ningún patrón puede bloquearlas
+REQUIRED_URLS = [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://www.youtube.com/youtubei/v1/next?prettyPrint=false",
+    "https://www.youtube.com/youtubei/v1/browse?prettyPrint=false",
+    "https://www.youtube.com/s/desktop/12345678/jsbin/desktop_polymer.vflset/desktop_polymer.js",
+    "https://www.youtube.com/s/player/12345678/player_ias.vflset/es_ES/base.js",
+]
+
+stats = {'applied': 0, 'failed': 0}
+_stats_lock = threading.Lock()
+
+
+def blocked_patterns(profile: Optional[str] = None, extra: Optional[List[str]] = None) -> List[str]:
+    """Patrones del perfil más los extra, sin los que bloquearían URLs necesarias"""
+    profile = profile or setting.scraper_block_profile
+    if profile not in BLOCK_PROFILES:
+        log_warning(f"⚠️ Perfil de bloqueo desconocido '{profile}', no se bloquea nada")
+        profile = 'off'
+
+    patterns = [pattern for group in BLOCK_PROFILES[profile] for pattern in BLOCK_GROUPS[group]]
+    patterns += setting.scraper_block_extra if extra is None else extra
+
+    allowed = []
+    for pattern in dict.fromkeys(patterns):
+        hit = next((url for url in REQUIRED_URLS if fnmatchcase(url, pattern)), None)
+        if hit:
+            log_warning(f"⚠️ Patrón de bloqueo '{pattern}' descartado: bloquearía {hit}")
+        else:
+            allowed.append(pattern)
+    return allowed
+
+
+def apply_blocking(driver, patterns: List[str]) -> bool:
+    """Activar el bloqueo en la pestaña actual del driver (un perfil vacío lo desactiva)"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+    except Exception as e:
+        with _stats_lock:
+            stats['failed'] += 1
+        log_warning(f"⚠️ No se pudo activar el bloqueo de recursos: {e}")
+        return False
+    with _stats_lock:
+        stats['applied'] += 1
+    return True
+
+
+def get_metrics() -> Dict[str, Any]:
+    with _stats_lock:
+        return {'profile': setting.scraper_block_profile, 'patterns': len(blocked_patterns()), **stats}
+
+
+metrics_registry.register("resource_blocking", get_metrics)
+
+
+# Un paso de scroll en la página de benchmark: pide la siguiente página de comentarios
+# (permitida) y lo que YouTube carga al hacer scroll (miniaturas, anuncio, beacon).
+# Termina cuando todo ha cargado o fallado.
+BENCHMARK_SCROLL_JS = """
+const done = arguments[arguments.length - 1];
+const step = arguments[0];
+window.scrollBy(0, 800);
+const loads = [
+    fetch('/youtubei/v1/next', {method: 'POST', body: JSON.stringify({continuation: 'COMMENTS_PAGE_1'})})
+        .then(r => r.text()).catch(() => null)
+];
+['/_assets/vi/' + step + '/hqdefault.jpg', '/_assets/vi/' + step + '/mqdefault.webp',
+ '/_assets/pagead/adview?step=' + step, '/_assets/api/stats/qoe?step=' + step].forEach(src => {
+    loads.push(new Promise(resolve => { const img = new Image(); img.onload = img.onerror = resolve; img.src = src; }));
+});
+Promise.all(loads).then(() => done(true));
+"""
+
+BENCHMARK_VIDEO_ID = "BLOCKBENCH01"
+
+
+def _measure(profile: str, base_url: str, scroll_steps: int, headless: bool) -> Dict[str, float]:
+    from server.scraper.browser_pool import create_chrome_driver
+
+    driver = create_chrome_driver(headless)
+    try:
+        driver.set_script_timeout(60)
+        apply_blocking(driver, blocked_patterns(profile))
+        started = time.perf_counter()
+        driver.get(f"{base_url}/watch?v={BENCHMARK_VIDEO_ID}")
+        page_load = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for step in range(scroll_steps):
+            driver.execute_async_script(BENCHMARK_SCROLL_JS, step)
+        scroll = (time.perf_counter() - started) / max(scroll_steps, 1)
+        return {'page_load_s': page_load, 'scroll_step_s': scroll}
+    finally:
+        driver.quit()
+
+
+def run_benchmark(fixtures_dir: str, profile: str = "standard", runs: int = 3, scroll_steps: int = 5,
+                  asset_latency: float = 0.3, headless: bool = True) -> Dict[str, Any]:
+    """
+    A/B de carga de página y scroll sin bloqueo ('off') y con `profile`.
+
+    Usa el servidor de replay con una página grabada cuyos recursos pesados
+    (vídeo, anuncios, fuentes, miniaturas, beacons) tardan `asset_latency`.
+    """
+    from server.scraper.replay_server import ReplayServer
+
+    results = {}
+    with ReplayServer(fixtures_dir, asset_latency=asset_latency) as server:
+        for variant in ['off', profile]:
+            samples = [_measure(variant, server.base_url, scroll_steps, headless) for _ in range(runs)]
+            results[variant] = {
+                key: round(sorted(sample[key] for sample in samples)[len(samples) // 2], 3)
+                for key in ('page_load_s', 'scroll_step_s')
+            }
+            log_info(f"⏱️ Bloqueo '{variant}': carga {results[variant]['page_load_s']}s, "
+                     f"scroll {results[variant]['scroll_step_s']}s/paso (mediana de {runs})")
+
+    base, blocked = results['off'], results[profile]
+    results['speedup'] = {
+        key: round(base[key] / blocked[key], 2) if blocked[key] else None for key in base
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bloqueo de recursos del scraper")
+    parser.add_argument("--benchmark", action="store_true", help="Medir carga y scroll con y sin bloqueo")
+    parser.add_argument("--dir", default="server/tests/fixtures/replay", help="Fixtures del servidor de replay")
+    parser.add_argument("--profile", default="standard", choices=[p for p in BLOCK_PROFILES if p != 'off'])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--scroll-steps", type=int, default=5)
+    parser.add_argument("--asset-latency", type=float, default=0.3, help="Retardo de cada recurso pesado (s)")
+    parser.add_argument("--show-browser", action="store_true")
+    args = parser.parse_args()
+
+    if not args.benchmark:
+        for pattern in blocked_patterns(args.profile):
+            print(pattern)
+        return
+
+    results = run_benchmark(args.dir, args.profile, args.runs, args.scroll_steps, args.asset_latency,
+                            headless=not args.show_browser)
+    print(f"{'':10} {'carga (s)':>10} {'scroll (s/paso)':>16}")
+    for variant in ['off', args.profile]:
+        print(f"{variant:10} {results[variant]['page_load_s']:>10} {results[variant]['scroll_step_s']:>16}")
+    print(f"{'speedup':10} {results['speedup']['page_load_s']:>10} {results['speedup']['scroll_step_s']:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+import os
+import json
+import gzip
+import tempfile
+import time
+import threading
+from collections import OrderedDict, Counter
+from typing import Dict, Any, Optional, Tuple, List
+
+from server.core.config import setting
+from server.core.metrics import metrics_registry
+from server.core.print_dev import log_info, log_warning
+
+
+def trim_scrape(data: Dict[str, Any], max_comments: int) -> Dict[str, Any]:
+    """Resultado de scraping recortado a `max_comments` hilos, con los totales recalculados"""
+    threads = data.get('threads', [])
+    if len(threads) <= max_comments:
+        return data
+
+    threads = threads[:max_comments]
+    emoji_counter = Counter()
+    total_likes = 0
+    total_replies = 0
+    for thread in threads:
+        emoji_counter.update(thread.get('emojis', []))
+        total_likes += thread.get('likes', 0)
+        for reply in thread.get('replies', []):
+            emoji_counter.update(reply.get('emojis', []))
+            total_likes += reply.get('likes', 0)
+            total_replies += 1
+
+    return dict(
+        data,
+        threads=threads,
+        total_comments=len(threads),
+        total_threads=total_replies,
+        total_likes=total_likes,
+        emoji_stats=dict(emoji_counter),
+        total_emojis=sum(emoji_counter.values()),
+        most_common_emojis=dict(emoji_counter.most_common(10))
+    )
+
+
+class ScrapeCache:
+    """
+    Caché de resultados de scraping por (video_id, tramo de max_comments).
+
+    `max_comments` se redondea al tramo superior de `tiers`; una entrada de
+    un tramo mayor también sirve para uno menor (se recorta), y una con menos
+    hilos de los pedidos solo si su scraping se quedó por debajo de su propio
+    límite (el vídeo no tiene más). Las entradas
+    caducan a los `ttl` segundos. En memoria se guarda el JSON serializado
+    (cada lectura devuelve una copia que el pipeline puede anotar) con
+    expulsión LRU; si hay `cache_dir`, también en disco como .json.gz para
+    compartirlo entre reinicios y procesos.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None,
+                 cache_dir: Optional[str] = None, tiers: Optional[List[int]] = None):
+        self.ttl = ttl if ttl is not None else setting.scrape_cache_ttl
+        self.max_entries = max_entries or setting.scrape_cache_max_entries
+        self.cache_dir = cache_dir if cache_dir is not None else setting.scrape_cache_dir
+        self.tiers = sorted(tiers or setting.scrape_cache_tiers)
+        # (video_id, tramo) -> (guardado en, max_comments pedido, JSON)
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, int, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'disk_hits': 0}
+
+    def tier(self, max_comments: int) -> int:
+        for tier in self.tiers:
+            if max_comments <= tier:
+                return tier
+        return max_comments
+
+    def get(self, video_id: str, max_comments: int) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Resultado cacheado y su antigüedad en segundos, o None si no hay ninguno fresco"""
+        if self.ttl <= 0:
+            return None
+        requested = self.tier(max_comments)
+        for tier in [t for t in self.tiers if t >= requested] or [requested]:
+            entry = self._lookup((video_id, tier))
+            if not entry:
+                continue
+            stored_at, stored_max, payload = entry
+            data = json.loads(payload)
+            found = len(data.get('threads', []))
+            if found < max_comments and found >= stored_max:
+                continue
+            with self._lock:
+                self.stats['hits'] += 1
+            return trim_scrape(data, max_comments), time.time() - stored_at
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, video_id: str, max_comments: int, data: Dict[str, Any]):
+        key = (video_id, self.tier(max_comments))
+        stored_at = time.time()
+        payload = json.dumps(data, ensure_ascii=False)
+        with self._lock:
+            self._entries[key] = (stored_at, max_comments, payload)
+            self._entries.move_to_end(key)
+            self.stats['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+        if self.cache_dir:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                path = self._path(key)
+                # Temporal con nombre único: otro proceso puede estar guardando la misma entrada
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{os.path.basename(path)}-",
+                                                suffix=".tmp")
+                try:
+                    with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+                        f.write(json.dumps({'stored_at': stored_at, 'max_comments': max_comments, 'data': data},
+                                           ensure_ascii=False))
+                    os.replace(tmp_path, path)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+            except Exception as e:
+                log_warning(f"⚠️ No se pudo guardar el scraping en la caché de disco: {e}")
+
+    def _lookup(self, key: Tuple[str, int]) -> Optional[Tuple[float, int, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                return entry
+            if entry:
+                del self._entries[key]
+
+        entry = self._load_from_disk(key)
+        if entry:
+            with self._lock:
+                self._entries[key] = entry
+                self.stats['disk_hits'] += 1
+        return entry
+
+    def _load_from_disk(self, key: Tuple[str, int]) -> Optional[Tuple[float, int, str]]:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                stored = json.load(f)
+            if time.time() - stored['stored_at'] > self.ttl:
+                return None
+            return stored['stored_at'], stored['max_comments'], json.dumps(stored['data'], ensure_ascii=False)
+        except Exception as e:
+            log_warning(f"⚠️ Entrada de caché ilegible {path}: {e}")
+            return None
+
+    def _path(self, key: Tuple[str, int]) -> str:
+        video_id, tier = key
+        return os.path.join(self.cache_dir, f"{video_id}_{tier}.json.gz")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                'entries': len(self._entries),
+                'ttl_seconds': self.ttl,
+                'tiers': self.tiers,
+                'disk': bool(self.cache_dir),
+                'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else None,
+                **self.stats
+            }
+
+
+# Instancia global
+scrape_cache = ScrapeCache()
+metrics_registry.register("scrape_cache", scrape_cache.get_metrics)
+log_info(f"🗃️ Caché de scraping: {scrape_cache.ttl}s de frescura, tramos {scrape_cache.tiers}")
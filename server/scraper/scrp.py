@@ -12,6 +12,8 @@ import emoji
 from collections import Counter
 import json
 from server.core.print_dev import log_info, log_error, log_warning, log_debug
+from server.scraper.dom_extract import parse_count
+from server.scraper.selector_registry import selector_registry
 
 class YouTubeCommentScraperChrome:
     def __init__(self, headless=True):
@@ -130,6 +132,13 @@ class YouTubeCommentScraperChrome:
             if comments_loaded >= max_comments:
                 break
     
+    def _find_text(self, element, field, selectors, default):
+        """Texto del primer selector que encuentre elemento (el último que funcionó se prueba primero)"""
+        text, _ = selector_registry.find(
+            field, selectors, lambda selector: element.find_element(By.CSS_SELECTOR, selector).text.strip()
+        )
+        return default if text is None else text
+
     def extract_comment_data(self, comment_element):
         """Extrae los datos de un comentario individual"""
         try:
@@ -140,15 +149,7 @@ class YouTubeCommentScraperChrome:
                 "a#author-text",
                 "[id*='author-text']"
             ]
-            
-            author = "Autor desconocido"
-            for selector in author_selectors:
-                try:
-                    author_element = comment_element.find_element(By.CSS_SELECTOR, selector)
-                    author = author_element.text.strip()
-                    break
-                except:
-                    continue
+            author = self._find_text(comment_element, "comment_author", author_selectors, "Autor desconocido")
             
             # Contenido del comentario
             content_selectors = [
@@ -157,56 +158,23 @@ class YouTubeCommentScraperChrome:
                 "#comment-content #content-text",
                 "[id*='content-text']"
             ]
-            
-            content = "Contenido no disponible"
-            for selector in content_selectors:
-                try:
-                    content_element = comment_element.find_element(By.CSS_SELECTOR, selector)
-                    content = content_element.text.strip()
-                    break
-                except:
-                    continue
+            content = self._find_text(comment_element, "comment_content", content_selectors, "Contenido no disponible")
             
             # Likes del comentario
-            likes = 0
             like_selectors = [
                 "#vote-count-middle",
                 ".ytd-comment-action-buttons-renderer #vote-count-middle",
                 "[id*='vote-count']"
             ]
-            
-            for selector in like_selectors:
-                try:
-                    like_element = comment_element.find_element(By.CSS_SELECTOR, selector)
-                    likes_text = like_element.text.strip()
-                    
-                    if likes_text == '':
-                        likes = 0
-                    elif 'K' in likes_text:
-                        likes = int(float(likes_text.replace('K', '')) * 1000)
-                    elif 'M' in likes_text:
-                        likes = int(float(likes_text.replace('M', '')) * 1000000)
-                    else:
-                        likes = int(likes_text) if likes_text.isdigit() else 0
-                    break
-                except:
-                    continue
+            likes = parse_count(self._find_text(comment_element, "comment_likes", like_selectors, ""))
             
             # Tiempo del comentario
-            published_time = "Desconocido"
             time_selectors = [
                 ".published-time-text",
                 "[class*='published-time']",
                 "a[href*='lc=']"
             ]
-            
-            for selector in time_selectors:
-                try:
-                    time_element = comment_element.find_element(By.CSS_SELECTOR, selector)
-                    published_time = time_element.text.strip()
-                    break
-                except:
-                    continue
+            published_time = self._find_text(comment_element, "comment_time", time_selectors, "Desconocido")
             
             # Extraer emojis
             emojis = self.extract_emojis(content)
@@ -235,87 +203,80 @@ class YouTubeCommentScraperChrome:
                 "#replies-button"
             ]
             
-            for selector in reply_selectors:
+            def replies_button_lookup(selector):
+                # Solo cuenta como acierto si el botón es de respuestas
+                button = comment_element.find_element(By.CSS_SELECTOR, selector)
+                label = f"{button.text} {button.get_attribute('aria-label') or ''}".lower()
+                return button if ("respuesta" in label or "reply" in label or "replies" in label) else None
+            
+            replies_button, _ = selector_registry.find("comment_replies_button", reply_selectors, replies_button_lookup)
+            
+            if replies_button is not None:
+                button_text = replies_button.text.strip()
+                aria_label = replies_button.get_attribute('aria-label') or ''
+                has_replies = True
+                
+                # Extraer número de respuestas del texto
+                numbers = re.findall(r'\d+', button_text + ' ' + aria_label)
+                if numbers:
+                    replies_count = int(numbers[0])
+                
+                print(f"🔄 Encontrado botón de respuestas: '{button_text}' con {replies_count} respuestas")
+                
+                # Hacer clic para expandir respuestas
                 try:
-                    replies_button = comment_element.find_element(By.CSS_SELECTOR, selector)
-                    button_text = replies_button.text.strip()
-                    aria_label = replies_button.get_attribute('aria-label') or ''
+                    # Scroll al elemento antes de hacer clic
+                    self.driver.execute_script("arguments[0].scrollIntoView(true);", replies_button)
+                    time.sleep(1)
+                    
+                    # Hacer clic con JavaScript para mayor confiabilidad
+                    self.driver.execute_script("arguments[0].click();", replies_button)
+                    time.sleep(3)  # Esperar más tiempo para que se carguen las respuestas
+                    
+                    # Buscar respuestas con múltiples selectores más específicos
+                    reply_container_selectors = [
+                        "#replies",
+                        "ytd-comment-replies-renderer",
+                        ".ytd-comment-replies-renderer",
+                        "#expander-contents"
+                    ]
+                    reply_item_selectors = [
+                        "ytd-comment-view-model",
+                        ".ytd-comment-view-model", 
+                        "ytd-comment-renderer",
+                        ".ytd-comment-renderer",
+                        "#comment",
+                        ".comment"
+                    ]
+                    
+                    def reply_items_lookup(container_selector):
+                        container = comment_element.find_element(By.CSS_SELECTOR, container_selector)
+                        items, _ = selector_registry.find(
+                            "reply_item", reply_item_selectors,
+                            lambda selector: container.find_elements(By.CSS_SELECTOR, selector) or None
+                        )
+                        return items
+                    
+                    reply_elements, container_selector = selector_registry.find(
+                        "reply_container", reply_container_selectors, reply_items_lookup
+                    )
+                    reply_elements = reply_elements or []
+                    if reply_elements:
+                        print(f"✅ Encontradas respuestas con selector: {container_selector}")
+                    
+                    print(f"💬 Encontradas {len(reply_elements)} respuestas para procesar")
+                    
+                    valid_replies_count = 0
+                    for reply_elem in reply_elements[:8]:  # Limitar a 8 respuestas por comentario
+                        reply_data = self.extract_reply_data(reply_elem)
+                        if reply_data:  # Solo agregar si los datos son válidos
+                            replies_data.append(reply_data)
+                            valid_replies_count += 1
+                    
+                    print(f"✅ Procesadas {valid_replies_count} respuestas válidas de {len(reply_elements[:8])} intentadas")
                     
-                    # Verificar si es botón de respuestas
-                    if (("respuesta" in button_text.lower() or "reply" in button_text.lower() or "replies" in button_text.lower()) or
-                        ("respuesta" in aria_label.lower() or "reply" in aria_label.lower() or "replies" in aria_label.lower())):
-                        
-                        has_replies = True
-                        
-                        # Extraer número de respuestas del texto
-                        numbers = re.findall(r'\d+', button_text + ' ' + aria_label)
-                        if numbers:
-                            replies_count = int(numbers[0])
-                        
-                        print(f"🔄 Encontrado botón de respuestas: '{button_text}' con {replies_count} respuestas")
-                        
-                        # Hacer clic para expandir respuestas
-                        try:
-                            # Scroll al elemento antes de hacer clic
-                            self.driver.execute_script("arguments[0].scrollIntoView(true);", replies_button)
-                            time.sleep(1)
-                            
-                            # Hacer clic con JavaScript para mayor confiabilidad
-                            self.driver.execute_script("arguments[0].click();", replies_button)
-                            time.sleep(3)  # Esperar más tiempo para que se carguen las respuestas
-                            
-                            # Buscar respuestas con múltiples selectores más específicos
-                            reply_container_selectors = [
-                                "#replies",
-                                "ytd-comment-replies-renderer",
-                                ".ytd-comment-replies-renderer",
-                                "#expander-contents"
-                            ]
-                            
-                            reply_elements = []
-                            for container_selector in reply_container_selectors:
-                                try:
-                                    container = comment_element.find_element(By.CSS_SELECTOR, container_selector)
-                                    # Intentar múltiples selectores para encontrar respuestas individuales
-                                    reply_selectors_inner = [
-                                        "ytd-comment-view-model",
-                                        ".ytd-comment-view-model", 
-                                        "ytd-comment-renderer",
-                                        ".ytd-comment-renderer",
-                                        "#comment",
-                                        ".comment"
-                                    ]
-                                    
-                                    for reply_selector in reply_selectors_inner:
-                                        reply_elements = container.find_elements(By.CSS_SELECTOR, reply_selector)
-                                        if reply_elements:
-                                            print(f"✅ Encontradas respuestas con selector: {container_selector} > {reply_selector}")
-                                            break
-                                    
-                                    if reply_elements:
-                                        break
-                                except Exception as inner_e:
-                                    print(f"Error con contenedor {container_selector}: {inner_e}")
-                                    continue
-                            
-                            print(f"💬 Encontradas {len(reply_elements)} respuestas para procesar")
-                            
-                            valid_replies_count = 0
-                            for reply_elem in reply_elements[:8]:  # Limitar a 8 respuestas por comentario
-                                reply_data = self.extract_reply_data(reply_elem)
-                                if reply_data:  # Solo agregar si los datos son válidos
-                                    replies_data.append(reply_data)
-                                    valid_replies_count += 1
-                            
-                            print(f"✅ Procesadas {valid_replies_count} respuestas válidas de {len(reply_elements[:8])} intentadas")
-                            
-                        except Exception as e:
-                            print(f"⚠️ Error expandiendo respuestas: {e}")
-                        
-                        break
-                        
                 except Exception as e:
-                    continue
+                    print(f"⚠️ Error expandiendo respuestas: {e}")
             
             return {
                 'author': author,
@@ -352,16 +313,7 @@ class YouTubeCommentScraperChrome:
                 "[id*='author-text']",
                 "a[href*='@']"
             ]
-            
-            author = "Autor desconocido"
-            for selector in author_selectors:
-                try:
-                    author_element = reply_element.find_element(By.CSS_SELECTOR, selector)
-                    author = author_element.text.strip()
-
-                    break
-                except:
-                    continue
+            author = self._find_text(reply_element, "reply_author", author_selectors, "Autor desconocido")
             
             # Contenido de la respuesta
             content_selectors = [
@@ -371,41 +323,16 @@ class YouTubeCommentScraperChrome:
                 "[id*='content-text']",
                 ".comment-text"
             ]
-            
-            content = "Contenido no disponible"
-            for selector in content_selectors:
-                try:
-                    content_element = reply_element.find_element(By.CSS_SELECTOR, selector)
-                    content = content_element.text.strip()
-                    break
-                except:
-                    continue
+            content = self._find_text(reply_element, "reply_content", content_selectors, "Contenido no disponible")
             
             # Likes de la respuesta
-            likes = 0
             like_selectors = [
                 "#vote-count-middle",
                 ".ytd-comment-action-buttons-renderer #vote-count-middle",
                 "[id*='vote-count']",
                 ".vote-count-middle"
             ]
-            
-            for selector in like_selectors:
-                try:
-                    like_element = reply_element.find_element(By.CSS_SELECTOR, selector)
-                    likes_text = like_element.text.strip()
-                    
-                    if likes_text == '':
-                        likes = 0
-                    elif 'K' in likes_text:
-                        likes = int(float(likes_text.replace('K', '')) * 1000)
-                    elif 'M' in likes_text:
-                        likes = int(float(likes_text.replace('M', '')) * 1000000)
-                    else:
-                        likes = int(likes_text) if likes_text.isdigit() else 0
-                    break
-                except:
-                    continue
+            likes = parse_count(self._find_text(reply_element, "reply_likes", like_selectors, ""))
             
             # Extraer emojis de la respuesta
             emojis = self.extract_emojis(content)
@@ -452,13 +379,17 @@ class YouTubeCommentScraperChrome:
                 "#title h1"
             ]
             
-            for selector in title_selectors:
-                try:
-                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-                    video_title = self.driver.find_element(By.CSS_SELECTOR, selector).text
-                    break
-                except:
-                    continue
+            # Una sola espera hasta que aparezca cualquiera de los selectores (no 30s por selector)
+            try:
+                wait.until(lambda driver: any(driver.find_elements(By.CSS_SELECTOR, selector) for selector in title_selectors))
+            except:
+                pass
+            title_text, _ = selector_registry.find(
+                "video_title", title_selectors,
+                lambda selector: self.driver.find_element(By.CSS_SELECTOR, selector).text
+            )
+            if title_text is not None:
+                video_title = title_text
             
             print(f"🎬 Video: {video_title}")
             
@@ -484,15 +415,13 @@ class YouTubeCommentScraperChrome:
                 "#channel-name #text"
             ]
             
-            for selector in author_selectors:
-                try:
-                    author_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    video_author = author_element.text.strip()
-                    if video_author and video_author != "":
-                        print(f"👤 Autor encontrado con selector: {selector}")
-                        break
-                except:
-                    continue
+            author_text, selector = selector_registry.find(
+                "video_author", author_selectors,
+                lambda selector: self.driver.find_element(By.CSS_SELECTOR, selector).text.strip() or None
+            )
+            if author_text:
+                video_author = author_text
+                print(f"👤 Autor encontrado con selector: {selector}")
             
             print(f"🆔 Video ID: {video_id}")
             print(f"👤 Autor: {video_author}")
@@ -562,20 +491,18 @@ class YouTubeCommentScraperChrome:
                 "ytd-video-primary-info-renderer #description"
             ]
             
-            # Intentar con cada selector
-            for selector in description_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        desc_text = element.text.strip()
-                        if desc_text and len(desc_text) > 10:
-                            video_description = desc_text
-                            print(f"📝 Descripción encontrada con selector: {selector}")
-                            break
-                    if video_description != "Descripción no disponible":
-                        break
-                except Exception as e:
-                    continue
+            def description_lookup(selector):
+                for element in self.driver.find_elements(By.CSS_SELECTOR, selector):
+                    desc_text = element.text.strip()
+                    if desc_text and len(desc_text) > 10:
+                        return desc_text
+                return None
+            
+            # Intentar con cada selector (el último que funcionó primero)
+            desc_text, selector = selector_registry.find("video_description", description_selectors, description_lookup)
+            if desc_text:
+                video_description = desc_text
+                print(f"📝 Descripción encontrada con selector: {selector}")
             
             # Si aún no encontramos descripción, intentar con JavaScript
             if video_description == "Descripción no disponible":
@@ -666,6 +593,7 @@ class YouTubeCommentScraperChrome:
             if self.driver:
                 log_info(f"Browser cerrado")
                 self.driver.quit()
+            selector_registry.save()
     
     
 
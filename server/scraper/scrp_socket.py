@@ -1,23 +1,36 @@
 import os
 import time
 import re
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
 import emoji
 from collections import Counter
 import json
 from server.core.print_dev import log_info, log_error, log_warning, log_debug
 import asyncio
-import threading
 from server.scraper.progress_manager import progress_manager
+from server.scraper.browser_pool import create_chrome_driver, get_browser_pool
+from server.scraper.dom_extract import (
+    EXTRACT_THREADS_JS, EXPAND_REPLIES_JS, MORE_REPLIES_JS, PENDING_REPLIES_JS, COUNT_THREADS_JS,
+    SCROLL_TO_CONTINUATION_JS, SORT_NEWEST_JS, PAGE_METADATA_JS, build_thread, parse_count
+)
+from server.scraper.incremental import IncrementalTracker
+from server.scraper.selector_registry import selector_registry
+from server.scraper.network_capture import NetworkCapture
+from server.scraper.yt_parser import (
+    parse_next_response, build_threads, extract_video_id, extract_json_var, parse_video_metadata
+)
+from server.scraper.http_fetcher import HttpCommentFetcher
+from server.scraper.scrape_cache import scrape_cache
+from server.scraper.resource_blocking import apply_blocking, blocked_patterns
+from server.scraper.process_pool import get_scraper_processes, ScraperPoolUnavailable
+from server.core.config import setting
 
 class YouTubeCommentScraperChrome:
-    def __init__(self, headless=True, progress_callback=None, session_id=None):
+    def __init__(self, headless=True, progress_callback=None, session_id=None, browser_pool=None,
+                 extraction_mode=None, thread_callback=None, incremental=None, deadline=None):
         """
         Inicializa el scraper de comentarios de YouTube para Docker con Chrome
         
@@ -25,14 +38,58 @@ class YouTubeCommentScraperChrome:
             headless (bool): Si True, ejecuta el navegador en modo sin interfaz gráfica
             progress_callback (function): Función opcional para reportar progreso
             session_id (str): ID de sesión para WebSocket
+            browser_pool (BrowserPool): Pool de navegadores precalentados (None = Chrome propio)
+            extraction_mode (str): 'bulk' (un execute_script por lote), 'network' (JSON de youtubei/v1/next)
+                o 'elements' (find_element por campo)
+            thread_callback (function): Función opcional que recibe cada lote de hilos extraídos
+                mientras el scraping continúa (en modo 'bulk' se extrae durante el scroll)
+            incremental (IncrementalTracker): Re-scraping incremental; solo se devuelven los hilos
+                que no estaban guardados y, en modo 'bulk', se para tras una racha de conocidos
+            deadline (Deadline): Plazo del scraping; al agotarse se deja de cargar y se devuelve
+                lo extraído hasta entonces con `partial=True`
         """
         self.driver = None
+        self.browser_pool = browser_pool
+        self.pooled_browser = None
+        self.browser_tab = None
+        self.extraction_mode = extraction_mode or setting.scraper_extraction_mode
+        self.scroll_stats = {}
+        self.network_capture = None
         self.headless = headless
         self.comments_data = []
         self.emoji_counter = Counter()
         self.progress_callback = progress_callback
         self.session_id = session_id
+        self.thread_callback = thread_callback
+        self.incremental = incremental
+        self.threads_extracted = 0
+        self.threads_emitted = 0
+        self.metadata_source = None
+        self.deadline = deadline
+        self.deadline_hit = False
         
+    def _deadline_expired(self):
+        """True (y se recuerda para marcar el resultado como parcial) si el plazo se agotó o se canceló"""
+        if self.deadline and self.deadline.expired():
+            if not self.deadline_hit:
+                if self.deadline.cancelled:
+                    log_warning(f"🛑 Scraping cancelado ({self.deadline.cancel_reason}): se libera el navegador")
+                else:
+                    log_warning("⏰ Plazo de scraping agotado: se devuelve lo extraído hasta ahora (resultado parcial)")
+            self.deadline_hit = True
+        return self.deadline_hit
+    
+    def _cancelled(self):
+        """True si el trabajo se canceló (cliente desconectado o cancelación explícita)"""
+        return bool(self.deadline and self.deadline.cancelled)
+    
+    def _stop_reason(self):
+        return 'cancelled' if self._cancelled() else 'deadline'
+    
+    def _bounded(self, timeout):
+        """Timeout de una espera acotado a lo que queda del plazo"""
+        return self.deadline.timeout(timeout) if self.deadline else timeout
+    
     def emit_progress(self, percentage, message):
         """Emitir progreso tanto por callback como por WebSocket (VERSIÓN SÍNCRONA)"""
         log_info(f"📊 [{percentage}%] {message}")  # Log en consola
@@ -41,89 +98,55 @@ class YouTubeCommentScraperChrome:
         if self.progress_callback:
             self.progress_callback(percentage, message)
         
-        # WebSocket para frontend (ejecutado en hilo separado para no bloquear)
+        # WebSocket para frontend: se publica en el loop principal sin bloquear el scraping
         if self.session_id:
-            try:
-                # Ejecutar en un hilo separado para mantener sincronía
-                def send_to_websocket():
-                    try:
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        loop.run_until_complete(
-                            progress_manager.send_progress(self.session_id, percentage, message)
-                        )
-                        loop.close()
-                    except Exception as e:
-                        log_info(f"⚠️ Error enviando progreso por WebSocket: {e}")
-                
-                thread = threading.Thread(target=send_to_websocket, daemon=True)
-                thread.start()
-                
-            except Exception as e:
-                log_info(f"⚠️ Error configurando WebSocket: {e}")
+            progress_manager.post_progress(self.session_id, percentage, message)
     
     def setup_driver(self):
         """Configurar Chrome Driver (VERSIÓN SÍNCRONA)"""
+        # Los navegadores del pool solo llevan el performance log con SCRAPER_EXTRACTION_MODE=network
+        network_log = self.extraction_mode == "network"
+        use_pool = self.browser_pool and (not network_log or setting.scraper_extraction_mode == "network")
+
+        # Pestaña en un navegador compartido (la captura de red lee el log de todo el navegador: sin pestañas)
+        if use_pool and self.browser_pool.max_tabs > 1 and not network_log:
+            self.emit_progress(5, "♻️ Pidiendo pestaña al pool...")
+            self.browser_tab = self.browser_pool.acquire_tab()
+            self.driver = self.browser_tab.driver
+            log_info(f"🗂️ Usando pestaña {self.browser_tab.id} del navegador {self.browser_tab.browser.id}")
+            self.emit_progress(15, "✅ Pestaña del pool lista")
+            return
+
+        if use_pool:
+            self.emit_progress(5, "♻️ Pidiendo navegador al pool...")
+            self.pooled_browser = self.browser_pool.acquire()
+            self.driver = self.pooled_browser.driver
+            log_info(f"♻️ Usando navegador {self.pooled_browser.id} del pool (uso {self.pooled_browser.uses})")
+            self.emit_progress(15, "✅ Navegador del pool listo")
+            return
+
         self.emit_progress(5, "🐳 Configurando Chrome para Docker...")
-        chrome_options = Options()
-        
-        # Configuraciones obligatorias para Docker
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-plugins")
-        chrome_options.add_argument("--disable-images")
-        chrome_options.add_argument("--disable-web-security")
-        chrome_options.add_argument("--allow-running-insecure-content")
-        chrome_options.add_argument("--disable-webgl")
-        chrome_options.add_argument("--disable-features=VizDisplayCompositor")
-        
-        # User agent
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-        
-        # Configuraciones adicionales para estabilidad
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        try:
-            log_info("🐳 Configurando Chrome para Docker...")
-            
-            # Intentar primero con ChromeDriverManager
-            try:
-                self.emit_progress(10, "🔧 Instalando ChromeDriver automático...")
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                log_info("✅ ChromeDriver automático configurado en Docker")
-                self.emit_progress(15, "✅ ChromeDriver automático configurado")
-                
-                # Configurar script para evitar detección
-                self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-                return
-                
-            except Exception as e:
-                log_error("❌ ChormeDriverManager falló: " + str(e))
-            
-            # Intentar con Chrome del sistema
-            try:
-                self.driver = webdriver.Chrome(options=chrome_options)
-                log_info("✅ Chrome del sistema configurado en Docker")
-                self.emit_progress(15, "✅ Chrome del sistema configurado")
-                
-                # Configurar script para evitar detección
-                self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-                return
-                
-            except Exception as e:
-                log_error("❌ Chrome del sistema falló: " + str(e))
-            
-            raise Exception("No se pudo configurar Chrome en Docker")
-            
-        except Exception as e:
-            raise Exception(f"Error configurando Chrome en Docker: {e}")
-    
+        log_info("🐳 Configurando Chrome para Docker...")
+        self.driver = create_chrome_driver(self.headless, network_log)
+        log_info("✅ Chrome configurado en Docker")
+        self.emit_progress(15, "✅ Chrome configurado")
+
+    def release_driver(self, failed=False):
+        """Devolver el navegador al pool (o cerrarlo si no viene del pool)"""
+        if self.browser_tab:
+            if failed:
+                self.browser_tab.mark_failed()
+            self.browser_pool.release_tab(self.browser_tab)
+            self.browser_tab = None
+        elif self.pooled_browser:
+            if failed:
+                self.pooled_browser.mark_failed()
+            self.browser_pool.release(self.pooled_browser)
+            self.pooled_browser = None
+        elif self.driver:
+            self.driver.quit()
+        self.driver = None
+
     def extract_emojis(self, text):
 
         emojis_found = []
@@ -134,178 +157,183 @@ class YouTubeCommentScraperChrome:
         return emojis_found
     
     def scroll_to_load_comments(self, max_comments=100):
-        """Cargar comentarios con scroll (VERSIÓN SÍNCRONA)"""
+        """
+        Cargar comentarios con scroll guiado por el DOM (VERSIÓN SÍNCRONA)
+        
+        Cada paso hace scroll hasta el spinner de continuación y espera, con un
+        timeout corto, a que aumente el número de hilos. Se para en cuanto hay
+        `max_comments` hilos o dejan de llegar nuevos.
+        """
         self.emit_progress(20, f"📜 Cargando comentarios... (máximo {max_comments})")
         log_info(f"📜 Cargando comentarios... (máximo {max_comments})")
+        stats = {'scrolls': 0, 'wait_seconds': 0.0, 'threads_loaded': 0, 'stop_reason': None}
+        self.scroll_stats = stats
         
-        # ✅ SCROLL MÁS AGRESIVO Y DEBUG
-        for i in range(5):
-            scroll_position = 800 + (i * 400)
-            self.driver.execute_script(f"window.scrollTo(0, {scroll_position});")
-            time.sleep(2)
-            log_info(f"🔄 Scroll {i+1}/5 a posición {scroll_position}")
-        
-        # ✅ BUSCAR COMENTARIOS CON MÚLTIPLES SELECTORES
-        comment_selectors = [
-            "ytd-comment-thread-renderer",
-            ".ytd-comment-thread-renderer", 
-            "#comments ytd-comment-thread-renderer",
-            "ytd-comments #comments ytd-comment-thread-renderer",
-            "[id*='comment-thread']",
-            ".comment-thread",
-            "#comment-section ytd-comment-thread-renderer"
-        ]
+        # Esperar a que aparezcan los primeros hilos (YouTube carga la sección al acercarse)
+        count = 0
+        wait_until = time.monotonic() + setting.scraper_comments_timeout
+        while count == 0 and time.monotonic() < wait_until and not self._deadline_expired():
+            self.driver.execute_script(SCROLL_TO_CONTINUATION_JS)
+            stats['scrolls'] += 1
+            count = self._wait_for_threads(0, setting.scraper_scroll_step_timeout)
         
-        comments_found = 0
-        working_selector = None
+        if count == 0:
+            stats['stop_reason'] = self._stop_reason() if self.deadline_hit else 'no_comments'
+            stats['wait_seconds'] = round(stats['wait_seconds'], 2)
+            self._diagnose_missing_comments()
+            return stats
         
-        for selector in comment_selectors:
-            try:
-                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                log_info(f"🔍 Selector '{selector}': encontró {len(elements)} elementos")
-                if elements:
-                    comments_found = len(elements)
-                    working_selector = selector
-                    log_info(f"✅ Usando selector: {selector}")
-                    break
-            except Exception as e:
-                log_info(f"❌ Error con selector {selector}: {e}")
+        log_info(f"🎯 Encontrados {count} comentarios iniciales, continuando con scroll...")
+        if self.incremental:
+            count = self._sort_newest_first()
+        self._stream_loaded_threads(count, max_comments)
+        stale_steps = 0
+        while count < max_comments:
+            if self.incremental and self.incremental.stopped:
+                stats['stop_reason'] = 'known_comments'
+                break
+            if self._deadline_expired():
+                stats['stop_reason'] = self._stop_reason()
+                break
+            state = self.driver.execute_script(SCROLL_TO_CONTINUATION_JS)
+            stats['scrolls'] += 1
+            new_count = self._wait_for_threads(count, setting.scraper_scroll_step_timeout)
+            if self.network_capture:
+                self.network_capture.poll()
+            
+            if new_count > count:
+                count = new_count
+                stale_steps = 0
+                progress = 60 + (10 * min(count / max_comments, 1))
+                self.emit_progress(int(progress), f"📝 Comentarios cargados: {count}")
+                log_info(f"📝 Comentarios cargados: {count}")
+                self._stream_loaded_threads(count, max_comments)
+                continue
+            
+            stale_steps += 1
+            if not state.get('has_continuation') or stale_steps >= setting.scraper_scroll_max_stale:
+                stats['stop_reason'] = 'exhausted'
+                break
+        else:
+            stats['stop_reason'] = 'max_comments'
         
-        # ✅ DEBUG ADICIONAL SI NO ENCUENTRA COMENTARIOS
-        if comments_found == 0:
-            log_info("⚠️ No se encontraron comentarios con ningún selector")
-            
-            # Verificar si la sección de comentarios existe
-            try:
-                comments_section = self.driver.find_element(By.CSS_SELECTOR, "#comments")
-                log_info("📍 ✅ Sección de comentarios (#comments) encontrada")
-            except:
-                log_info("📍 ❌ Sección de comentarios (#comments) NO encontrada")
-            
-            try:
-                ytd_comments = self.driver.find_element(By.CSS_SELECTOR, "ytd-comments")
-                log_info("📍 ✅ Elemento ytd-comments encontrado")
-            except:
-                log_info("📍 ❌ Elemento ytd-comments NO encontrado")
-            
-            # Verificar si los comentarios están deshabilitados
-            try:
-                page_source = self.driver.page_source
-    
-                # ✅ VERIFICACIÓN MÁS ESPECÍFICA
-                comments_disabled_phrases = [
-                    "comments are turned off",
-                    "comentarios están desactivados", 
-                    "comments are disabled",
-                    "comment section is disabled",
-                    "commenting has been disabled",
-                    "comments on this video have been disabled"
-                ]
-                
-                # Verificar si REALMENTE están deshabilitados (verificación estricta)
-                actually_disabled = False
-                for phrase in comments_disabled_phrases:
-                    if phrase in page_source.lower():
-                        # Verificar que no sea parte de otro texto
-                        context_start = max(0, page_source.lower().find(phrase) - 50)
-                        context_end = min(len(page_source), page_source.lower().find(phrase) + len(phrase) + 50)
-                        context = page_source[context_start:context_end].lower()
-                        
-                        # Si aparece en un contexto que indica que están realmente deshabilitados
-                        if ("section" in context or "video" in context or "turn" in context):
-                            actually_disabled = True
-                            log_info(f"🚫 ❌ Los comentarios están REALMENTE DESHABILITADOS: '{phrase}'")
-                            log_info(f"📄 Contexto: {context}")
-                            break
-                
-                if not actually_disabled:
-                    if "comment" in page_source.lower():
-                        log_info("💭 ✅ La palabra 'comment' aparece en la página")
-                        comment_count = page_source.lower().count("comment")
-                        log_info(f"📊 'comment' aparece {comment_count} veces en el HTML")
-                        
-                        # ✅ INTENTAR FORZAR CARGA DE COMENTARIOS
-                        log_info("🔄 Intentando forzar carga de comentarios...")
-                        
-                        # Scroll más agresivo a la sección de comentarios
-                        try:
-                            # Buscar la sección de comentarios y hacer scroll hasta ella
-                            comments_section = self.driver.find_element(By.CSS_SELECTOR, "#comments")
-                            self.driver.execute_script("arguments[0].scrollIntoView(true);", comments_section)
-                            time.sleep(3)
-                            log_info("📍 ✅ Scroll hasta sección de comentarios")
-                            
-                            # Scroll adicional para cargar comentarios
-                            for i in range(5):
-                                scroll_position = 1000 + (i * 500)
-                                self.driver.execute_script(f"window.scrollTo(0, {scroll_position});")
-                                time.sleep(2)
-                                
-                                # Verificar si aparecieron comentarios
-                                new_comments = len(self.driver.find_elements(By.CSS_SELECTOR, "ytd-comment-thread-renderer"))
-                                if new_comments > 0:
-                                    log_info(f"🎉 ¡Comentarios encontrados después del scroll {i+1}! ({new_comments} comentarios)")
-                                    comments_found = new_comments
-                                    working_selector = "ytd-comment-thread-renderer"
-                                    break
-                                else:
-                                    log_info(f"⏳ Scroll {i+1}/5 - Aún sin comentarios...")
-                        
-                        except Exception as e:
-                            log_info(f"❌ Error en scroll forzado: {e}")
-                else:
-                    log_info("🚫 ❌ Los comentarios están DESHABILITADOS en este video")
-            
-            except Exception as e:
-                log_info(f"❌ Error verificando HTML: {e}")
-            
-            # Intentar hacer screenshot para debug
+        stats['threads_loaded'] = count
+        stats['wait_seconds'] = round(stats['wait_seconds'], 2)
+        self.emit_progress(70, f"🔚 Carga completada con {count} comentarios")
+        log_info(f"🔚 Carga completada: {count} hilos, {stats['scrolls']} scrolls, "
+                 f"{stats['wait_seconds']}s esperando ({stats['stop_reason']})")
+        return stats
+    
+    def _sort_newest_first(self):
+        """Ordenar por 'más recientes primero' (re-scraping incremental); devuelve los hilos cargados"""
+        try:
+            sorted_newest = self.driver.execute_script(SORT_NEWEST_JS)
+        except Exception as e:
+            log_info(f"⚠️ Error cambiando el orden de comentarios: {e}")
+            sorted_newest = False
+        
+        if not sorted_newest:
+            log_warning("⚠️ No se pudo ordenar por más recientes: se recorren todos y se filtran los conocidos")
+            self.incremental.allow_stop = False
+            return self.driver.execute_script(COUNT_THREADS_JS) or 0
+        
+        self.incremental.sorted_newest = True
+        log_info("🆕 Comentarios ordenados por más recientes")
+        # La lista se vacía y se vuelve a llenar con el nuevo orden
+        try:
+            WebDriverWait(self.driver, 2, poll_frequency=0.1).until(
+                lambda driver: driver.execute_script(COUNT_THREADS_JS) == 0
+            )
+        except Exception:
+            pass
+        return self._wait_for_threads(0, setting.scraper_comments_timeout)
+    
+    def _is_new_thread(self, thread):
+        """En re-scraping incremental, False si el hilo ya estaba guardado"""
+        return self.incremental is None or self.incremental.is_new(thread['author'], thread['comment'])
+    
+    def _stream_loaded_threads(self, count, max_comments):
+        """
+        En modo 'bulk' con thread_callback o incremental, extraer los hilos recién
+        cargados sin esperar al final (para entregarlos o para detectar la racha de conocidos)
+        """
+        if (self.thread_callback or self.incremental) and self.extraction_mode == "bulk":
+            self.extract_threads_range(self.threads_extracted, min(count, max_comments))
+            self.emit_threads()
+    
+    def emit_threads(self):
+        """Entregar a thread_callback los hilos extraídos que aún no se han entregado"""
+        batch = self.comments_data[self.threads_emitted:]
+        self.threads_emitted = len(self.comments_data)
+        # Cancelado: nadie espera su análisis
+        if batch and self.thread_callback and not self._cancelled():
             try:
-                self.driver.save_screenshot("debug_no_comments.png")
-                log_info("📸 Screenshot guardado como debug_no_comments.png")
+                self.thread_callback(batch)
             except Exception as e:
-                log_info(f"❌ Error guardando screenshot: {e}")
-            
-            return  # Salir si no hay comentarios
+                log_warning(f"⚠️ Error entregando lote de {len(batch)} hilos: {e}")
+    
+    def _wait_for_threads(self, previous, timeout):
+        """Esperar a que haya más de `previous` hilos; devuelve el número de hilos actual"""
+        def more_threads(driver):
+            count = driver.execute_script(COUNT_THREADS_JS)
+            return count if count > previous else False
         
-        # ✅ CONTINUAR CON SCROLL SI ENCONTRAMOS COMENTARIOS
-        log_info(f"🎯 Encontrados {comments_found} comentarios iniciales, continuando con scroll...")
+        started = time.monotonic()
+        try:
+            return WebDriverWait(self.driver, self._bounded(timeout), poll_frequency=0.25).until(more_threads)
+        except Exception:
+            return self.driver.execute_script(COUNT_THREADS_JS) or 0
+        finally:
+            self.scroll_stats['wait_seconds'] += time.monotonic() - started
+    
+    def _diagnose_missing_comments(self):
+        """Registrar por qué no aparecen comentarios (sección ausente o comentarios desactivados)"""
+        log_info("⚠️ No se encontraron comentarios")
         
-        last_height = self.driver.execute_script("return document.documentElement.scrollHeight")
-        comments_loaded = comments_found
-        scroll_attempts = 0
-        max_scroll_attempts = 5  # Reducir intentos
+        try:
+            self.driver.find_element(By.CSS_SELECTOR, "#comments")
+            log_info("📍 ✅ Sección de comentarios (#comments) encontrada")
+        except:
+            log_info("📍 ❌ Sección de comentarios (#comments) NO encontrada")
         
-        while comments_loaded < max_comments and scroll_attempts < max_scroll_attempts:
-            # Scroll hacia abajo
-            self.driver.execute_script("window.scrollTo(0, document.documentElement.scrollHeight);")
-            time.sleep(3)
-            
-            # Usar el selector que funcionó
-            current_comments = len(self.driver.find_elements(By.CSS_SELECTOR, working_selector))
-            
-            if current_comments > comments_loaded:
-                comments_loaded = current_comments
-                progress = 60 + (10 * min(comments_loaded / max_comments, 1))
-                self.emit_progress(int(progress), f"📝 Comentarios cargados: {comments_loaded}")
-                log_info(f"📝 Comentarios cargados: {comments_loaded}")
-                scroll_attempts = 0
-            else:
-                scroll_attempts += 1
-                log_info(f"⏳ Intento de scroll {scroll_attempts}/{max_scroll_attempts}")
-            
-            # Verificar si la página sigue creciendo
-            new_height = self.driver.execute_script("return document.documentElement.scrollHeight")
-            if new_height == last_height and comments_loaded >= 1:
-                self.emit_progress(70, f"🔚 Carga completada con {comments_loaded} comentarios")
-                log_info(f"🔚 Altura de página estabilizada en {comments_loaded} comentarios")
-                break
-            last_height = new_height
+        try:
+            page_source = self.driver.page_source.lower()
+            comments_disabled_phrases = [
+                "comments are turned off",
+                "comentarios están desactivados", 
+                "comments are disabled",
+                "comment section is disabled",
+                "commenting has been disabled",
+                "comments on this video have been disabled"
+            ]
             
-            if comments_loaded >= max_comments:
-                log_info(f"🎯 Objetivo alcanzado: {comments_loaded} comentarios")
-                break
+            for phrase in comments_disabled_phrases:
+                position = page_source.find(phrase)
+                if position == -1:
+                    continue
+                # Verificar que no sea parte de otro texto
+                context = page_source[max(0, position - 50):position + len(phrase) + 50]
+                if ("section" in context or "video" in context or "turn" in context):
+                    log_info(f"🚫 ❌ Los comentarios están REALMENTE DESHABILITADOS: '{phrase}'")
+                    log_info(f"📄 Contexto: {context}")
+                    break
+        except Exception as e:
+            log_info(f"❌ Error verificando HTML: {e}")
+        
+        # Intentar hacer screenshot para debug
+        try:
+            self.driver.save_screenshot("debug_no_comments.png")
+            log_info("📸 Screenshot guardado como debug_no_comments.png")
+        except Exception as e:
+            log_info(f"❌ Error guardando screenshot: {e}")
     
+    def _find_text(self, element, field, selectors, default):
+        """Texto del primer selector que encuentre elemento (el último que funcionó se prueba primero)"""
+        text, _ = selector_registry.find(
+            field, selectors, lambda selector: element.find_element(By.CSS_SELECTOR, selector).text.strip()
+        )
+        return default if text is None else text
+
     def extract_comment_data(self, comment_element):
 
         try:
@@ -316,15 +344,7 @@ class YouTubeCommentScraperChrome:
                 "a#author-text",
                 "[id*='author-text']"
             ]
-            
-            author = "Autor desconocido"
-            for selector in author_selectors:
-                try:
-                    author_element = comment_element.find_element(By.CSS_SELECTOR, selector)
-                    author = author_element.text.strip()
-                    break
-                except:
-                    continue
+            author = self._find_text(comment_element, "comment_author", author_selectors, "Autor desconocido")
             
             # Contenido del comentario
             content_selectors = [
@@ -333,56 +353,23 @@ class YouTubeCommentScraperChrome:
                 "#comment-content #content-text",
                 "[id*='content-text']"
             ]
-            
-            content = "Contenido no disponible"
-            for selector in content_selectors:
-                try:
-                    content_element = comment_element.find_element(By.CSS_SELECTOR, selector)
-                    content = content_element.text.strip()
-                    break
-                except:
-                    continue
+            content = self._find_text(comment_element, "comment_content", content_selectors, "Contenido no disponible")
             
             # Likes del comentario
-            likes = 0
             like_selectors = [
                 "#vote-count-middle",
                 ".ytd-comment-action-buttons-renderer #vote-count-middle",
                 "[id*='vote-count']"
             ]
-            
-            for selector in like_selectors:
-                try:
-                    like_element = comment_element.find_element(By.CSS_SELECTOR, selector)
-                    likes_text = like_element.text.strip()
-                    
-                    if likes_text == '':
-                        likes = 0
-                    elif 'K' in likes_text:
-                        likes = int(float(likes_text.replace('K', '')) * 1000)
-                    elif 'M' in likes_text:
-                        likes = int(float(likes_text.replace('M', '')) * 1000000)
-                    else:
-                        likes = int(likes_text) if likes_text.isdigit() else 0
-                    break
-                except:
-                    continue
+            likes = parse_count(self._find_text(comment_element, "comment_likes", like_selectors, ""))
             
             # Tiempo del comentario
-            published_time = "Desconocido"
             time_selectors = [
                 ".published-time-text",
                 "[class*='published-time']",
                 "a[href*='lc=']"
             ]
-            
-            for selector in time_selectors:
-                try:
-                    time_element = comment_element.find_element(By.CSS_SELECTOR, selector)
-                    published_time = time_element.text.strip()
-                    break
-                except:
-                    continue
+            published_time = self._find_text(comment_element, "comment_time", time_selectors, "Desconocido")
             
             # Extraer emojis
             emojis = self.extract_emojis(content)
@@ -411,87 +398,80 @@ class YouTubeCommentScraperChrome:
                 "#replies-button"
             ]
             
-            for selector in reply_selectors:
+            def replies_button_lookup(selector):
+                # Solo cuenta como acierto si el botón es de respuestas
+                button = comment_element.find_element(By.CSS_SELECTOR, selector)
+                label = f"{button.text} {button.get_attribute('aria-label') or ''}".lower()
+                return button if ("respuesta" in label or "reply" in label or "replies" in label) else None
+            
+            replies_button, _ = selector_registry.find("comment_replies_button", reply_selectors, replies_button_lookup)
+            
+            if replies_button is not None:
+                button_text = replies_button.text.strip()
+                aria_label = replies_button.get_attribute('aria-label') or ''
+                has_replies = True
+                
+                # Extraer número de respuestas del texto
+                numbers = re.findall(r'\d+', button_text + ' ' + aria_label)
+                if numbers:
+                    replies_count = int(numbers[0])
+                
+                log_info(f"🔄 Encontrado botón de respuestas: '{button_text}' con {replies_count} respuestas")
+                
+                # Hacer clic para expandir respuestas
                 try:
-                    replies_button = comment_element.find_element(By.CSS_SELECTOR, selector)
-                    button_text = replies_button.text.strip()
-                    aria_label = replies_button.get_attribute('aria-label') or ''
+                    # Scroll al elemento antes de hacer clic
+                    self.driver.execute_script("arguments[0].scrollIntoView(true);", replies_button)
+                    time.sleep(1)
+                    
+                    # Hacer clic con JavaScript para mayor confiabilidad
+                    self.driver.execute_script("arguments[0].click();", replies_button)
+                    time.sleep(3)  # Esperar más tiempo para que se carguen las respuestas
+                    
+                    # Buscar respuestas con múltiples selectores más específicos
+                    reply_container_selectors = [
+                        "#replies",
+                        "ytd-comment-replies-renderer",
+                        ".ytd-comment-replies-renderer",
+                        "#expander-contents"
+                    ]
+                    reply_item_selectors = [
+                        "ytd-comment-view-model",
+                        ".ytd-comment-view-model", 
+                        "ytd-comment-renderer",
+                        ".ytd-comment-renderer",
+                        "#comment",
+                        ".comment"
+                    ]
+                    
+                    def reply_items_lookup(container_selector):
+                        container = comment_element.find_element(By.CSS_SELECTOR, container_selector)
+                        items, _ = selector_registry.find(
+                            "reply_item", reply_item_selectors,
+                            lambda selector: container.find_elements(By.CSS_SELECTOR, selector) or None
+                        )
+                        return items
+                    
+                    reply_elements, container_selector = selector_registry.find(
+                        "reply_container", reply_container_selectors, reply_items_lookup
+                    )
+                    reply_elements = reply_elements or []
+                    if reply_elements:
+                        log_info(f"✅ Encontradas respuestas con selector: {container_selector}")
+                    
+                    log_info(f"💬 Encontradas {len(reply_elements)} respuestas para procesar")
+                    
+                    valid_replies_count = 0
+                    for reply_elem in reply_elements[:8]:  # Limitar a 8 respuestas por comentario
+                        reply_data = self.extract_reply_data(reply_elem)
+                        if reply_data:  # Solo agregar si los datos son válidos
+                            replies_data.append(reply_data)
+                            valid_replies_count += 1
+                    
+                    log_info(f"✅ Procesadas {valid_replies_count} respuestas válidas de {len(reply_elements[:8])} intentadas")
                     
-                    # Verificar si es botón de respuestas
-                    if (("respuesta" in button_text.lower() or "reply" in button_text.lower() or "replies" in button_text.lower()) or
-                        ("respuesta" in aria_label.lower() or "reply" in aria_label.lower() or "replies" in aria_label.lower())):
-                        
-                        has_replies = True
-                        
-                        # Extraer número de respuestas del texto
-                        numbers = re.findall(r'\d+', button_text + ' ' + aria_label)
-                        if numbers:
-                            replies_count = int(numbers[0])
-                        
-                        log_info(f"🔄 Encontrado botón de respuestas: '{button_text}' con {replies_count} respuestas")
-                        
-                        # Hacer clic para expandir respuestas
-                        try:
-                            # Scroll al elemento antes de hacer clic
-                            self.driver.execute_script("arguments[0].scrollIntoView(true);", replies_button)
-                            time.sleep(1)
-                            
-                            # Hacer clic con JavaScript para mayor confiabilidad
-                            self.driver.execute_script("arguments[0].click();", replies_button)
-                            time.sleep(3)  # Esperar más tiempo para que se carguen las respuestas
-                            
-                            # Buscar respuestas con múltiples selectores más específicos
-                            reply_container_selectors = [
-                                "#replies",
-                                "ytd-comment-replies-renderer",
-                                ".ytd-comment-replies-renderer",
-                                "#expander-contents"
-                            ]
-                            
-                            reply_elements = []
-                            for container_selector in reply_container_selectors:
-                                try:
-                                    container = comment_element.find_element(By.CSS_SELECTOR, container_selector)
-                                    # Intentar múltiples selectores para encontrar respuestas individuales
-                                    reply_selectors_inner = [
-                                        "ytd-comment-view-model",
-                                        ".ytd-comment-view-model", 
-                                        "ytd-comment-renderer",
-                                        ".ytd-comment-renderer",
-                                        "#comment",
-                                        ".comment"
-                                    ]
-                                    
-                                    for reply_selector in reply_selectors_inner:
-                                        reply_elements = container.find_elements(By.CSS_SELECTOR, reply_selector)
-                                        if reply_elements:
-                                            log_info(f"✅ Encontradas respuestas con selector: {container_selector} > {reply_selector}")
-                                            break
-                                    
-                                    if reply_elements:
-                                        break
-                                except Exception as inner_e:
-                                    log_info(f"Error con contenedor {container_selector}: {inner_e}")
-                                    continue
-                            
-                            log_info(f"💬 Encontradas {len(reply_elements)} respuestas para procesar")
-                            
-                            valid_replies_count = 0
-                            for reply_elem in reply_elements[:8]:  # Limitar a 8 respuestas por comentario
-                                reply_data = self.extract_reply_data(reply_elem)
-                                if reply_data:  # Solo agregar si los datos son válidos
-                                    replies_data.append(reply_data)
-                                    valid_replies_count += 1
-                            
-                            log_info(f"✅ Procesadas {valid_replies_count} respuestas válidas de {len(reply_elements[:8])} intentadas")
-                            
-                        except Exception as e:
-                            log_info(f"⚠️ Error expandiendo respuestas: {e}")
-                        
-                        break
-                        
                 except Exception as e:
-                    continue
+                    log_info(f"⚠️ Error expandiendo respuestas: {e}")
             
             return {
                 'author': author,
@@ -521,16 +501,7 @@ class YouTubeCommentScraperChrome:
                 "[id*='author-text']",
                 "a[href*='@']"
             ]
-            
-            author = "Autor desconocido"
-            for selector in author_selectors:
-                try:
-                    author_element = reply_element.find_element(By.CSS_SELECTOR, selector)
-                    author = author_element.text.strip()
-
-                    break
-                except:
-                    continue
+            author = self._find_text(reply_element, "reply_author", author_selectors, "Autor desconocido")
             
             # Contenido de la respuesta
             content_selectors = [
@@ -540,41 +511,16 @@ class YouTubeCommentScraperChrome:
                 "[id*='content-text']",
                 ".comment-text"
             ]
-            
-            content = "Contenido no disponible"
-            for selector in content_selectors:
-                try:
-                    content_element = reply_element.find_element(By.CSS_SELECTOR, selector)
-                    content = content_element.text.strip()
-                    break
-                except:
-                    continue
+            content = self._find_text(reply_element, "reply_content", content_selectors, "Contenido no disponible")
             
             # Likes de la respuesta
-            likes = 0
             like_selectors = [
                 "#vote-count-middle",
                 ".ytd-comment-action-buttons-renderer #vote-count-middle",
                 "[id*='vote-count']",
                 ".vote-count-middle"
             ]
-            
-            for selector in like_selectors:
-                try:
-                    like_element = reply_element.find_element(By.CSS_SELECTOR, selector)
-                    likes_text = like_element.text.strip()
-                    
-                    if likes_text == '':
-                        likes = 0
-                    elif 'K' in likes_text:
-                        likes = int(float(likes_text.replace('K', '')) * 1000)
-                    elif 'M' in likes_text:
-                        likes = int(float(likes_text.replace('M', '')) * 1000000)
-                    else:
-                        likes = int(likes_text) if likes_text.isdigit() else 0
-                    break
-                except:
-                    continue
+            likes = parse_count(self._find_text(reply_element, "reply_likes", like_selectors, ""))
             
             # Extraer emojis de la respuesta
             emojis = self.extract_emojis(content)
@@ -599,196 +545,441 @@ class YouTubeCommentScraperChrome:
             log_error("❌ Error extrayendo respuesta: " + str(e))
             return None
     
-    def scrape_video_comments(self, video_url, max_comments=50):
-        """Scrape los comentarios de un video de YouTube (VERSIÓN SÍNCRONA CON WEBSOCKET)"""
-        self.emit_progress(0, "🚀 Iniciando análisis de YouTube...")
+    def extract_comments_elements(self, max_comments):
+        """Extraer comentarios elemento a elemento con find_element (modo 'elements')"""
+        comment_elements = self.driver.find_elements(By.CSS_SELECTOR, "ytd-comment-thread-renderer")
+        total_elements = min(len(comment_elements), max_comments)
+        self.emit_progress(80, f"📝 Encontrados {len(comment_elements)} comentarios, procesando {total_elements}...")
+        log_info(f"🔍 Procesando {len(comment_elements)} comentarios...")
         
-        try:
-            self.emit_progress(10, "🚀 Iniciando proceso de scraping...")
-            self.setup_driver()
-            self.emit_progress(20, f"🌐 Accediendo a: {video_url}")
-            log_info(f"🌐 Accediendo a: {video_url}")
-            
-            # Cargar la página del video
-            self.driver.get(video_url)
-            self.emit_progress(25, "📖 Página cargada, extrayendo metadatos...")
-            
-            # Esperar a que la página cargue
-            wait = WebDriverWait(self.driver, 30)
-            
-            # Obtener título del video
-            self.emit_progress(30, "🎬 Extrayendo título del video...")
-            video_title = "Título no disponible"
-            title_selectors = [
-                "h1.ytd-watch-metadata",
-                "h1.ytd-video-primary-info-renderer", 
-                "h1[class*='title']",
-                "h1 yt-formatted-string",
-                "#title h1"
-            ]
+        for i, comment_element in enumerate(comment_elements[:max_comments]):
+            if self._cancelled():
+                break
+            comment_data = self.extract_comment_data(comment_element)
+            if comment_data and self._is_new_thread(comment_data):
+                self.comments_data.append(comment_data)
+                
+            if (i + 1) % 3 == 0:
+                log_info(f"✅ Procesados {i + 1} comentarios...")
             
-            for selector in title_selectors:
-                try:
-                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-                    video_title = self.driver.find_element(By.CSS_SELECTOR, selector).text
+            # Actualizar progreso cada 5 comentarios para la web
+            if (i + 1) % 5 == 0 or i == total_elements - 1:
+                progress = 80 + (15 * (i + 1) / total_elements)
+                self.emit_progress(int(progress), f"✅ Procesados {i + 1}/{total_elements} comentarios...")
+    
+    def extract_comments_bulk(self, max_comments):
+        """
+        Extraer los hilos cargados con un único execute_script (modo 'bulk').
+        
+        Primero se expanden las respuestas de todos los hilos en bloque; después
+        el script devuelve un array JSON con autor, texto, likes, fecha y
+        respuestas de cada hilo, que se parsea en Python de una pasada. Los
+        hilos ya extraídos durante el scroll (streaming) no se repiten.
+        """
+        extracted = self.extract_threads_range(self.threads_extracted, max_comments)
+        self.emit_progress(80, f"📝 Encontrados {extracted} comentarios, procesando...")
+        log_info(f"🔍 Extracción en bloque: {extracted} hilos en una llamada "
+                 f"({self.threads_extracted - extracted} extraídos durante el scroll)")
+        self.emit_progress(95, f"✅ Procesados {self.threads_extracted}/{self.threads_extracted} comentarios...")
+    
+    def extract_threads_range(self, start, end):
+        """Expandir respuestas y extraer los hilos [start, end) del DOM; devuelve cuántos se leyeron"""
+        if end <= start or self._cancelled():
+            return 0
+        self.expand_replies(end - start, start)
+        raw_threads = self.driver.execute_script(EXTRACT_THREADS_JS, start, end - start) or []
+        
+        for raw in raw_threads:
+            comment_data = build_thread(raw, self.extract_emojis, max_replies=setting.scraper_max_replies)
+            if comment_data and self._is_new_thread(comment_data):
+                self.comments_data.append(comment_data)
+            if self.incremental and self.incremental.stopped:
+                break
+        
+        self.threads_extracted = start + len(raw_threads)
+        return len(raw_threads)
+    
+    def extract_comments_network(self, max_comments):
+        """
+        Construir los hilos desde las respuestas JSON de youtubei/v1/next capturadas (modo 'network').
+        
+        Devuelve False si no se capturó ningún comentario, para caer a la extracción del DOM.
+        """
+        # Las respuestas de los hilos también llegan por youtubei/v1/next
+        self.expand_replies(max_comments)
+        self.network_capture.poll()
+        records = []
+        for response in self.network_capture.responses:
+            records.extend(parse_next_response(response)['comments'])
+        
+        threads = build_threads(records, self.extract_emojis, max_threads=max_comments,
+                                max_replies=setting.scraper_max_replies)
+        log_info(f"📡 {len(self.network_capture.responses)} respuestas capturadas, {len(threads)} hilos parseados")
+        if not threads:
+            log_warning("⚠️ Sin comentarios en las respuestas capturadas, usando extracción del DOM")
+            return False
+        
+        self.comments_data.extend(thread for thread in threads if self._is_new_thread(thread))
+        self.emit_progress(95, f"✅ Procesados {len(threads)} comentarios desde la red...")
+        return True
+    
+    def expand_replies(self, max_comments, start=0):
+        """
+        Expandir las respuestas de todos los hilos cargados en bloque.
+        
+        Un script hace clic en todos los botones de respuestas, se espera una
+        sola vez a que carguen y luego se siguen los 'mostrar más respuestas'
+        hasta `scraper_max_replies` respuestas por hilo.
+        """
+        # Sin plazo no se abren más respuestas: se extraen los hilos con las ya cargadas
+        if self._deadline_expired():
+            return 0
+        try:
+            clicked = self.driver.execute_script(EXPAND_REPLIES_JS, start, max_comments)
+            if not clicked:
+                return 0
+            log_info(f"🔄 Expandiendo respuestas de {clicked} hilos a la vez")
+            self._wait_for_replies()
+            
+            for _ in range(setting.scraper_more_replies_rounds):
+                if self._deadline_expired():
                     break
-                except:
-                    continue
-            
-            self.emit_progress(35, f"✅ Título encontrado: {video_title[:50]}...")
-            log_info(f"🎬 Video: {video_title}")
-            
-            # Extraer ID del video de la URL
-            video_id = "ID no disponible"
+                more = self.driver.execute_script(MORE_REPLIES_JS, setting.scraper_max_replies)
+                if not more:
+                    break
+                log_info(f"➕ Cargando más respuestas en {more} hilos")
+                self._wait_for_replies()
+            return clicked
+        except Exception as e:
+            log_info(f"⚠️ Error expandiendo respuestas: {e}")
+            return 0
+    
+    def _wait_for_replies(self):
+        """Esperar a que ningún hilo expandido tenga respuestas cargándose"""
+        try:
+            WebDriverWait(self.driver, self._bounded(setting.scraper_replies_timeout), poll_frequency=0.25).until(
+                lambda driver: driver.execute_script(PENDING_REPLIES_JS) == 0
+            )
+        except Exception:
+            log_info("⏳ Algunas respuestas no terminaron de cargar a tiempo")
+    
+    def build_results(self, video_id, video_url, video_title, video_description, video_author):
+        """Resultado del scraping con las estadísticas de comentarios, respuestas, likes y emojis"""
+        total_comments = len(self.comments_data)
+        total_replies = sum(len(comment['replies']) for comment in self.comments_data)
+        total_emojis = sum(comment['emoji_count'] for comment in self.comments_data)
+        total_likes = sum(comment['likes'] for comment in self.comments_data)
+        
+        # Emojis y likes de las respuestas
+        for comment in self.comments_data:
+            for reply in comment['replies']:
+                total_emojis += reply['emoji_count']
+                total_likes += reply['likes']
+        
+        return {
+            'video_id': video_id,
+            'video_url': video_url,
+            'title': video_title,
+            'description': video_description,
+            'author': video_author,
+            'total_likes': total_likes,
+            'total_comments': total_comments,
+            'emoji_stats': dict(self.emoji_counter),
+            'total_emojis': total_emojis,
+            'most_common_emojis': dict(self.emoji_counter.most_common(10)),
+            'total_threads': total_replies,
+            'threads': self.comments_data,
+            # Solo en re-scraping incremental: 'threads' contiene únicamente los hilos nuevos
+            'incremental': self.incremental.get_stats() if self.incremental else None
+        }
+    
+    def scrape_video_comments_http(self, video_url, max_comments=50):
+        """
+        Scraping sin navegador: página de watch + continuaciones de youtubei/v1/next por HTTP.
+        
+        Lanza HttpFetchError si la página no trae los datos esperados (usar Selenium como respaldo).
+        """
+        self.emit_progress(0, "🚀 Iniciando análisis de YouTube (HTTP)...")
+        page = HttpCommentFetcher().fetch(video_url, max_comments, self.extract_emojis, self.emit_progress,
+                                          thread_callback=self.thread_callback, incremental=self.incremental,
+                                          deadline=self.deadline)
+        self.comments_data = page['threads']
+        self.threads_emitted = len(self.comments_data)
+        
+        results = self.build_results(
+            page['video_id'] or "ID no disponible", video_url,
+            page['title'] or "Título no disponible",
+            page['description'] or "Descripción no disponible",
+            page['author'] or "Autor no disponible"
+        )
+        results['backend'] = "http"
+        results['fetch_stats'] = page['stats']
+        results['partial'] = page['partial']
+        results['cancelled'] = self._cancelled()
+        self.emit_progress(100, f"🎉 ¡Scraping completado! {results['total_comments']} comentarios y "
+                                f"{results['total_threads']} respuestas extraídas")
+        return results
+    
+    def _load_page(self, video_url):
+        """Cargar la página sin pasarse del plazo (si se agota se para la carga y se sigue con lo cargado)"""
+        if self._cancelled():
+            return
+        remaining = self.deadline.remaining() if self.deadline else None
+        if remaining is None:
+            self.driver.get(video_url)
+        elif self.browser_tab:
+            self.driver.get(video_url, timeout=min(30, remaining))
+        else:
+            self.driver.set_page_load_timeout(max(1, remaining))
             try:
-                if "v=" in video_url:
-                    video_id = video_url.split("v=")[1].split("&")[0]
-                elif "youtu.be/" in video_url:
-                    video_id = video_url.split("youtu.be/")[1].split("?")[0]
-            except:
-                pass
-            
-            # Obtener autor del video
-            self.emit_progress(40, "👤 Extrayendo información del autor...")
-            video_author = "Autor no disponible"
-            author_selectors = [
-                "ytd-channel-name #text",
-                "ytd-channel-name a",
-                "#owner-text a",
-                "#upload-info #owner-text a",
-                ".ytd-video-owner-renderer a",
-                "ytd-video-owner-renderer #text",
-                "#channel-name #text"
+                self.driver.get(video_url)
+            except TimeoutException:
+                log_warning("⏰ La página no terminó de cargar dentro del plazo, se sigue con lo cargado")
+                self.driver.execute_script("window.stop();")
+            finally:
+                # Valor por defecto de chromedriver (el navegador puede volver al pool)
+                self.driver.set_page_load_timeout(300)
+    
+    def _extract_metadata_embedded(self, video_id):
+        """
+        Título, autor y descripción del JSON embebido (ytInitialPlayerResponse / ytInitialData).
+        
+        Primero con un script que devuelve solo los nodos necesarios; si no, desde
+        el código fuente de la página. None si no hay título o el JSON es de otro vídeo.
+        """
+        for source, read in (("embedded_json", self._embedded_json), ("page_source", self._page_source_json)):
+            try:
+                page = read() or {}
+                metadata = parse_video_metadata(page.get('player'), page.get('initial'))
+            except Exception as e:
+                log_warning(f"⚠️ Metadatos no disponibles en {source}: {e}")
+                continue
+            # Tras una navegación SPA el JSON puede seguir siendo el del vídeo anterior
+            if metadata['title'] and (not video_id or metadata['video_id'] in (None, video_id)):
+                self.metadata_source = source
+                return metadata
+        return None
+    
+    def _embedded_json(self):
+        return self.driver.execute_script(PAGE_METADATA_JS)
+    
+    def _page_source_json(self):
+        html = self.driver.page_source
+        return {
+            'player': extract_json_var(html, 'ytInitialPlayerResponse'),
+            'initial': extract_json_var(html, 'ytInitialData')
+        }
+    
+    def _extract_metadata_dom(self):
+        """Título, autor y descripción desde el DOM (selectores, botón de expandir y JS); respaldo del JSON embebido"""
+        # Esperar a que la página cargue
+        wait = WebDriverWait(self.driver, self._bounded(30))
+        
+        # Obtener título del video
+        self.emit_progress(30, "🎬 Extrayendo título del video...")
+        video_title = "Título no disponible"
+        title_selectors = [
+            "h1.ytd-watch-metadata",
+            "h1.ytd-video-primary-info-renderer", 
+            "h1[class*='title']",
+            "h1 yt-formatted-string",
+            "#title h1"
+        ]
+        
+        # Una sola espera hasta que aparezca cualquiera de los selectores (no 30s por selector)
+        try:
+            wait.until(lambda driver: any(driver.find_elements(By.CSS_SELECTOR, selector) for selector in title_selectors))
+        except:
+            pass
+        title_text, _ = selector_registry.find(
+            "video_title", title_selectors,
+            lambda selector: self.driver.find_element(By.CSS_SELECTOR, selector).text
+        )
+        if title_text is not None:
+            video_title = title_text
+        
+        self.emit_progress(35, f"✅ Título encontrado: {video_title[:50]}...")
+        log_info(f"🎬 Video: {video_title}")
+        
+        # Obtener autor del video
+        self.emit_progress(40, "👤 Extrayendo información del autor...")
+        video_author = "Autor no disponible"
+        author_selectors = [
+            "ytd-channel-name #text",
+            "ytd-channel-name a",
+            "#owner-text a",
+            "#upload-info #owner-text a",
+            ".ytd-video-owner-renderer a",
+            "ytd-video-owner-renderer #text",
+            "#channel-name #text"
+        ]
+        
+        author_text, selector = selector_registry.find(
+            "video_author", author_selectors,
+            lambda selector: self.driver.find_element(By.CSS_SELECTOR, selector).text.strip() or None
+        )
+        if author_text:
+            video_author = author_text
+            log_info(f"👤 Autor encontrado con selector: {selector}")
+        
+        self.emit_progress(45, f"✅ Autor encontrado: {video_author}")
+        log_info(f"👤 Autor: {video_author}")
+        
+        # Obtener descripción del video
+        self.emit_progress(50, "📝 Extrayendo descripción del video...")
+        video_description = "Descripción no disponible"
+        
+        # Scroll hacia la sección de descripción y esperar más tiempo
+        self.driver.execute_script("window.scrollTo(0, 600);")
+        time.sleep(3)
+        
+        # Intentar buscar y expandir cualquier botón de expandir descripción
+        try:
+            # Buscar todos los posibles botones de expandir
+            expand_selectors = [
+                "tp-yt-paper-button#expand",
+                "button#expand", 
+                ".more-button",
+                "[aria-label*='Show more']",
+                "[aria-label*='más']", 
+                "button[aria-label*='more']",
+                "ytd-button-renderer[aria-label*='more']",
+                "button[class*='expand']"
             ]
             
-            for selector in author_selectors:
+            for selector in expand_selectors:
                 try:
-                    author_element = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    video_author = author_element.text.strip()
-                    if video_author and video_author != "":
-                        log_info(f"👤 Autor encontrado con selector: {selector}")
-                        break
+                    buttons = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                    for button in buttons:
+                        if button.is_displayed() and button.is_enabled():
+                            log_info(f"🔧 Haciendo clic en botón expandir: {selector}")
+                            self.driver.execute_script("arguments[0].click();", button)
+                            time.sleep(2)
+                            break
                 except:
                     continue
-            
-            self.emit_progress(45, f"✅ Autor encontrado: {video_author}")
-            log_info(f"🆔 Video ID: {video_id}")
-            log_info(f"👤 Autor: {video_author}")
-            
-            # Obtener descripción del video
-            self.emit_progress(50, "📝 Extrayendo descripción del video...")
-            video_description = "Descripción no disponible"
-            
-            # Scroll hacia la sección de descripción y esperar más tiempo
-            self.driver.execute_script("window.scrollTo(0, 600);")
-            time.sleep(3)
-            
-            # Intentar buscar y expandir cualquier botón de expandir descripción
+        except:
+            pass
+        
+        # Lista ampliada de selectores para encontrar la descripción
+        description_selectors = [
+            # Selectores más recientes de YouTube
+            "ytd-text-inline-expander #content",
+            "ytd-text-inline-expander yt-formatted-string",
+            "#description-inline-expander #content",
+            "#description-inline-expander yt-formatted-string",
+            
+            # Selectores de la estructura expandida
+            "#description yt-formatted-string",
+            "#description .content",
+            "#description",
+            
+            # Selectores de metadatos
+            "ytd-video-secondary-info-renderer #description",
+            "ytd-video-secondary-info-renderer yt-formatted-string",
+            ".ytd-expandable-video-description-body-renderer",
+            "yt-formatted-string.ytd-expandable-video-description-body-renderer",
+            
+            # Selectores genéricos
+            "#meta #description",
+            "#description-text",
+            ".description-text",
+            "[id*='description']",
+            
+            # Selectores más específicos
+            "ytd-watch-metadata #description",
+            "ytd-video-primary-info-renderer #description"
+        ]
+        
+        def description_lookup(selector):
+            for element in self.driver.find_elements(By.CSS_SELECTOR, selector):
+                desc_text = element.text.strip()
+                if desc_text and len(desc_text) > 10:
+                    return desc_text
+            return None
+        
+        # Intentar con cada selector (el último que funcionó primero)
+        desc_text, selector = selector_registry.find("video_description", description_selectors, description_lookup)
+        if desc_text:
+            video_description = desc_text
+            log_info(f"📝 Descripción encontrada con selector: {selector}")
+        
+        # Si aún no encontramos descripción, intentar con JavaScript
+        if video_description == "Descripción no disponible":
             try:
-                # Buscar todos los posibles botones de expandir
-                expand_selectors = [
-                    "tp-yt-paper-button#expand",
-                    "button#expand", 
-                    ".more-button",
-                    "[aria-label*='Show more']",
-                    "[aria-label*='más']", 
-                    "button[aria-label*='more']",
-                    "ytd-button-renderer[aria-label*='more']",
-                    "button[class*='expand']"
-                ]
+                js_description = self.driver.execute_script("""
+                    // Buscar elementos que contengan descripción
+                    var desc = '';
+                    var selectors = [
+                        'ytd-text-inline-expander',
+                        '[id*="description"]',
+                        '[class*="description"]',
+                        'yt-formatted-string'
+                    ];
+                    
+                    for (var i = 0; i < selectors.length; i++) {
+                        var elements = document.querySelectorAll(selectors[i]);
+                        for (var j = 0; j < elements.length; j++) {
+                            var text = elements[j].textContent || elements[j].innerText;
+                            if (text && text.length > 50 && text.length < 5000) {
+                                return text.trim();
+                            }
+                        }
+                    }
+                    return '';
+                """)
                 
-                for selector in expand_selectors:
-                    try:
-                        buttons = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        for button in buttons:
-                            if button.is_displayed() and button.is_enabled():
-                                log_info(f"🔧 Haciendo clic en botón expandir: {selector}")
-                                self.driver.execute_script("arguments[0].click();", button)
-                                time.sleep(2)
-                                break
-                    except:
-                        continue
+                if js_description and len(js_description) > 10:
+                    video_description = js_description
+                    log_info(f"📝 Descripción encontrada con JavaScript")
             except:
                 pass
+        
+        self.emit_progress(55, f"✅ Descripción extraída: {len(video_description)} caracteres")
+        log_info(f"📝 Descripción extraída: {len(video_description)} caracteres")
+        
+        return video_title, video_author, video_description
+    
+    def scrape_video_comments(self, video_url, max_comments=50):
+        """Scrape los comentarios de un video de YouTube (VERSIÓN SÍNCRONA CON WEBSOCKET)"""
+        self.emit_progress(0, "🚀 Iniciando análisis de YouTube...")
+        failed = False
+        
+        try:
+            self.emit_progress(10, "🚀 Iniciando proceso de scraping...")
+            self.setup_driver()
             
-            # Lista ampliada de selectores para encontrar la descripción
-            description_selectors = [
-                # Selectores más recientes de YouTube
-                "ytd-text-inline-expander #content",
-                "ytd-text-inline-expander yt-formatted-string",
-                "#description-inline-expander #content",
-                "#description-inline-expander yt-formatted-string",
-                
-                # Selectores de la estructura expandida
-                "#description yt-formatted-string",
-                "#description .content",
-                "#description",
-                
-                # Selectores de metadatos
-                "ytd-video-secondary-info-renderer #description",
-                "ytd-video-secondary-info-renderer yt-formatted-string",
-                ".ytd-expandable-video-description-body-renderer",
-                "yt-formatted-string.ytd-expandable-video-description-body-renderer",
-                
-                # Selectores genéricos
-                "#meta #description",
-                "#description-text",
-                ".description-text",
-                "[id*='description']",
-                
-                # Selectores más específicos
-                "ytd-watch-metadata #description",
-                "ytd-video-primary-info-renderer #description"
-            ]
+            # Sin vídeo, anuncios, fuentes ni tracking: carga y scroll más rápidos (se aplica por pestaña)
+            patterns = blocked_patterns()
+            if patterns and apply_blocking(self.driver, patterns):
+                log_info(f"🚫 Bloqueo de recursos activo ({setting.scraper_block_profile}, {len(patterns)} patrones)")
+            self.emit_progress(20, f"🌐 Accediendo a: {video_url}")
+            log_info(f"🌐 Accediendo a: {video_url}")
             
-            # Intentar con cada selector
-            for selector in description_selectors:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elements:
-                        desc_text = element.text.strip()
-                        if desc_text and len(desc_text) > 10:
-                            video_description = desc_text
-                            log_info(f"📝 Descripción encontrada con selector: {selector}")
-                            break
-                    if video_description != "Descripción no disponible":
-                        break
-                except Exception as e:
-                    continue
+            # Capturar las respuestas de comentarios desde antes de cargar la página
+            if self.extraction_mode == "network":
+                self.network_capture = NetworkCapture(self.driver)
+                self.network_capture.start()
             
-            # Si aún no encontramos descripción, intentar con JavaScript
-            if video_description == "Descripción no disponible":
-                try:
-                    js_description = self.driver.execute_script("""
-                        // Buscar elementos que contengan descripción
-                        var desc = '';
-                        var selectors = [
-                            'ytd-text-inline-expander',
-                            '[id*="description"]',
-                            '[class*="description"]',
-                            'yt-formatted-string'
-                        ];
-                        
-                        for (var i = 0; i < selectors.length; i++) {
-                            var elements = document.querySelectorAll(selectors[i]);
-                            for (var j = 0; j < elements.length; j++) {
-                                var text = elements[j].textContent || elements[j].innerText;
-                                if (text && text.length > 50 && text.length < 5000) {
-                                    return text.trim();
-                                }
-                            }
-                        }
-                        return '';
-                    """)
-                    
-                    if js_description and len(js_description) > 10:
-                        video_description = js_description
-                        log_info(f"📝 Descripción encontrada con JavaScript")
-                except:
-                    pass
+            # Cargar la página del video
+            self._load_page(video_url)
+            self.emit_progress(25, "📖 Página cargada, extrayendo metadatos...")
+            
+            video_id = extract_video_id(video_url)
+            log_info(f"🆔 Video ID: {video_id}")
             
-            self.emit_progress(55, f"✅ Descripción extraída: {len(video_description)} caracteres")
-            log_info(f"📝 Descripción extraída: {len(video_description)} caracteres")
+            # Metadatos del JSON embebido en la página (un script); el DOM solo como respaldo
+            metadata = self._extract_metadata_embedded(video_id)
+            video_id = video_id or (metadata or {}).get('video_id') or "ID no disponible"
+            if metadata:
+                video_title = metadata['title']
+                video_author = metadata['author'] or "Autor no disponible"
+                video_description = metadata['description'] or "Descripción no disponible"
+                self.emit_progress(55, f"✅ Metadatos leídos de la página: {video_title[:50]}")
+            else:
+                video_title, video_author, video_description = self._extract_metadata_dom()
+                self.metadata_source = "dom"
+            log_info(f"🎬 Video: {video_title} | 👤 {video_author} | 📝 {len(video_description)} caracteres ({self.metadata_source})")
             
             # Cargar comentarios
             self.emit_progress(60, f"📜 Cargando comentarios (máximo {max_comments})...")
@@ -796,58 +987,31 @@ class YouTubeCommentScraperChrome:
             
             # Extraer comentarios
             self.emit_progress(75, "🔍 Procesando comentarios extraídos...")
-            comment_elements = self.driver.find_elements(By.CSS_SELECTOR, "ytd-comment-thread-renderer")
-            total_elements = min(len(comment_elements), max_comments)
-            self.emit_progress(80, f"📝 Encontrados {len(comment_elements)} comentarios, procesando {total_elements}...")
-            log_info(f"🔍 Procesando {len(comment_elements)} comentarios...")
-            
-            for i, comment_element in enumerate(comment_elements[:max_comments]):
-                comment_data = self.extract_comment_data(comment_element)
-                if comment_data:
-                    self.comments_data.append(comment_data)
-                    
-                if (i + 1) % 3 == 0:
-                    log_info(f"✅ Procesados {i + 1} comentarios...")
-                
-                # Actualizar progreso cada 5 comentarios para la web
-                if (i + 1) % 5 == 0 or i == total_elements - 1:
-                    progress = 80 + (15 * (i + 1) / total_elements)
-                    self.emit_progress(int(progress), f"✅ Procesados {i + 1}/{total_elements} comentarios...")
+            extracted = self.extraction_mode == "network" and self.extract_comments_network(max_comments)
+            if not extracted:
+                if self.extraction_mode == "elements":
+                    self.extract_comments_elements(max_comments)
+                else:
+                    self.extract_comments_bulk(max_comments)
+            self.emit_threads()
             
             # Estadísticas
             self.emit_progress(95, "📊 Calculando estadísticas finales...")
-            total_comments = len(self.comments_data)
-            total_replies = sum(len(comment['replies']) for comment in self.comments_data)
-            total_emojis = sum(comment['emoji_count'] for comment in self.comments_data)
-            total_likes = sum(comment['likes'] for comment in self.comments_data)
-            
-            # Emojis y likes de las respuestas
-            reply_emojis = 0
-            reply_likes = 0
-            for comment in self.comments_data:
-                for reply in comment['replies']:
-                    reply_emojis += reply['emoji_count']
-                    reply_likes += reply['likes']
-            
-            total_emojis += reply_emojis
-            total_likes += reply_likes
-            
-            results = {
-                'video_id': video_id,
-                'video_url': video_url,
-                'title': video_title,
-                'description': video_description,
-                'author': video_author,
-                'total_likes': total_likes,
-                'total_comments': total_comments,
-                'emoji_stats': dict(self.emoji_counter),
-                'total_emojis': total_emojis,
-                'most_common_emojis': dict(self.emoji_counter.most_common(10)),
-                'total_threads': total_replies,
-                'threads': self.comments_data
-            }
-            
-            self.emit_progress(100, f"🎉 ¡Scraping completado! {total_comments} comentarios y {total_replies} respuestas extraídas")
+            results = self.build_results(video_id, video_url, video_title, video_description, video_author)
+            results['backend'] = "selenium"
+            results['scroll_stats'] = self.scroll_stats
+            results['metadata_source'] = self.metadata_source
+            results['partial'] = self.deadline_hit
+            results['cancelled'] = self._cancelled()
+            
+            if results['cancelled']:
+                self.emit_progress(100, "🛑 Scraping cancelado")
+            elif self.deadline_hit:
+                self.emit_progress(100, f"⏰ Plazo agotado: resultado parcial con {results['total_comments']} "
+                                        f"comentarios y {results['total_threads']} respuestas")
+            else:
+                self.emit_progress(100, f"🎉 ¡Scraping completado! {results['total_comments']} comentarios y "
+                                        f"{results['total_threads']} respuestas extraídas")
             
             # ✅ NO ENVIAR completion desde el scraper - solo retornar los datos
             # El análisis de toxicidad y completion se maneja en main.py
@@ -855,74 +1019,136 @@ class YouTubeCommentScraperChrome:
             return results
             
         except Exception as e:
+            failed = True
             self.emit_progress(-1, f"❌ Error durante el scraping: {e}")
             
-            # Solo enviar error del scraping, no completion final
-            if self.session_id:
-                try:
-                    def send_error():
-                        try:
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            loop.run_until_complete(
-                                progress_manager.send_progress(self.session_id, -1, f"❌ Error en scraping: {e}")
-                            )
-                            loop.close()
-                        except Exception as ex:
-                            log_info(f"⚠️ Error enviando error: {ex}")
-                    
-                    thread = threading.Thread(target=send_error, daemon=True)
-                    thread.start()
-                except Exception as ex:
-                    log_info(f"⚠️ Error configurando error: {ex}")
-            
             return None
         finally:
-            if self.driver:
-                self.driver.quit()
+            self.release_driver(failed)
+            selector_registry.save()
+
+def cached_scrape(video_url, max_comments=50, session_id=None):
+    """
+    Scraping reciente del mismo vídeo y tramo de `max_comments` desde la caché, o None.
+
+    No necesita navegador: main.py lo consulta antes de esperar turno en la
+    cola de scraping.
+    """
+    video_id = extract_video_id(video_url)
+    cached = scrape_cache.get(video_id, max_comments) if video_id else None
+    if not cached:
+        return None
+
+    data, age = cached
+    data['cache'] = {'hit': True, 'age_seconds': round(age, 1)}
+    log_info(f"⚡ Scraping servido desde caché ({age:.0f}s): {data['total_comments']} comentarios")
+    if session_id:
+        progress_manager.post_progress(session_id, 100, f"⚡ Comentarios recientes en caché: "
+                                                        f"{data['total_comments']} comentarios")
+    return data
 
 # Función wrapper síncrona para compatibilidad con main.py
-def scrape_youtube_comments_with_progress(video_url, max_comments=50, session_id=None):
-    """Función wrapper síncrona para scraping con progreso por WebSocket"""
+def scrape_youtube_comments_with_progress(video_url, max_comments=50, session_id=None, thread_callback=None,
+                                          known_fingerprints=None, deadline=None, lookup_cache=True):
+    """
+    Función wrapper síncrona para scraping con progreso por WebSocket
+    
+    `thread_callback` recibe los hilos por lotes según se extraen (p. ej. para
+    empezar la inferencia antes de que termine el scraping). Con
+    `known_fingerprints` (huellas de los hilos ya guardados) el scraping es
+    incremental y solo devuelve los hilos nuevos.
+    
+    Un scraping reciente del mismo vídeo y tramo de `max_comments` se sirve
+    desde la caché sin lanzar el scraper; `data['cache']` indica si vino de
+    caché y su antigüedad. El incremental nunca usa la caché. Con
+    `lookup_cache=False` (el llamante ya consultó `cached_scrape`) no se
+    vuelve a consultar, pero el resultado se sigue guardando.
+    
+    Con `deadline` (Deadline) el scraping para al agotarse el plazo y devuelve
+    lo extraído con `data['partial'] = True`; los resultados parciales no se
+    guardan en la caché.
+    
+    Con SCRAPER_PROCESSES > 0 el scraping se ejecuta en los procesos worker
+    (process_pool); la caché se consulta y se rellena aquí, en la API.
+    """
     try:
         log_info(f"🎯 Iniciando scraping síncrono: {video_url} (max: {max_comments})")
         log_info(f"📡 Session ID: {session_id}")
         
-        # Crear scraper con WebSocket
-        scraper = YouTubeCommentScraperChrome(
-            headless=True,
-            session_id=session_id
-        )
+        video_id = extract_video_id(video_url)
+        use_cache = bool(video_id) and not known_fingerprints
+        if use_cache and lookup_cache:
+            data = cached_scrape(video_url, max_comments, session_id)
+            if data:
+                return data
         
-        # Ejecutar scraping
-        data = scraper.scrape_video_comments(video_url, max_comments)
+        if setting.scraper_processes > 0:
+            # En un proceso worker: no compite por el GIL con las peticiones de la API
+            try:
+                data = get_scraper_processes().run(video_url, max_comments, session_id, thread_callback,
+                                                   known_fingerprints, deadline)
+            except ScraperPoolUnavailable as e:
+                log_warning(f"⚠️ {e}: scraping en el proceso de la API")
+                data = _run_scraper(video_url, max_comments, session_id, thread_callback, known_fingerprints, deadline)
+        else:
+            data = _run_scraper(video_url, max_comments, session_id, thread_callback, known_fingerprints, deadline)
         
-        log_info(f"✅ Scraping completado: {data.get('total_comments', 0) if data else 0} comentarios")
+        if data:
+            if use_cache and data.get('total_comments') and not data.get('partial'):
+                scrape_cache.put(video_id, max_comments, data)
+            data['cache'] = {'hit': False, 'age_seconds': 0}
         return data
         
     except Exception as e:
         log_info(f"❌ Error en scraping con progreso: {e}")
         # Enviar error por WebSocket si es posible
         if session_id:
-            import threading
-            import asyncio
-            from .progress_manager import progress_manager
-            
-            def send_error():
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(
-                        progress_manager.send_completion(session_id, False, error=str(e))
-                    )
-                    loop.close()
-                except:
-                    pass
-            
-            threading.Thread(target=send_error, daemon=True).start()
+            progress_manager.post_completion(session_id, False, error=str(e))
         
         raise Exception(f"Error en scraping: {e}")
 
+def _run_scraper(video_url, max_comments, session_id, thread_callback, known_fingerprints, deadline=None):
+    """Scraping real: backend HTTP con Selenium como respaldo"""
+    # Backend HTTP (sin navegador) con Selenium como respaldo
+    if setting.scraper_backend == "http":
+        try:
+            scraper = YouTubeCommentScraperChrome(
+                headless=True, session_id=session_id, thread_callback=thread_callback,
+                incremental=IncrementalTracker(known_fingerprints) if known_fingerprints else None,
+                deadline=deadline
+            )
+            data = scraper.scrape_video_comments_http(video_url, max_comments)
+            # En incremental, 0 hilos nuevos es un resultado válido si se vieron los conocidos
+            if data and (data['total_comments'] > 0 or (data['incremental'] or {}).get('known_seen')):
+                log_info(f"✅ Scraping HTTP completado: {data['total_comments']} comentarios")
+                return data
+            # Sin plazo para lanzar Chrome: se devuelve el resultado (parcial) del backend HTTP
+            if data and data.get('partial'):
+                return data
+            log_warning("⚠️ El backend HTTP no obtuvo comentarios, usando Selenium")
+        except Exception as e:
+            log_warning(f"⚠️ Backend HTTP falló ({e}), usando Selenium")
+    
+    # Trabajo cancelado: no se lanza Chrome para nadie
+    if deadline and deadline.cancelled:
+        return None
+    
+    # Crear scraper con WebSocket
+    scraper = YouTubeCommentScraperChrome(
+        headless=True,
+        session_id=session_id,
+        browser_pool=get_browser_pool(),
+        thread_callback=thread_callback,
+        incremental=IncrementalTracker(known_fingerprints) if known_fingerprints else None,
+        deadline=deadline
+    )
+    
+    # Ejecutar scraping
+    data = scraper.scrape_video_comments(video_url, max_comments)
+    
+    log_info(f"✅ Scraping completado: {data.get('total_comments', 0) if data else 0} comentarios")
+    return data
+
 # Función wrapper async (mantener para compatibilidad)
 async def scrape_youtube_comments_async(video_url, max_comments=50, session_id=None):
     """Función principal async para scraping con progreso"""
@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from server.core.metrics import metrics_registry
+from server.core.print_dev import log_info, log_warning
+
+
+class SelectorRegistry:
+    """
+    Memoria de qué selector CSS funcionó para cada campo del scraper.
+
+    Las búsquedas con listas de selectores (título, autor, descripción,
+    likes, respuestas...) prueban primero el último selector que acertó y
+    después los demás por número de aciertos. Así, cuando YouTube cambia el
+    diseño, solo el primer trabajo paga la cascada completa.
+
+    Las estadísticas se guardan en JSON para sobrevivir a reinicios y se
+    exponen por campo: si `first_try_rate` baja o `last_hit` cambia, el
+    diseño de la página se ha movido.
+
+    Con el scraper en procesos worker, solo la API escribe el fichero: cada
+    worker (`readonly`) envía con cada resultado los contadores acumulados
+    desde el último envío (`take_changes`) y la API los suma (`merge`).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._path = path
+        self._fields: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.readonly = False
+        # Contadores desde el último take_changes()
+        self._changes: Dict[str, Dict[str, Any]] = {}
+        # El fichero se lee al primer uso: importar el scraper no carga la configuración
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    @property
+    def path(self) -> Optional[str]:
+        if self._path is None:
+            from server.core.config import setting
+            self._path = setting.selector_registry_path
+        return self._path
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load()
+                self._loaded = True
+
+    def ordered(self, field: str, selectors: List[str]) -> List[str]:
+        """Selectores en el orden en que conviene probarlos"""
+        self._ensure_loaded()
+        with self._lock:
+            stats = self._fields.get(field)
+            if not stats:
+                return list(selectors)
+            last_hit = stats['last_hit']
+            hits = stats['selectors']
+        return sorted(selectors, key=lambda s: (s != last_hit, -hits.get(s, 0), selectors.index(s)))
+
+    def find(self, field: str, selectors: List[str], lookup: Callable[[str], Any]) -> Tuple[Any, Optional[str]]:
+        """
+        Probar los selectores con `lookup(selector)` hasta que uno devuelva un valor.
+
+        `lookup` devuelve None (o lanza una excepción) cuando el selector no
+        sirve. Devuelve (valor, selector) o (None, None) si ninguno acierta.
+        """
+        ordered = self.ordered(field, selectors)
+        for attempt, selector in enumerate(ordered, 1):
+            try:
+                value = lookup(selector)
+            except Exception:
+                value = None
+            if value is not None:
+                self.record(field, selector, attempt)
+                return value, selector
+
+        self.record(field, None, len(ordered))
+        return None, None
+
+    def record(self, field: str, selector: Optional[str], attempts: int):
+        """Registrar el resultado de una búsqueda (selector=None si ninguno acertó)"""
+        delta = {
+            'lookups': 1, 'found': int(selector is not None), 'first_try': int(selector is not None and attempts == 1),
+            'attempts': attempts, 'last_hit': selector, 'selectors': {selector: 1} if selector is not None else {}
+        }
+        self._ensure_loaded()
+        with self._lock:
+            self._add(field, delta)
+            changes = self._changes.setdefault(field, {
+                'lookups': 0, 'found': 0, 'first_try': 0, 'attempts': 0, 'last_hit': None, 'selectors': {}
+            })
+            for key in ('lookups', 'found', 'first_try', 'attempts'):
+                changes[key] += delta[key]
+            if selector is not None:
+                changes['selectors'][selector] = changes['selectors'].get(selector, 0) + 1
+                changes['last_hit'] = selector
+
+    def take_changes(self) -> Dict[str, Dict[str, Any]]:
+        """Contadores acumulados desde la última llamada (los envía cada worker a la API)"""
+        with self._lock:
+            changes, self._changes = self._changes, {}
+        return changes
+
+    def merge(self, changes: Dict[str, Dict[str, Any]]):
+        """Sumar los contadores de `take_changes()` de otro proceso"""
+        self._ensure_loaded()
+        with self._lock:
+            for field, delta in changes.items():
+                self._add(field, delta)
+
+    def _add(self, field: str, delta: Dict[str, Any]):
+        # Con el lock tomado
+        stats = self._fields.setdefault(field, {
+            'lookups': 0, 'found': 0, 'first_try': 0, 'attempts': 0,
+            'last_hit': None, 'last_hit_changes': 0, 'last_changed_at': None, 'selectors': {}
+        })
+        for key in ('lookups', 'found', 'first_try', 'attempts'):
+            stats[key] += delta[key]
+        for selector, hits in delta['selectors'].items():
+            stats['selectors'][selector] = stats['selectors'].get(selector, 0) + hits
+        selector = delta['last_hit']
+        if selector is not None and stats['last_hit'] != selector:
+            if stats['last_hit'] is not None:
+                stats['last_hit_changes'] += 1
+                log_info(f"🧭 Selector de '{field}' cambia: {stats['last_hit']} -> {selector}")
+            stats['last_hit'] = selector
+            stats['last_changed_at'] = time.time()
+        self._dirty = True
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            with self._lock:
+                self._fields = data.get('fields', {})
+            log_info(f"🧭 Memoria de selectores cargada ({len(self._fields)} campos)")
+        except Exception as e:
+            log_warning(f"⚠️ No se pudo leer la memoria de selectores {self.path}: {e}")
+
+    def save(self):
+        """Guardar en disco si hubo cambios (escritura atómica)"""
+        if not self.path or self.readonly:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {'saved_at': time.time(), 'fields': json.loads(json.dumps(self._fields))}
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            # Temporal con nombre único: dos escrituras a la vez no se pisan el fichero
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".selectors-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        except Exception as e:
+            log_warning(f"⚠️ No se pudo guardar la memoria de selectores: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estadísticas por campo (tasa de acierto, acierto al primer intento, selector actual)"""
+        self._ensure_loaded()
+        with self._lock:
+            fields = {}
+            for field, stats in self._fields.items():
+                lookups = stats['lookups'] or 1
+                fields[field] = {
+                    'lookups': stats['lookups'],
+                    'hit_rate': round(stats['found'] / lookups, 3),
+                    'first_try_rate': round(stats['first_try'] / lookups, 3),
+                    'avg_attempts': round(stats['attempts'] / lookups, 2),
+                    'last_hit': stats['last_hit'],
+                    'last_hit_changes': stats['last_hit_changes'],
+                    'last_changed_at': stats['last_changed_at'],
+                    'selectors': dict(stats['selectors'])
+                }
+            return {'path': self.path, 'fields': fields}
+
+
+# Instancia global
+selector_registry = SelectorRegistry()
+metrics_registry.register("selector_registry", selector_registry.get_stats)
@@ -0,0 +1,347 @@
+"""
+Parser de las respuestas JSON de YouTube (`youtubei/v1/next`).
+
+Soporta los dos formatos que sirve YouTube:
+- nuevo: `commentViewModel` en los continuationItems y los datos del
+  comentario en `frameworkUpdates.entityBatchUpdate.mutations[].payload.commentEntityPayload`
+- antiguo: `commentThreadRenderer.comment.commentRenderer` con todos los datos en línea
+
+Los comentarios se devuelven como registros planos; build_threads los agrupa
+en hilos con el mismo formato que genera el scraper de Selenium.
+"""
+
+import re
+import json
+from typing import List, Dict, Any, Optional, Callable, Iterator
+
+from server.scraper.dom_extract import parse_count
+
+
+def _text(value: Any) -> str:
+    """Texto de un campo de YouTube ({'simpleText'}, {'runs'}, {'content'} o str)"""
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if 'simpleText' in value:
+        return value['simpleText']
+    if 'runs' in value:
+        return ''.join(run.get('text', '') for run in value['runs'])
+    if 'content' in value:
+        return value['content']
+    return ''
+
+
+def _count(value: Any) -> int:
+    """Contador de YouTube ('12', '1.2K', '1,234', 12) como entero"""
+    if isinstance(value, int):
+        return value
+    text = _text(value).replace('\xa0', '').replace(' ', '')
+    if re.fullmatch(r'\d{1,3}([.,]\d{3})+', text):
+        text = re.sub(r'[.,]', '', text)
+    return parse_count(text.replace(',', '.'))
+
+
+def _continuation_items(data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """continuationItems de todos los endpoints de la respuesta, en orden"""
+    for endpoint in data.get('onResponseReceivedEndpoints', []):
+        for action_key in ('reloadContinuationItemsCommand', 'appendContinuationItemsAction'):
+            action = endpoint.get(action_key)
+            if action:
+                yield from action.get('continuationItems', [])
+
+
+def continuation_token(renderer: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Token de un continuationItemRenderer (spinner o botón 'mostrar más')"""
+    if not renderer:
+        return None
+    endpoint = renderer.get('continuationEndpoint') or \
+        renderer.get('button', {}).get('buttonRenderer', {}).get('command', {})
+    return endpoint.get('continuationCommand', {}).get('token')
+
+
+def _reply_continuation(thread: Dict[str, Any]) -> Optional[str]:
+    contents = thread.get('replies', {}).get('commentRepliesRenderer', {}).get('contents', [])
+    for item in contents:
+        token = continuation_token(item.get('continuationItemRenderer'))
+        if token:
+            return token
+    return None
+
+
+def _entity_payloads(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """commentEntityPayload indexados por entityKey y por commentId"""
+    payloads = {}
+    mutations = data.get('frameworkUpdates', {}).get('entityBatchUpdate', {}).get('mutations', [])
+    for mutation in mutations:
+        payload = mutation.get('payload', {}).get('commentEntityPayload')
+        if not payload:
+            continue
+        payloads[mutation.get('entityKey') or payload.get('key')] = payload
+        comment_id = payload.get('properties', {}).get('commentId')
+        if comment_id:
+            payloads[comment_id] = payload
+    return payloads
+
+
+def _record(comment_id: str, author: str, text: str, likes: int, published_time: str, reply_count: int) -> Dict[str, Any]:
+    return {
+        'comment_id': comment_id,
+        'parent_id': comment_id.split('.')[0] if '.' in comment_id else None,
+        'author': author.strip(),
+        'comment': text.strip(),
+        'likes': likes,
+        'published_time': published_time.strip(),
+        'reply_count': reply_count
+    }
+
+
+def _from_entity(payload: Dict[str, Any]) -> Dict[str, Any]:
+    properties = payload.get('properties', {})
+    toolbar = payload.get('toolbar', {})
+    return _record(
+        properties.get('commentId', ''),
+        payload.get('author', {}).get('displayName', ''),
+        _text(properties.get('content')),
+        _count(toolbar.get('likeCountNotliked')),
+        properties.get('publishedTime', ''),
+        _count(toolbar.get('replyCount'))
+    )
+
+
+def _from_renderer(renderer: Dict[str, Any]) -> Dict[str, Any]:
+    return _record(
+        renderer.get('commentId', ''),
+        _text(renderer.get('authorText')),
+        _text(renderer.get('contentText')),
+        _count(renderer.get('voteCount')),
+        _text(renderer.get('publishedTimeText')),
+        _count(renderer.get('replyCount', 0))
+    )
+
+
+def _from_view_model(view_model: Dict[str, Any], payloads: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    # En los hilos viene anidado (commentViewModel.commentViewModel), en las respuestas no
+    view_model = view_model.get('commentViewModel', view_model)
+    payload = payloads.get(view_model.get('commentKey')) or payloads.get(view_model.get('commentId'))
+    return _from_entity(payload) if payload else None
+
+
+def parse_next_response(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parsear una respuesta de `youtubei/v1/next` (o el bloque de comentarios de ytInitialData).
+
+    Returns:
+        {'comments': [registros en orden], 'continuation': token o None,
+         'reply_continuations': {comment_id del hilo: token de sus respuestas}}
+
+    En una respuesta de respuestas, `continuation` es el token de
+    'mostrar más respuestas' del mismo hilo.
+    """
+    payloads = _entity_payloads(data)
+    comments = []
+    continuation = None
+    reply_continuations = {}
+
+    for item in _continuation_items(data):
+        record = None
+        if 'commentThreadRenderer' in item:
+            thread = item['commentThreadRenderer']
+            if 'commentViewModel' in thread:
+                record = _from_view_model(thread['commentViewModel'], payloads)
+            elif 'comment' in thread:
+                record = _from_renderer(thread['comment'].get('commentRenderer', {}))
+            token = _reply_continuation(thread)
+            if record and token:
+                reply_continuations[record['comment_id']] = token
+        elif 'commentViewModel' in item:
+            record = _from_view_model(item['commentViewModel'], payloads)
+        elif 'commentRenderer' in item:
+            record = _from_renderer(item['commentRenderer'])
+        elif 'continuationItemRenderer' in item:
+            continuation = continuation_token(item['continuationItemRenderer']) or continuation
+
+        if record and record['comment_id']:
+            comments.append(record)
+
+    return {'comments': comments, 'continuation': continuation, 'reply_continuations': reply_continuations}
+
+
+def build_threads(records: List[Dict[str, Any]], extract_emojis: Callable[[str], List[str]],
+                  max_threads: Optional[int] = None, max_replies: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Agrupar registros en hilos con el formato del scraper
+    (author, comment, likes, published_time, emojis, replies...).
+
+    Los comentarios repetidos (misma respuesta capturada dos veces) se
+    ignoran; las respuestas cuyo hilo no está en `records` se descartan.
+    """
+    threads: Dict[str, Dict[str, Any]] = {}
+    seen = set()
+
+    for record in records:
+        comment_id = record['comment_id']
+        if comment_id in seen or not record['author'] or not record['comment']:
+            continue
+        seen.add(comment_id)
+
+        parent_id = record['parent_id']
+        if parent_id is None:
+            if max_threads is not None and len(threads) >= max_threads:
+                continue
+            emojis = extract_emojis(record['comment'])
+            threads[comment_id] = {
+                'author': record['author'],
+                'comment': record['comment'],
+                'likes': record['likes'],
+                'published_time': record['published_time'] or "Desconocido",
+                'emojis': emojis,
+                'emoji_count': len(emojis),
+                'has_replies': record['reply_count'] > 0,
+                'replies_count': record['reply_count'],
+                'replies': []
+            }
+            continue
+
+        thread = threads.get(parent_id)
+        if thread is None or (max_replies is not None and len(thread['replies']) >= max_replies):
+            continue
+        emojis = extract_emojis(record['comment'])
+        thread['replies'].append({
+            'author': record['author'],
+            'comment': record['comment'],
+            'likes': record['likes'],
+            'emojis': emojis,
+            'emoji_count': len(emojis)
+        })
+        thread['has_replies'] = True
+        thread['replies_count'] = max(thread['replies_count'], len(thread['replies']))
+
+    return list(threads.values())
+
+
+# Contexto de cliente por defecto si la página no trae ytcfg
+DEFAULT_INNERTUBE_CONTEXT = {'client': {'clientName': 'WEB', 'clientVersion': '2.20240101.00.00', 'hl': 'es'}}
+
+_VIDEO_ID_PATTERNS = [
+    r'[?&]v=([\w-]{11})',
+    r'youtu\.be/([\w-]{11})',
+    r'/shorts/([\w-]{11})',
+    r'/embed/([\w-]{11})',
+    r'/live/([\w-]{11})'
+]
+
+
+def extract_video_id(video_url: str) -> Optional[str]:
+    """ID de 11 caracteres de una URL de YouTube (watch, youtu.be, shorts, embed, live)"""
+    for pattern in _VIDEO_ID_PATTERNS:
+        match = re.search(pattern, video_url or '')
+        if match:
+            return match.group(1)
+    return None
+
+
+def _walk(value: Any) -> Iterator[Dict[str, Any]]:
+    """Recorrer todos los diccionarios anidados (en profundidad, en orden)"""
+    if isinstance(value, dict):
+        yield value
+        for child in value.values():
+            yield from _walk(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _walk(child)
+
+
+def extract_json_var(html: str, name: str) -> Optional[Dict[str, Any]]:
+    """Objeto JSON asignado a una variable de la página (`var ytInitialData = {...};`)"""
+    for prefix in (rf'var\s+{name}\s*=\s*', rf'window\["{name}"\]\s*=\s*', rf'\b{name}\s*=\s*'):
+        match = re.search(prefix + r'\{', html)
+        if not match:
+            continue
+        try:
+            value, _ = json.JSONDecoder().raw_decode(html, match.end() - 1)
+            return value
+        except ValueError:
+            continue
+    return None
+
+
+def extract_innertube_config(html: str) -> Dict[str, Any]:
+    """Clave y contexto de la API interna (ytcfg) para pedir continuaciones"""
+    api_key = re.search(r'"INNERTUBE_API_KEY"\s*:\s*"([^"]+)"', html)
+    context = None
+    match = re.search(r'"INNERTUBE_CONTEXT"\s*:\s*\{', html)
+    if match:
+        try:
+            context, _ = json.JSONDecoder().raw_decode(html, match.end() - 1)
+        except ValueError:
+            context = None
+    return {
+        'api_key': api_key.group(1) if api_key else None,
+        'context': context or DEFAULT_INNERTUBE_CONTEXT
+    }
+
+
+def find_comments_continuation(initial_data: Dict[str, Any]) -> Optional[str]:
+    """Token de la primera página de comentarios dentro de ytInitialData"""
+    for node in _walk(initial_data):
+        section = node.get('itemSectionRenderer')
+        if section and section.get('sectionIdentifier') == 'comment-item-section':
+            for item in section.get('contents', []):
+                token = continuation_token(item.get('continuationItemRenderer'))
+                if token:
+                    return token
+
+    # Diseño con panel lateral de comentarios
+    for node in _walk(initial_data):
+        panel = node.get('engagementPanelSectionListRenderer')
+        if panel and panel.get('panelIdentifier') == 'engagement-panel-comments-section':
+            for inner in _walk(panel):
+                token = continuation_token(inner.get('continuationItemRenderer'))
+                if token:
+                    return token
+    return None
+
+
+def newest_first_continuation(data: Dict[str, Any]) -> Optional[str]:
+    """
+    Token para recargar los comentarios con orden 'más recientes primero'.
+
+    Sale del menú de orden de la cabecera de la primera página de
+    comentarios; la segunda opción es 'más recientes' (el título depende
+    del idioma, la posición no).
+    """
+    for node in _walk(data):
+        menu = node.get('sortFilterSubMenuRenderer')
+        if menu:
+            items = menu.get('subMenuItems', [])
+            if len(items) > 1:
+                return items[1].get('serviceEndpoint', {}).get('continuationCommand', {}).get('token')
+    return None
+
+
+def parse_video_metadata(player_response: Optional[Dict[str, Any]],
+                         initial_data: Optional[Dict[str, Any]] = None) -> Dict[str, Optional[str]]:
+    """
+    Título, autor y descripción desde ytInitialPlayerResponse (videoDetails),
+    completados con ytInitialData si faltan. Los campos no encontrados quedan a None.
+    """
+    details = (player_response or {}).get('videoDetails', {})
+    metadata = {
+        'video_id': details.get('videoId'),
+        'title': details.get('title'),
+        'author': details.get('author'),
+        'description': details.get('shortDescription')
+    }
+
+    for node in _walk(initial_data or {}):
+        if not metadata['title'] and 'videoPrimaryInfoRenderer' in node:
+            metadata['title'] = _text(node['videoPrimaryInfoRenderer'].get('title')) or None
+        if 'videoSecondaryInfoRenderer' in node:
+            secondary = node['videoSecondaryInfoRenderer']
+            if not metadata['author']:
+                owner = secondary.get('owner', {}).get('videoOwnerRenderer', {})
+                metadata['author'] = _text(owner.get('title')) or None
+            if not metadata['description']:
+                metadata['description'] = _text(secondary.get('attributedDescription')) or None
+    return metadata
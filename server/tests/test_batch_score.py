@@ -0,0 +1,63 @@
+"""
+Tests unitarios para el módulo ml/batch_score.py
+Verifican el reparto en shards y la validación de checkpoints del scoring offline.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from unittest.mock import MagicMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+from ml import batch_score
+
+
+@pytest.fixture
+def run_config():
+    """Configuración de ejecución de ejemplo"""
+    return {
+        'input_path': "/datos/comments.csv",
+        'input_size': 1024,
+        'text_column': "Text",
+        'shard_size': 100,
+        'total_rows': 250
+    }
+
+
+class TestBatchScore:
+    """Tests para la planificación y reanudación del scoring offline"""
+
+    def test_plan_shards(self):
+        """Test de reparto de filas en shards consecutivos"""
+        shards = batch_score.plan_shards(total_rows=250, shard_size=100)
+
+        assert [(s['start_row'], s['end_row']) for s in shards] == [(0, 100), (100, 200), (200, 250)]
+        assert [s['index'] for s in shards] == [0, 1, 2]
+
+    def test_plan_shards_empty(self):
+        """Test de fichero sin filas"""
+        assert batch_score.plan_shards(total_rows=0, shard_size=100) == []
+
+    def test_manifest_created_and_reused(self, tmp_path, run_config):
+        """Test de creación del manifest y reanudación con la misma configuración"""
+        batch_score.load_or_create_manifest(str(tmp_path), run_config)
+
+        with open(tmp_path / batch_score.MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            assert json.load(f) == run_config
+
+        assert batch_score.load_or_create_manifest(str(tmp_path), dict(run_config)) == run_config
+
+    def test_manifest_mismatch(self, tmp_path, run_config):
+        """Test de error al reutilizar un directorio de otra ejecución"""
+        batch_score.load_or_create_manifest(str(tmp_path), run_config)
+
+        with pytest.raises(ValueError):
+            batch_score.load_or_create_manifest(str(tmp_path), {**run_config, 'shard_size': 50})
@@ -0,0 +1,237 @@
+"""
+Tests unitarios para el módulo scraper/browser_pool.py
+Verifican el préstamo, reseteo y reciclado de sesiones sin lanzar Chrome.
+"""
+
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar
+for module in ['dotenv', 'selenium', 'selenium.webdriver', 'selenium.webdriver.chrome',
+               'selenium.webdriver.chrome.service', 'selenium.webdriver.chrome.options',
+               'webdriver_manager', 'webdriver_manager.chrome']:
+    sys.modules.setdefault(module, MagicMock())
+
+
+class FakeElement:
+    """WebElement falso: recuerda en qué pestaña se encontró"""
+
+    def __init__(self, driver, handle):
+        self.driver = driver
+        self.handle = handle
+
+    @property
+    def text(self):
+        assert self.driver.current_window_handle == self.handle, "elemento leído desde otra pestaña"
+        return f"texto de {self.handle}"
+
+
+sys.modules.setdefault('selenium.webdriver.remote.webelement', MagicMock(WebElement=FakeElement))
+
+from scraper import browser_pool
+from scraper.browser_pool import BrowserPool, build_chrome_options
+
+
+class FakeDriver:
+    """Driver falso que registra las llamadas del pool"""
+
+    def __init__(self):
+        self.alive = True
+        self.visited = []
+        self.cookies_cleared = 0
+        self.quit_called = False
+        self.window_handles = ["base"]
+        self.current_window_handle = "base"
+        self.switch_to = MagicMock()
+        self.switch_to.window.side_effect = self._switch
+        self.switch_to.new_window.side_effect = self._new_window
+        self.scripts = []
+
+    def _switch(self, handle):
+        assert handle in self.window_handles
+        self.current_window_handle = handle
+
+    def _new_window(self, kind):
+        handle = f"tab{len(self.window_handles)}"
+        self.window_handles.append(handle)
+        self.current_window_handle = handle
+
+    def close(self):
+        self.window_handles.remove(self.current_window_handle)
+
+    def find_element(self, by, selector):
+        return FakeElement(self, self.current_window_handle)
+
+    def execute_script(self, script, *args):
+        if not self.alive:
+            raise RuntimeError("chrome no responde")
+        self.scripts.append((self.current_window_handle, script))
+        return 1 if script == "return 1" else None
+
+    def delete_all_cookies(self):
+        self.cookies_cleared += 1
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def drivers():
+    """Lista de drivers creados por el pool"""
+    return []
+
+
+@pytest.fixture
+def factory(drivers):
+    """Factoría de drivers falsos que los registra en `drivers`"""
+    def create():
+        driver = FakeDriver()
+        drivers.append(driver)
+        return driver
+    return create
+
+
+@pytest.fixture
+def pool(factory):
+    return BrowserPool(size=2, max_uses=3, acquire_timeout=1, driver_factory=factory)
+
+
+class TestBrowserPool:
+    """Tests para el pool de navegadores"""
+
+    def test_reuses_and_resets_session(self, pool, drivers):
+        """Test de reutilización de la sesión y reseteo al devolverla"""
+        with pool.borrow() as browser:
+            first_id = browser.id
+        with pool.borrow() as browser:
+            assert browser.id == first_id
+
+        assert len(drivers) == 1
+        assert drivers[0].visited == ["about:blank", "about:blank"]
+        assert drivers[0].cookies_cleared == 2
+
+    def test_warm_launches_sessions(self, pool, drivers):
+        """Test de precalentado del pool"""
+        pool.warm()
+
+        metrics = pool.get_metrics()
+        assert metrics['idle'] == 2
+        assert metrics['created'] == 2
+
+    def test_recycles_after_max_uses(self, pool, drivers):
+        """Test de reciclado tras el número máximo de usos"""
+        for _ in range(4):
+            with pool.borrow():
+                pass
+
+        assert len(drivers) == 2
+        assert drivers[0].quit_called
+        assert pool.get_metrics()['recycled']['max_uses'] == 1
+
+    def test_recycles_on_error(self, pool, drivers):
+        """Test de reciclado cuando el trabajo falla"""
+        with pytest.raises(ValueError):
+            with pool.borrow():
+                raise ValueError("fallo de scraping")
+
+        assert drivers[0].quit_called
+        assert pool.get_metrics()['recycled']['error'] == 1
+        assert pool.get_metrics()['in_use'] == 0
+
+    def test_unhealthy_session_replaced(self, pool, drivers):
+        """Test de health-check: una sesión muerta no se presta"""
+        with pool.borrow():
+            pass
+        drivers[0].alive = False
+
+        with pool.borrow() as browser:
+            assert browser.driver is drivers[1]
+        assert pool.get_metrics()['recycled']['unhealthy'] == 1
+
+    def test_bounded_size(self, pool):
+        """Test de límite de sesiones simultáneas"""
+        first = pool.acquire()
+        second = pool.acquire()
+
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.05)
+
+        released = threading.Timer(0.05, pool.release, args=(first,))
+        released.start()
+        third = pool.acquire(timeout=2)
+        assert third is first
+
+        pool.release(second)
+        pool.release(third)
+        assert pool.get_metrics()['acquire_timeouts'] == 1
+
+    def test_network_log_only_for_network_extraction(self, monkeypatch):
+        """Test de que el performance log de Chrome solo se activa para la extracción 'network'"""
+        def logging_prefs(**kwargs):
+            monkeypatch.setattr(browser_pool, "Options", MagicMock())
+            options = build_chrome_options(**kwargs)
+            return [c for c in options.set_capability.call_args_list if c.args[0] == "goog:loggingPrefs"]
+
+        monkeypatch.setattr(browser_pool.setting, "scraper_extraction_mode", "bulk")
+        assert logging_prefs() == []
+        assert logging_prefs(network_log=True)
+
+        monkeypatch.setattr(browser_pool.setting, "scraper_extraction_mode", "network")
+        assert logging_prefs()
+        assert logging_prefs(network_log=False) == []
+
+    def test_close_quits_borrowed_sessions(self, pool, drivers):
+        """Test de que una sesión prestada durante close() se cierra al devolverla"""
+        idle = pool.acquire()
+        borrowed = pool.acquire()
+        pool.release(idle)
+
+        pool.close()
+        assert drivers[0].quit_called and not drivers[1].quit_called
+
+        pool.release(borrowed)
+        assert drivers[1].quit_called
+        assert pool.get_metrics()['idle'] == 0
+
+
+class TestBrowserTabs:
+    """Tests de varias pestañas por navegador"""
+
+    def test_tabs_packed_per_browser(self, factory, drivers):
+        """Test de que las pestañas llenan un navegador antes de lanzar otro"""
+        pool = BrowserPool(size=2, max_uses=10, acquire_timeout=0.1, max_tabs=2, driver_factory=factory)
+
+        tabs = [pool.acquire_tab() for _ in range(4)]
+        assert [tab.browser.driver for tab in tabs] == [drivers[0], drivers[0], drivers[1], drivers[1]]
+        with pytest.raises(TimeoutError):
+            pool.acquire_tab()
+        assert pool.get_metrics()['tabs']['open'] == 4
+
+        for tab in tabs:
+            pool.release_tab(tab)
+
+        metrics = pool.get_metrics()
+        assert (metrics['idle'], metrics['in_use'], metrics['tabs']['closed']) == (2, 0, 4)
+        assert drivers[0].window_handles == ["base"]
+
+    def test_tab_driver_switches_window(self, factory, drivers):
+        """Test de que cada pestaña ejecuta sus comandos (y lee sus elementos) en su ventana"""
+        pool = BrowserPool(size=1, max_uses=10, acquire_timeout=0.1, max_tabs=2, driver_factory=factory)
+        first, second = pool.acquire_tab(), pool.acquire_tab()
+
+        element = first.driver.find_element("css", "#title")
+        second.driver.execute_script("scroll")
+        first.driver.execute_script("scroll")
+
+        assert element.text == f"texto de {first.handle}"
+        assert drivers[0].scripts == [(second.handle, "scroll"), (first.handle, "scroll")]
@@ -0,0 +1,74 @@
+"""
+Tests unitarios para el módulo ml/bulk_jobs.py
+Verifican la limpieza de los trabajos de análisis masivo: borrado del fichero
+subido, caducidad de los trabajos terminados y borrado manual.
+"""
+
+import asyncio
+import os
+import sys
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, AsyncMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv; progress_manager, fastapi)
+sys.modules.setdefault('dotenv', MagicMock())
+sys.modules.setdefault('fastapi', MagicMock())
+
+from ml import bulk_jobs
+from ml.bulk_jobs import BulkJobManager
+
+
+class FakeScheduler:
+    """Scheduler que responde al momento: no tóxico"""
+
+    def submit(self, texts, priority):
+        future = Future()
+        future.set_result([{'is_toxic': False, 'toxicity_confidence': 0.1, 'categories_detected': [],
+                            'category_scores': {}} for _ in texts])
+        return future
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_jobs, "progress_manager", MagicMock(send_progress=AsyncMock(),
+                                                                 send_completion=AsyncMock()))
+    return BulkJobManager(jobs_dir=str(tmp_path), ttl=60)
+
+
+class TestBulkJobCleanup:
+    """Tests de la limpieza de trabajos masivos"""
+
+    def test_input_removed_after_job(self, manager):
+        """Test de que al terminar solo queda el CSV de resultados"""
+        job = manager.create_job("comentarios.csv")
+        with open(job['input_path'], 'w', encoding='utf-8') as f:
+            f.write("text\nhola\nadiós\n")
+
+        asyncio.run(manager.run_job(job['job_id'], FakeScheduler()))
+
+        assert job['status'] == 'completed'
+        assert job['processed_rows'] == 2
+        assert not os.path.exists(job['input_path'])
+        assert os.path.exists(job['output_path'])
+
+    def test_sweep_and_delete(self, manager, tmp_path):
+        """Test de caducidad de trabajos terminados y de que no se borra uno sin terminar"""
+        old, recent, pending = (manager.create_job("a.csv") for _ in range(3))
+        old['status'] = recent['status'] = 'completed'
+        old['finished_at'] = (datetime.now() - timedelta(seconds=120)).isoformat()
+        recent['finished_at'] = datetime.now().isoformat()
+
+        assert manager.sweep() == 1
+        assert manager.get_job(old['job_id']) is None
+        assert not (tmp_path / old['job_id']).exists()
+
+        assert manager.delete_job(pending['job_id']) is False
+        assert manager.delete_job(recent['job_id']) is True
+        assert sorted(p.name for p in tmp_path.iterdir()) == [pending['job_id']]
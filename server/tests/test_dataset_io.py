@@ -0,0 +1,94 @@
+"""
+Tests unitarios para el módulo ml/dataset_io.py
+Verifican la lectura en streaming de ficheros CSV/JSONL usada por el análisis masivo.
+"""
+
+import csv
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from ml import dataset_io
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    """CSV de ejemplo con la misma cabecera que los datasets de mlFlow/data/raw"""
+    path = tmp_path / "comments.csv"
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["CommentId", "VideoId", "Text"])
+        for i in range(5):
+            writer.writerow([f"c{i}", "v1", f"comentario, número {i}"])
+    return str(path)
+
+
+@pytest.fixture
+def sample_jsonl(tmp_path):
+    """JSONL de ejemplo con una línea vacía intercalada"""
+    path = tmp_path / "comments.jsonl"
+    lines = [json.dumps({"comment": f"texto {i}"}) for i in range(3)]
+    path.write_text("\n".join(lines[:2] + [""] + lines[2:]) + "\n", encoding='utf-8')
+    return str(path)
+
+
+class TestDatasetIO:
+    """Tests para la lectura de ficheros de entrada"""
+
+    def test_detect_format(self):
+        """Test de detección de formato por extensión"""
+        assert dataset_io.detect_format("datos.CSV") == 'csv'
+        assert dataset_io.detect_format("datos.jsonl") == 'jsonl'
+
+        with pytest.raises(ValueError):
+            dataset_io.detect_format("datos.xlsx")
+
+    def test_resolve_text_column_auto(self, sample_csv):
+        """Test de detección automática de la columna de texto"""
+        assert dataset_io.resolve_text_column(sample_csv, 'csv') == "Text"
+
+    def test_resolve_text_column_missing(self, sample_csv):
+        """Test de error cuando la columna indicada no existe"""
+        with pytest.raises(ValueError):
+            dataset_io.resolve_text_column(sample_csv, 'csv', "no_existe")
+
+    def test_count_rows(self, sample_csv, sample_jsonl):
+        """Test de conteo de filas sin cabecera ni líneas vacías"""
+        assert dataset_io.count_rows(sample_csv, 'csv') == 5
+        assert dataset_io.count_rows(sample_jsonl, 'jsonl') == 3
+
+    def test_iter_text_chunks(self, sample_csv):
+        """Test de lectura en trozos manteniendo el índice de fila"""
+        chunks = list(dataset_io.iter_text_chunks(sample_csv, 'csv', "Text", chunk_size=2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert chunks[0][0] == {'row_index': 0, 'text': "comentario, número 0"}
+        assert chunks[-1][0]['row_index'] == 4
+
+    def test_iter_text_chunks_range(self, sample_jsonl):
+        """Test de lectura de un rango de filas"""
+        chunks = list(dataset_io.iter_text_chunks(sample_jsonl, 'jsonl', "comment", chunk_size=10,
+                                                  start_row=1, end_row=3))
+
+        assert [row['row_index'] for row in chunks[0]] == [1, 2]
+
+    def test_csv_result_writer(self, tmp_path):
+        """Test de escritura incremental de resultados"""
+        path = str(tmp_path / "results.csv")
+        writer = dataset_io.CsvResultWriter(path)
+        row = {'row_index': 0, 'text': "hola"}
+        prediction = {'is_toxic': True, 'toxicity_confidence': 0.9, 'categories_detected': ['IsToxic', 'IsAbusive']}
+        writer.write_rows([dataset_io.to_output_row(row, prediction)])
+        writer.close()
+
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+
+        assert writer.rows_written == 1
+        assert rows[0]['categories_detected'] == "IsToxic|IsAbusive"
+        assert rows[0]['is_toxic'] == "True"
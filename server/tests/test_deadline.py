@@ -0,0 +1,67 @@
+"""
+Tests unitarios para el módulo core/deadline.py
+Verifican el plazo por petición con el máximo del servidor, el reparto entre fases
+y la cancelación del trabajo.
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+from core.deadline import Deadline, setting
+
+
+class TestDeadline:
+    """Tests del plazo de un trabajo"""
+
+    def test_for_request_clamped(self, monkeypatch):
+        """Test del plazo por defecto, del pedido y del recorte al máximo del servidor"""
+        monkeypatch.setattr(setting, "job_deadline_default", 300)
+        monkeypatch.setattr(setting, "job_deadline_max", 600)
+
+        assert round(Deadline.for_request().seconds) == 300
+        assert round(Deadline.for_request(45).seconds) == 45
+        assert round(Deadline.for_request(3600).seconds) == 600
+
+        monkeypatch.setattr(setting, "job_deadline_default", 0)
+        monkeypatch.setattr(setting, "job_deadline_max", 0)
+        unlimited = Deadline.for_request()
+        assert unlimited.remaining() is None and not unlimited.expired()
+        assert unlimited.timeout(30) == 30
+
+    def test_share_and_expiry(self):
+        """Test del plazo de una fase y de los timeouts acotados"""
+        deadline = Deadline(10)
+        scrape = deadline.share(0.5)
+
+        assert 4.9 < scrape.remaining() <= 5
+        assert deadline.timeout(2) == 2
+        assert deadline.timeout(60) <= 10
+
+        expired = Deadline(0.01)
+        time.sleep(0.02)
+        assert expired.expired() and expired.remaining() == 0.0
+        assert expired.share(0.7).expired()
+
+    def test_cancel(self):
+        """Test de que cancelar agota el plazo del trabajo y de sus fases y avisa una sola vez"""
+        deadline = Deadline()
+        scrape = deadline.share(0.7)
+        calls = []
+        deadline.on_cancel(lambda: calls.append("cancelado"))
+
+        assert deadline.cancel("cliente desconectado") is True
+        assert deadline.cancel("otra vez") is False
+
+        assert calls == ["cancelado"]
+        assert deadline.expired() and deadline.remaining() == 0.0
+        assert scrape.cancelled and scrape.cancel_reason == "cliente desconectado"
+        deadline.on_cancel(lambda: calls.append("tarde"))
+        assert calls == ["cancelado", "tarde"]
@@ -0,0 +1,92 @@
+"""
+Tests unitarios para el módulo scraper/dom_extract.py
+Verifican que los hilos devueltos por el script de extracción en bloque
+se convierten al mismo formato que la extracción elemento a elemento.
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+from scraper.dom_extract import parse_count, build_thread, MAX_REPLIES_PER_THREAD
+
+
+def no_emojis(text):
+    return []
+
+
+@pytest.fixture
+def raw_thread():
+    """Hilo tal como lo devuelve EXTRACT_THREADS_JS"""
+    return {
+        'index': 0,
+        'author': ' @usuario ',
+        'comment': 'Gran video',
+        'likes': '1.5K',
+        'published_time': 'hace 2 días',
+        'replies_button': {'text': '12 respuestas', 'aria': ''},
+        'replies': [{'author': '@otro', 'comment': f'respuesta {i}', 'likes': ''} for i in range(10)]
+    }
+
+
+class TestParseCount:
+    """Tests para la conversión de contadores de likes"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ('', 0), (None, 0), ('42', 42), ('1.5K', 1500), ('2M', 2000000), ('abc', 0), ('K', 0)
+    ])
+    def test_parse_count(self, text, expected):
+        """Test de contadores con sufijos K/M y valores inválidos"""
+        assert parse_count(text) == expected
+
+
+class TestBuildThread:
+    """Tests para la construcción de hilos desde el JSON del navegador"""
+
+    def test_same_fields_as_element_extraction(self, raw_thread):
+        """Test de campos y valores del hilo"""
+        thread = build_thread(raw_thread, no_emojis)
+
+        assert set(thread) == {'author', 'comment', 'likes', 'published_time', 'emojis',
+                               'emoji_count', 'has_replies', 'replies_count', 'replies'}
+        assert thread['author'] == '@usuario'
+        assert thread['likes'] == 1500
+        assert thread['has_replies'] is True
+        assert thread['replies_count'] == 12
+
+    def test_replies_limited(self, raw_thread):
+        """Test del límite de respuestas por hilo"""
+        thread = build_thread(raw_thread, no_emojis)
+
+        assert len(thread['replies']) == MAX_REPLIES_PER_THREAD
+        assert thread['replies'][0] == {'author': '@otro', 'comment': 'respuesta 0', 'likes': 0,
+                                        'emojis': [], 'emoji_count': 0}
+
+    def test_replies_beyond_legacy_limit(self, raw_thread):
+        """Test de más de 8 respuestas cuando se amplía el límite"""
+        thread = build_thread(raw_thread, no_emojis, max_replies=50)
+
+        assert len(thread['replies']) == 10
+        assert thread['replies_count'] == 12
+
+    def test_invalid_thread_skipped(self, raw_thread):
+        """Test de hilos sin autor o sin texto"""
+        raw_thread['comment'] = None
+        assert build_thread(raw_thread, no_emojis) is None
+
+    def test_emojis_extracted(self, raw_thread):
+        """Test de que los emojis se cuentan con la función del scraper"""
+        raw_thread['replies'] = []
+        thread = build_thread(raw_thread, lambda text: ['🎉'])
+
+        assert thread['emojis'] == ['🎉']
+        assert thread['emoji_count'] == 1
+        assert thread['published_time'] == 'hace 2 días'
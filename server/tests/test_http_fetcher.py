@@ -0,0 +1,150 @@
+"""
+Tests del backend HTTP del scraper (scraper/http_fetcher.py)
+Se ejecutan contra el servidor local de replay con páginas grabadas (tests/fixtures/replay).
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+pytest.importorskip("requests")
+
+from scraper.http_fetcher import HttpCommentFetcher, HttpFetchError
+from scraper.incremental import IncrementalTracker, comment_fingerprint
+from scraper.replay_server import ReplayServer
+from core.deadline import Deadline
+from scraper.yt_parser import extract_video_id, extract_json_var, find_comments_continuation, parse_video_metadata
+
+REPLAY_DIR = Path(__file__).parent / "fixtures" / "replay"
+VIDEO_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10s"
+
+
+def no_emojis(text):
+    return []
+
+
+@pytest.fixture
+def replay():
+    """Servidor de replay arrancado en un puerto libre"""
+    with ReplayServer(str(REPLAY_DIR)) as server:
+        yield server
+
+
+class TestPageParsing:
+    """Tests de lectura de la página de watch"""
+
+    @pytest.mark.parametrize("url", [
+        VIDEO_URL, "https://youtu.be/dQw4w9WgXcQ?si=x", "https://www.youtube.com/shorts/dQw4w9WgXcQ"
+    ])
+    def test_extract_video_id(self, url):
+        """Test de formatos de URL de YouTube"""
+        assert extract_video_id(url) == "dQw4w9WgXcQ"
+
+    def test_initial_data_token(self):
+        """Test de ytInitialData y token de la primera página de comentarios"""
+        html = (REPLAY_DIR / "watch" / "dQw4w9WgXcQ.html").read_text(encoding="utf-8")
+
+        initial_data = extract_json_var(html, "ytInitialData")
+        assert find_comments_continuation(initial_data) == "COMMENTS_PAGE_1"
+        assert extract_json_var(html, "ytNoExiste") is None
+
+    def test_embedded_metadata_subset(self):
+        """Test de que el subconjunto que devuelve PAGE_METADATA_JS da los mismos metadatos que la página entera"""
+        html = (REPLAY_DIR / "watch" / "dQw4w9WgXcQ.html").read_text(encoding="utf-8")
+        player = extract_json_var(html, "ytInitialPlayerResponse")
+        initial_data = extract_json_var(html, "ytInitialData")
+        contents = initial_data['contents']['twoColumnWatchNextResults']['results']['results']['contents']
+        subset = {'contents': [c for c in contents
+                               if 'videoPrimaryInfoRenderer' in c or 'videoSecondaryInfoRenderer' in c]}
+
+        metadata = parse_video_metadata({'videoDetails': player['videoDetails']}, subset)
+        assert metadata == parse_video_metadata(player, initial_data)
+        assert (metadata['video_id'], metadata['author']) == ("dQw4w9WgXcQ", "Canal de Prueba")
+
+        # Sin ytInitialPlayerResponse, título y autor salen de los renderers
+        fallback = parse_video_metadata(None, subset)
+        assert fallback['title'] and fallback['author'] == "Canal de Prueba"
+
+
+class TestHttpCommentFetcher:
+    """Tests del backend HTTP contra el servidor de replay"""
+
+    def test_fetch_threads_and_replies(self, replay):
+        """Test de metadatos, paginación de hilos y respuestas con 'mostrar más'"""
+        fetcher = HttpCommentFetcher(base_url=replay.base_url, max_concurrency=2)
+
+        page = fetcher.fetch(VIDEO_URL, 50, no_emojis)
+
+        assert page['title'] == "Video de prueba para el replay"
+        assert page['author'] == "Canal de Prueba"
+        assert len(page['threads']) == 5
+        assert [r['author'] for r in page['threads'][0]['replies']] == ["@pedro", "@marta", "@luis"]
+        assert page['stats']['comment_pages'] == 2
+        assert page['stats']['reply_pages'] == 2
+
+    def test_stops_at_max_comments(self, replay):
+        """Test de que no se piden más páginas de las necesarias"""
+        fetcher = HttpCommentFetcher(base_url=replay.base_url)
+
+        page = fetcher.fetch(VIDEO_URL, 2, no_emojis)
+
+        assert len(page['threads']) == 2
+        assert page['stats']['comment_pages'] == 1
+
+    def test_thread_callback_per_page(self, replay):
+        """Test de entrega de hilos por páginas (con sus respuestas) antes de terminar"""
+        batches = []
+        fetcher = HttpCommentFetcher(base_url=replay.base_url)
+
+        page = fetcher.fetch(VIDEO_URL, 50, no_emojis, thread_callback=batches.append)
+
+        assert [len(batch) for batch in batches] == [3, 2]
+        assert batches[0][0] is page['threads'][0]
+        assert len(batches[0][0]['replies']) == 3
+
+    def test_incremental_newest_first(self, replay):
+        """Test de re-scraping incremental: orden por recientes y parada en la racha de conocidos"""
+        known = [comment_fingerprint("@ana_garcia", "Gran video, muy bien explicado 🎉"),
+                 comment_fingerprint("@pedro", "No estoy de acuerdo con el minuto 3")]
+        tracker = IncrementalTracker(known, stop_after=2)
+        fetcher = HttpCommentFetcher(base_url=replay.base_url)
+
+        page = fetcher.fetch(VIDEO_URL, 50, no_emojis, incremental=tracker)
+
+        assert [t['author'] for t in page['threads']] == ["@nuevo"]
+        assert page['stats']['comment_pages'] == 1
+        assert tracker.get_stats()['sorted_newest'] is True
+        assert tracker.stopped is True
+
+    def test_deadline_returns_partial(self):
+        """Test de que al agotarse el plazo se devuelven los hilos ya descargados marcados como parciales"""
+        with ReplayServer(str(REPLAY_DIR), latency=0.3) as slow:
+            fetcher = HttpCommentFetcher(base_url=slow.base_url)
+            # Página de watch y primera página de hilos dentro del plazo; la segunda no
+            page = fetcher.fetch(VIDEO_URL, 50, no_emojis, deadline=Deadline(0.75))
+
+        assert page['partial'] is True
+        assert len(page['threads']) == 3
+        assert page['threads'][0]['replies'] == []  # las respuestas llegaban después del plazo
+
+    def test_unknown_video(self, replay):
+        """Test de vídeo sin página grabada (404)"""
+        fetcher = HttpCommentFetcher(base_url=replay.base_url)
+
+        with pytest.raises(Exception):
+            fetcher.fetch("https://www.youtube.com/watch?v=AAAAAAAAAAA", 10, no_emojis)
+
+    def test_invalid_url(self, replay):
+        """Test de URL sin ID de vídeo"""
+        fetcher = HttpCommentFetcher(base_url=replay.base_url)
+
+        with pytest.raises(HttpFetchError):
+            fetcher.fetch("https://example.com/video", 10, no_emojis)
@@ -0,0 +1,62 @@
+"""
+Tests unitarios para el módulo scraper/incremental.py
+Verifican las huellas de comentarios y la parada tras una racha de comentarios ya guardados.
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+from scraper.incremental import comment_fingerprint, legacy_fingerprint, IncrementalTracker
+
+
+class TestCommentFingerprint:
+    """Tests de la huella de un comentario"""
+
+    def test_normalized(self):
+        """Test de que espacios y mayúsculas del autor no cambian la huella"""
+        assert comment_fingerprint(" @Ana ", "Gran  video\n") == comment_fingerprint("@ana", "Gran video")
+
+    def test_different_text(self):
+        """Test de que el texto distingue comentarios del mismo autor"""
+        assert comment_fingerprint("@ana", "Gran video") != comment_fingerprint("@ana", "Mal video")
+
+
+class TestIncrementalTracker:
+    """Tests del seguimiento de comentarios conocidos"""
+
+    def test_stops_after_run_of_known(self):
+        """Test de parada tras `stop_after` conocidos seguidos (el fijado no cuenta como racha)"""
+        known = [comment_fingerprint("@a", f"viejo {i}") for i in range(5)]
+        tracker = IncrementalTracker(known, stop_after=3)
+
+        assert tracker.is_new("@a", "viejo 0") is False  # comentario fijado
+        assert tracker.is_new("@b", "nuevo 1") is True
+        assert tracker.is_new("@b", "nuevo 2") is True
+        for i in range(1, 4):
+            assert tracker.is_new("@a", f"viejo {i}") is False
+
+        assert tracker.stopped is True
+        assert tracker.get_stats() == {'known_threads': 5, 'known_seen': 4, 'new_threads': 2,
+                                       'sorted_newest': False, 'stopped_early': True}
+
+    def test_no_stop_without_newest_sort(self):
+        """Test de que sin orden por recientes solo se filtra"""
+        tracker = IncrementalTracker([comment_fingerprint("@a", "viejo")], stop_after=1)
+        tracker.allow_stop = False
+
+        assert tracker.is_new("@a", "viejo") is False
+        assert tracker.stopped is False
+
+    def test_legacy_rows_without_author(self):
+        """Test de que los hilos guardados sin autor se reconocen por el texto"""
+        tracker = IncrementalTracker([legacy_fingerprint("viejo sin autor")], stop_after=5)
+
+        assert tracker.is_new("@a", "viejo sin autor") is False
+        assert tracker.is_new("@a", "nuevo") is True
@@ -0,0 +1,104 @@
+"""
+Tests unitarios para el módulo scraper/job_queue.py
+Verifican la concurrencia limitada, el reparto por usuario y las posiciones en cola.
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+from scraper.job_queue import ScrapeJobQueue, QueueFullError
+
+
+async def run_jobs(queue, users, order, positions):
+    """Encolar un trabajo por usuario de `users` (en ese orden) mientras hay uno ocupando el hueco"""
+    release_first = asyncio.Event()
+
+    async def job(index, user):
+        async with queue.slot(user, lambda pos: positions.setdefault(index, []).append(pos)):
+            order.append(index)
+            if index == 0:
+                await release_first.wait()
+
+    tasks = []
+    for index, user in enumerate(users):
+        tasks.append(asyncio.ensure_future(job(index, user)))
+        await asyncio.sleep(0)
+    release_first.set()
+    await asyncio.gather(*tasks)
+
+
+class TestScrapeJobQueue:
+    """Tests de la cola de trabajos de scraping"""
+
+    def test_round_robin_between_users(self):
+        """Test de que una ráfaga de un usuario no adelanta a los demás"""
+        queue = ScrapeJobQueue(concurrency=1, max_depth=10)
+        order, positions = [], {}
+
+        asyncio.run(run_jobs(queue, ["a", "a", "a", "a", "b", "c"], order, positions))
+
+        assert order == [0, 1, 4, 5, 2, 3]
+        assert positions[4] == [2, 1]  # con 3 de 'a' esperando, entra directamente 2º
+        metrics = queue.get_metrics()
+        assert (metrics['running'], metrics['depth'], metrics['started']) == (0, 0, 6)
+        assert metrics['wait']['count'] == 6
+
+    def test_rejects_when_full(self):
+        """Test de rechazo con la cola llena"""
+        queue = ScrapeJobQueue(concurrency=1, max_depth=1)
+
+        async def scenario():
+            await queue.acquire("a")
+            waiting = asyncio.ensure_future(queue.acquire("b"))
+            await asyncio.sleep(0)
+            assert queue.is_full()
+            with pytest.raises(QueueFullError):
+                await queue.acquire("c")
+            queue.release()
+            await waiting
+            queue.release()
+
+        asyncio.run(scenario())
+        assert queue.stats['rejected'] == 1
+
+    def test_cancelled_waiter_leaves_queue(self):
+        """Test de que un trabajo cancelado mientras espera sale de la cola"""
+        queue = ScrapeJobQueue(concurrency=1, max_depth=5)
+
+        async def scenario():
+            await queue.acquire("a")
+            waiting = asyncio.ensure_future(queue.acquire("b"))
+            await asyncio.sleep(0)
+            waiting.cancel()
+            await asyncio.sleep(0)
+            assert queue.depth() == 0
+            queue.release()
+
+        asyncio.run(scenario())
+        assert queue.get_metrics()['running'] == 0
+        assert queue.stats['cancelled'] == 1
+
+    def test_waiter_times_out(self):
+        """Test de que un trabajo sin hueco dentro de su plazo sale de la cola con TimeoutError"""
+        queue = ScrapeJobQueue(concurrency=1, max_depth=5)
+
+        async def scenario():
+            await queue.acquire("a")
+            with pytest.raises(asyncio.TimeoutError):
+                await queue.acquire("b", timeout=0.01)
+            assert queue.depth() == 0
+            queue.release()
+
+        asyncio.run(scenario())
+        assert queue.stats['timed_out'] == 1
+        assert queue.get_metrics()['running'] == 0
@@ -0,0 +1,171 @@
+"""
+Tests del puente de progreso entre hilos (scraper/progress_manager.py)
+El scraper publica desde hilos del executor y el event loop principal envía
+los mensajes, con un máximo de mensajes por segundo y sesión. Los trabajos
+que nadie sigue se cancelan.
+"""
+
+import sys
+import json
+import asyncio
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar
+sys.modules.setdefault('dotenv', MagicMock())
+sys.modules.setdefault('fastapi', MagicMock())
+
+from scraper.progress_manager import ProgressManager
+from core.single_flight import SingleFlight
+from core.deadline import Deadline
+
+
+class FakeWebSocket:
+    """WebSocket que guarda los mensajes enviados"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.messages.append(json.loads(text))
+
+
+async def run_session(manager, worker):
+    """Conectar una sesión y ejecutar `worker` en un hilo del executor"""
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "sesion")
+    await asyncio.get_running_loop().run_in_executor(None, worker)
+    await asyncio.sleep(0.3)
+    return websocket.messages
+
+
+class TestProgressBridge:
+    """Tests de publicación de progreso desde hilos"""
+
+    def test_updates_coalesced(self):
+        """Test de que las ráfagas se agrupan y el último progreso siempre llega"""
+        manager = ProgressManager(max_rate=5)
+
+        def worker():
+            for i in range(50):
+                manager.post_progress("sesion", i, f"paso {i}")
+
+        messages = asyncio.run(run_session(manager, worker))
+
+        assert 1 <= len(messages) <= 3
+        assert messages[-1]['percentage'] == 49
+        assert manager.stats['posted'] == 50
+        assert manager.stats['coalesced'] >= 47
+
+    def test_completion_after_pending_progress(self):
+        """Test de que la finalización llega después del último progreso"""
+        manager = ProgressManager(max_rate=1)
+
+        def worker():
+            manager.post_progress("sesion", 10, "inicio")
+            manager.post_progress("sesion", 90, "casi")
+            manager.post_completion("sesion", False, error="fallo")
+
+        messages = asyncio.run(run_session(manager, worker))
+
+        assert [m['type'] for m in messages][-2:] == ["progress", "completion"]
+        assert messages[-2]['percentage'] == 90
+        assert "sesion" not in manager.active_connections
+
+    def test_without_loop_or_session(self):
+        """Test de publicación sin loop o sin cliente conectado (no falla)"""
+        manager = ProgressManager(max_rate=5)
+
+        manager.post_progress("sesion", 50, "sin loop")
+        # No se envía, pero se guarda para enviarlo cuando el cliente conecte
+        assert manager.progress_data["sesion"]['percentage'] == 50
+        manager.post_completion("sesion", True)
+
+        assert manager.stats['dropped'] == 1
+        assert manager.stats['sent'] == 0
+        assert "sesion" not in manager.progress_data
+
+
+class TestCoalescedSessions:
+    """Tests de sesiones unidas a un trabajo en curso"""
+
+    def test_follower_receives_progress_and_completion(self):
+        """Test de que la sesión unida recibe el último progreso al conectar, el resto y la finalización"""
+        manager = ProgressManager(max_rate=5)
+        leader, follower = FakeWebSocket(), FakeWebSocket()
+
+        async def scenario():
+            await manager.connect(leader, "lider")
+            await manager.send_progress("lider", 30, "scraping")
+            assert manager.attach("lider", "seguidor")
+            await manager.connect(follower, "seguidor")
+            await manager.send_progress("lider", 60, "analizando")
+            await manager.send_completion("lider", True, {'total': 1})
+
+        asyncio.run(scenario())
+
+        assert [m.get('percentage') for m in follower.messages] == [30, 60, None]
+        assert follower.messages[-1]['data'] == {'total': 1}
+        assert leader.messages[-1]['type'] == "completion"
+        assert manager.active_connections == {}
+
+    def test_single_flight_registry(self):
+        """Test del registro de trabajos en curso y de la liberación por el líder"""
+        jobs = SingleFlight()
+        key = ("abc", 50, False)
+
+        jobs.start(key, "lider")
+        jobs.follow(key)
+        jobs.follow(key)
+        jobs.finish(key, "otra")
+
+        assert jobs.leader(key) == "lider"
+        assert jobs.get_metrics()['followers_in_flight'] == 2
+
+        jobs.finish(key, "lider")
+        metrics = jobs.get_metrics()
+        assert jobs.leader(key) is None
+        assert (metrics['started'], metrics['coalesced'], metrics['max_followers']) == (1, 2, 2)
+
+
+class TestJobCancellation:
+    """Tests de la cancelación de trabajos que ya nadie sigue"""
+
+    def test_disconnect_cancels_after_grace(self):
+        """Test de que solo se cancela el trabajo cuyo cliente no vuelve dentro del periodo de gracia"""
+        manager = ProgressManager(max_rate=5, cancel_grace=0.1)
+        abandoned, resumed = Deadline(), Deadline()
+
+        async def scenario():
+            for session_id, job in (("abandonada", abandoned), ("recuperada", resumed)):
+                await manager.connect(FakeWebSocket(), session_id)
+                manager.track(session_id, job)
+                manager.disconnect(session_id)
+            await manager.connect(FakeWebSocket(), "recuperada")
+            await asyncio.sleep(0.3)
+
+        asyncio.run(scenario())
+
+        assert abandoned.cancelled and not resumed.cancelled
+        assert manager.stats['jobs_cancelled'] == 1
+
+    def test_cancel_with_followers(self):
+        """Test de que cancelar con sesiones unidas conectadas solo suelta a quien cancela"""
+        manager = ProgressManager(max_rate=5)
+        job = Deadline()
+
+        async def scenario():
+            await manager.connect(FakeWebSocket(), "lider")
+            manager.track("lider", job)
+            assert manager.attach("lider", "seguidor")
+            await manager.connect(FakeWebSocket(), "seguidor")
+            return [manager.cancel("lider"), job.cancelled, manager.cancel("seguidor"), manager.cancel("otra")]
+
+        assert asyncio.run(scenario()) == ['detached', False, 'cancelled', 'not_found']
+        assert job.cancel_reason == "cancelado por el cliente"
@@ -0,0 +1,74 @@
+"""
+Tests unitarios para el módulo scraper/resource_blocking.py
+Verifican los perfiles de bloqueo, que nunca bloquean las APIs de comentarios,
+y la página de benchmark del servidor de replay.
+"""
+
+import re
+import sys
+import time
+from fnmatch import fnmatchcase
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+from scraper.resource_blocking import blocked_patterns, apply_blocking, stats, REQUIRED_URLS, BENCHMARK_VIDEO_ID
+from scraper.replay_server import ReplayServer
+
+REPLAY_DIR = Path(__file__).parent / "fixtures" / "replay"
+
+
+class TestBlockedPatterns:
+    """Tests de los patrones de bloqueo"""
+
+    def test_required_urls_never_blocked(self):
+        """Test de que los patrones extra que bloquearían la API de comentarios se descartan"""
+        patterns = blocked_patterns('standard', extra=["*/youtubei/v1/*", "*/custom-beacon/*"])
+
+        assert "*/youtubei/v1/*" not in patterns
+        assert "*/custom-beacon/*" in patterns
+        assert "*/videoplayback*" in patterns and "*doubleclick.net/*" in patterns
+        assert not [url for url in REQUIRED_URLS for pattern in patterns if fnmatchcase(url, pattern)]
+        assert blocked_patterns('off', extra=[]) == []
+
+    def test_apply_blocking(self):
+        """Test de los comandos CDP enviados y de un driver sin CDP"""
+        driver = MagicMock()
+        failed_before = stats['failed']
+
+        assert apply_blocking(driver, ["*.woff2*"]) is True
+        driver.execute_cdp_cmd.assert_called_with('Network.setBlockedURLs', {'urls': ["*.woff2*"]})
+
+        driver.execute_cdp_cmd.side_effect = RuntimeError("sin CDP")
+        assert apply_blocking(driver, ["*.woff2*"]) is False
+        assert stats['failed'] == failed_before + 1
+
+
+class TestBenchmarkPage:
+    """Tests de la página grabada para el benchmark A/B"""
+
+    def test_heavy_assets_blockable_and_delayed(self):
+        """Test de que los subrecursos pesados de la página coinciden con el perfil y tardan lo configurado"""
+        requests = pytest.importorskip("requests")
+        html = (REPLAY_DIR / "watch" / f"{BENCHMARK_VIDEO_ID}.html").read_text(encoding="utf-8")
+        assets = re.findall(r'(?:src=|url\()"(/_assets/[^"]+)', html)
+        patterns = blocked_patterns('standard', extra=[])
+
+        heavy = [a for a in assets if any(fnmatchcase(f"http://127.0.0.1{a}", p) for p in patterns)]
+        assert len(assets) == 9
+        assert len(heavy) == 8  # solo el JS de la aplicación se carga siempre
+
+        with ReplayServer(str(REPLAY_DIR), asset_latency=0.05, asset_size=1024) as server:
+            started = time.monotonic()
+            response = requests.get(server.base_url + heavy[0], timeout=5)
+
+        assert time.monotonic() - started >= 0.05
+        assert response.status_code == 200
+        assert server.requests['asset'] == 1
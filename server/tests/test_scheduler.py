@@ -0,0 +1,183 @@
+"""
+Tests unitarios para el módulo ml/scheduler.py
+Verifican el orden de resultados, la prioridad entre clases y las métricas del scheduler.
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+from ml.scheduler import InferenceScheduler, QueueFullError, PRIORITY_INTERACTIVE, PRIORITY_BACKFILL, PRIORITY_CLASSES
+from ml.batch_sizer import AdaptiveBatchSizer
+
+
+class FakePredictor:
+    """Predictor falso que registra el orden de los micro-lotes"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def predict_batch(self, texts, batch_size=None):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls.append(list(texts))
+        return [{'text': text, 'is_toxic': text.startswith("toxic")} for text in texts]
+
+
+@pytest.fixture
+def targets():
+    """Objetivos de latencia de ejemplo (segundos)"""
+    return {PRIORITY_INTERACTIVE: 0.5, "video_job": 10, PRIORITY_BACKFILL: 60}
+
+
+class TestInferenceScheduler:
+    """Tests para el scheduler de inferencia con prioridades"""
+
+    def test_results_keep_order(self, targets):
+        """Test de que los resultados llegan en el mismo orden que los textos"""
+        scheduler = InferenceScheduler(FakePredictor(), micro_batch_size=2, latency_targets=targets)
+        texts = [f"texto {i}" for i in range(5)]
+
+        results = scheduler.predict(texts, PRIORITY_BACKFILL, timeout=5)
+
+        assert [r['text'] for r in results] == texts
+
+    def test_empty_submit(self, targets):
+        """Test de petición vacía resuelta sin pasar por el worker"""
+        scheduler = InferenceScheduler(FakePredictor(), micro_batch_size=2, latency_targets=targets)
+
+        assert scheduler.predict([], PRIORITY_INTERACTIVE, timeout=1) == []
+
+    def test_unknown_priority(self, targets):
+        """Test de prioridad desconocida"""
+        scheduler = InferenceScheduler(FakePredictor(), micro_batch_size=2, latency_targets=targets)
+
+        with pytest.raises(ValueError):
+            scheduler.submit(["hola"], "urgente")
+
+    def test_interactive_preempts_backfill(self, targets):
+        """Test de que una petición interactiva no espera a un trabajo grande entero"""
+        predictor = FakePredictor(delay=0.01)
+        scheduler = InferenceScheduler(predictor, micro_batch_size=2, latency_targets=targets)
+
+        backfill = scheduler.submit([f"lote {i}" for i in range(40)], PRIORITY_BACKFILL)
+        time.sleep(0.03)
+        interactive = scheduler.submit(["comentario moderador"], PRIORITY_INTERACTIVE)
+
+        interactive.result(timeout=5)
+        assert not backfill.done()
+
+        backfill.result(timeout=5)
+        interactive_call = predictor.calls.index(["comentario moderador"])
+        assert interactive_call < len(predictor.calls) - 1
+
+    def test_metrics(self, targets):
+        """Test de métricas por clase de prioridad"""
+        scheduler = InferenceScheduler(FakePredictor(), micro_batch_size=2, latency_targets=targets)
+        scheduler.predict(["a", "b", "c"], PRIORITY_INTERACTIVE, timeout=5)
+
+        metrics = scheduler.get_metrics()
+
+        assert set(metrics['classes']) == set(PRIORITY_CLASSES)
+        interactive = metrics['classes'][PRIORITY_INTERACTIVE]
+        assert interactive['queue_wait']['count'] == 1
+        assert interactive['latency']['count'] == 1
+        assert interactive['latency_target_ms'] == 500
+        assert metrics['micro_batches'] == 2
+
+    def test_bounded_submit_rejects_when_full(self, targets):
+        """Test de rechazo rápido (para el 429) cuando la cola de la clase está llena"""
+        predictor = FakePredictor(delay=0.05)
+        limits = {PRIORITY_INTERACTIVE: 4, "video_job": 100, PRIORITY_BACKFILL: 100}
+        scheduler = InferenceScheduler(predictor, micro_batch_size=1, latency_targets=targets, queue_limits=limits)
+
+        first = scheduler.submit(["a", "b", "c"], PRIORITY_INTERACTIVE, bounded=True)
+        with pytest.raises(QueueFullError) as excinfo:
+            scheduler.submit(["d", "e"], PRIORITY_INTERACTIVE, bounded=True)
+
+        assert excinfo.value.retry_after >= 1
+        assert scheduler.get_metrics()['classes'][PRIORITY_INTERACTIVE]['rejections'] == 1
+
+        # Las peticiones internas (sin bounded) esperan en lugar de rechazarse
+        second = scheduler.submit(["d", "e"], PRIORITY_INTERACTIVE)
+        assert len(first.result(timeout=5)) == 3
+        assert len(second.result(timeout=5)) == 2
+
+    def test_occupancy(self, targets):
+        """Test de ocupación de las colas una vez vaciadas"""
+        limits = {PRIORITY_INTERACTIVE: 10, "video_job": 10, PRIORITY_BACKFILL: 10}
+        scheduler = InferenceScheduler(FakePredictor(), micro_batch_size=2, latency_targets=targets, queue_limits=limits)
+        scheduler.predict(["a", "b", "c"], PRIORITY_BACKFILL, timeout=5)
+
+        occupancy = scheduler.occupancy()
+        assert occupancy[PRIORITY_BACKFILL] == {'pending_texts': 0, 'limit': 10, 'occupancy': 0.0}
+
+
+class TestAdaptiveBatchSizer:
+    """Tests para el ajuste adaptativo del micro-lote"""
+
+    def _sizer(self, initial=16):
+        return AdaptiveBatchSizer(initial=initial, min_size=2, max_size=64, target_p95=0.1,
+                                  adjust_every=5, enabled=True)
+
+    def test_grows_under_target(self):
+        """Test de crecimiento aditivo cuando la latencia está por debajo del objetivo"""
+        sizer = self._sizer()
+        for _ in range(10):
+            sizer.record(0.01, sizer.current)
+
+        assert sizer.current == 24
+        assert [h['to'] for h in sizer.history] == [20, 24]
+        assert sizer.history[-1]['reason'] == "grow"
+
+    def test_shrinks_over_target(self):
+        """Test de reducción cuando el p95 supera el objetivo"""
+        sizer = self._sizer()
+        for _ in range(5):
+            sizer.record(0.5, sizer.current)
+
+        assert sizer.current == 11
+        assert sizer.history[-1]['reason'] == "shrink"
+
+    def test_respects_bounds(self):
+        """Test de límites mínimo y máximo"""
+        sizer = self._sizer(initial=2)
+        for _ in range(50):
+            sizer.record(1.0, sizer.current)
+        assert sizer.current == 2
+
+        sizer = self._sizer(initial=60)
+        for _ in range(50):
+            sizer.record(0.001, sizer.current)
+        assert sizer.current == 64
+
+    def test_ignores_partial_batches(self):
+        """Test de que los lotes incompletos no cuentan como muestra"""
+        sizer = self._sizer()
+        for _ in range(10):
+            sizer.record(0.5, 3)
+
+        assert sizer.current == 16
+        assert sizer.get_metrics()['history'] == []
+
+    def test_scheduler_exposes_batch_size(self, targets):
+        """Test de que el scheduler usa y expone el tamaño del sizer"""
+        sizer = self._sizer(initial=4)
+        scheduler = InferenceScheduler(FakePredictor(), latency_targets=targets, batch_sizer=sizer)
+        scheduler.predict([f"t{i}" for i in range(8)], PRIORITY_BACKFILL, timeout=5)
+
+        metrics = scheduler.get_metrics()
+        assert metrics['micro_batch_size'] == sizer.current
+        assert metrics['batch_sizer']['adaptive'] is True
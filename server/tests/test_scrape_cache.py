@@ -0,0 +1,70 @@
+"""
+Tests unitarios para el módulo scraper/scrape_cache.py
+Verifican los tramos de max_comments, la caducidad y la copia en disco.
+"""
+
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+from scraper.scrape_cache import ScrapeCache
+
+
+def scrape(n_threads):
+    threads = [{'author': f'@u{i}', 'comment': f'comentario {i} 😀', 'likes': 2,
+                'emojis': ['😀'], 'emoji_count': 1,
+                'replies': [{'author': '@r', 'comment': 'ok', 'likes': 1, 'emojis': [], 'emoji_count': 0}]}
+               for i in range(n_threads)]
+    return {'video_id': 'abc', 'title': 'Vídeo', 'threads': threads, 'total_comments': n_threads,
+            'total_threads': n_threads, 'total_likes': 3 * n_threads, 'total_emojis': n_threads}
+
+
+class TestScrapeCache:
+    """Tests de la caché de scrapings"""
+
+    def test_larger_tier_serves_smaller_request(self):
+        """Test de que un scraping de 100 sirve uno de 50 recortado y con totales recalculados"""
+        cache = ScrapeCache(ttl=60, max_entries=10, cache_dir="", tiers=[50, 100])
+        cache.put("abc", 100, scrape(100))
+        cache.put("xyz", 50, scrape(50))
+
+        data, age = cache.get("abc", 50)
+
+        assert age < 1
+        assert len(data['threads']) == 50
+        assert data['total_comments'] == 50
+        assert data['total_threads'] == 50
+        assert data['total_likes'] == 150
+        assert data['emoji_stats'] == {'😀': 50}
+        assert cache.get("xyz", 100) is None  # 50 de 50 pedidos: el vídeo puede tener más
+
+    def test_returns_copies_and_expires(self):
+        """Test de que las anotaciones del análisis no alteran la entrada y de la caducidad"""
+        cache = ScrapeCache(ttl=0.2, max_entries=10, cache_dir="", tiers=[50])
+        cache.put("abc", 50, scrape(3))
+
+        data, _ = cache.get("abc", 50)
+        data['threads'][0]['toxicity_analysis'] = {'is_toxic': True}
+        assert 'toxicity_analysis' not in cache.get("abc", 50)[0]['threads'][0]
+
+        time.sleep(0.3)
+        assert cache.get("abc", 50) is None
+        assert cache.get_metrics()['hits'] == 2
+
+    def test_disk_copy(self, tmp_path):
+        """Test de que otra instancia lee la entrada comprimida en disco"""
+        ScrapeCache(ttl=60, max_entries=10, cache_dir=str(tmp_path), tiers=[50]).put("abc", 40, scrape(5))
+
+        cache = ScrapeCache(ttl=60, max_entries=10, cache_dir=str(tmp_path), tiers=[50])
+        data, _ = cache.get("abc", 50)
+
+        assert data['total_comments'] == 5
+        assert cache.get_metrics()['disk_hits'] == 1
+        assert list(tmp_path.iterdir())[0].name == "abc_50.json.gz"
@@ -0,0 +1,73 @@
+"""
+Tests unitarios para el módulo scraper/benchmark.py
+Verifican el vídeo sintético, el benchmark offline de los backends contra el
+servidor de replay y la sección de comentarios que pinta el replay para Selenium.
+"""
+
+import sys
+import shutil
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+from scraper.benchmark import write_synthetic_video, run_benchmark, check_budget
+from scraper.replay_server import ReplayServer
+
+REPLAY_DIR = Path(__file__).parent / "fixtures" / "replay"
+CHROME_AVAILABLE = any(shutil.which(name) for name in ("google-chrome", "chromium", "chromium-browser"))
+
+
+class TestHttpBenchmark:
+    """Tests del benchmark del backend HTTP"""
+
+    def test_synthetic_video(self, tmp_path):
+        """Test de que el backend HTTP recorre todas las páginas y respuestas del vídeo sintético"""
+        pytest.importorskip("requests")
+        video_id = write_synthetic_video(str(tmp_path), threads=45, page_size=20, reply_every=5, replies=3)
+
+        results = run_benchmark(45, backends=["http"], runs=1, fixtures_dir=str(tmp_path), video_id=video_id)
+
+        http = results["http"]
+        assert (http["threads"], http["replies"]) == (45, 27)
+        assert http["round_trips"] == 1 + 3 + 9  # página de watch, páginas de hilos y de respuestas
+        assert http["time_to_n_s"] > 0 and http["time_to_first_batch_s"] <= http["time_to_n_s"]
+        assert check_budget(results, 45) == []
+        assert check_budget(results, 50, max_seconds=0) == [
+            "http: 45 hilos de 50", f"http: {http['time_to_n_s']}s hasta 50 hilos (máximo 0s)"
+        ]
+
+
+class TestReplayRendering:
+    """Tests de la sección de comentarios pintada por el replay"""
+
+    def test_comments_script_injected(self):
+        """Test de que solo con render_comments la página de watch carga el script de comentarios"""
+        requests = pytest.importorskip("requests")
+
+        with ReplayServer(str(REPLAY_DIR), render_comments=True) as server:
+            page = requests.get(f"{server.base_url}/watch?v=dQw4w9WgXcQ", timeout=5).text
+            script = requests.get(f"{server.base_url}/_replay/comments.js", timeout=5)
+        with ReplayServer(str(REPLAY_DIR)) as server:
+            plain = requests.get(f"{server.base_url}/watch?v=dQw4w9WgXcQ", timeout=5).text
+
+        assert '<script src="/_replay/comments.js"></script></body>' in page
+        assert script.status_code == 200 and "ytd-comment-thread-renderer" in script.text
+        assert "/_replay/comments.js" not in plain
+
+    @pytest.mark.skipif(not CHROME_AVAILABLE, reason="Chrome no está instalado")
+    def test_selenium_backend(self):
+        """Test del backend Selenium contra el replay (solo con Chrome instalado)"""
+        pytest.importorskip("selenium")
+        pytest.importorskip("emoji")
+
+        results = run_benchmark(30, backends=["selenium"], runs=1)
+
+        assert results["selenium"]["threads"] == 30
+        assert results["selenium"]["round_trips"] > 0
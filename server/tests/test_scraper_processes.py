@@ -0,0 +1,100 @@
+"""
+Tests unitarios para el módulo scraper/process_pool.py
+Verifican los procesos worker del scraper con una función de scraping falsa:
+lotes y resultado entre procesos, cancelación y reinicio tras un fallo o al
+llegar al máximo de trabajos.
+"""
+
+import os
+import sys
+import time
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv; progress_manager, fastapi)
+sys.modules.setdefault('dotenv', MagicMock())
+sys.modules.setdefault('fastapi', MagicMock())
+
+from scraper import process_pool
+from scraper.process_pool import ScraperProcessPool, ScraperProcessError, pack, unpack
+from core.deadline import Deadline
+
+FAKE_TARGET = "test_scraper_processes:fake_scrape"
+
+
+def worker_main(conn, target, warm):
+    """Arranque del worker desde este módulo: al importarlo, el proceso nuevo aplica los mismos mocks"""
+    process_pool._worker_main(conn, target, warm)
+
+
+def fake_scrape(video_url, max_comments, session_id, thread_callback, known_fingerprints, deadline):
+    """Scraper falso que se ejecuta dentro del worker"""
+    from server.scraper.progress_manager import progress_manager
+
+    if video_url == "crash":
+        os._exit(3)
+    if video_url == "wait":
+        while not deadline.expired():
+            time.sleep(0.01)
+        return {'threads': [], 'cancelled': deadline.cancelled, 'pid': os.getpid()}
+
+    threads = [{'author': f'@{i}', 'comment': f"hilo {i}", 'replies': []} for i in range(max_comments)]
+    progress_manager.post_progress(session_id, 50, "mitad")
+    if thread_callback:
+        thread_callback(threads[:2])
+    return {'threads': threads, 'total_comments': len(threads), 'known': sorted(known_fingerprints or []),
+            'pid': os.getpid()}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    # Progreso reenviado por los workers al progress_manager de la API
+    monkeypatch.setattr(process_pool, "progress_manager", MagicMock())
+    monkeypatch.setattr(process_pool, "_worker_main", worker_main)
+    pool = ScraperProcessPool(processes=1, max_jobs=0, max_rss_mb=0, target=FAKE_TARGET, warm=False)
+    yield pool
+    pool.close(timeout=5)
+
+
+class TestScraperProcesses:
+    """Tests del pool de procesos del scraper"""
+
+    def test_batches_and_result(self, pool):
+        """Test de que el resultado reutiliza los hilos ya entregados por lotes y el progreso llega a la API"""
+        batches = []
+
+        data = pool.run("video", 3, "sesion", batches.append, {"b", "a"})
+
+        assert data['pid'] != os.getpid()
+        assert data['known'] == ["a", "b"]
+        assert len(batches) == 1 and data['threads'][:2] == batches[0]
+        assert all(thread is streamed for thread, streamed in zip(data['threads'], batches[0]))
+        assert data['threads'][2]['comment'] == "hilo 2"
+        process_pool.progress_manager.post_progress.assert_called_with("sesion", 50, "mitad", "processing")
+        assert unpack(pack({'ñ': [1]})) == {'ñ': [1]}
+
+    def test_cancel_crash_and_recycle(self, pool):
+        """Test de la cancelación dentro del worker, del fallo de un worker y del reinicio por trabajos"""
+        deadline = Deadline()
+        threading.Timer(0.2, deadline.cancel, args=("cliente desconectado",)).start()
+        first = pool.run("wait", 1, deadline=deadline)
+        assert first['cancelled'] is True
+
+        with pytest.raises(ScraperProcessError):
+            pool.run("crash", 1)
+        second = pool.run("video", 1)
+        assert second['pid'] != first['pid']
+
+        pool.max_jobs = 1
+        assert pool.run("video", 1)['pid'] == second['pid']  # segundo trabajo: se retira al terminar
+        assert pool.run("video", 1)['pid'] != second['pid']
+
+        metrics = pool.get_metrics()
+        assert (metrics['crashes'], metrics['recycled'], metrics['failed']) == (1, 2, 1)
+        assert len([w for w in metrics['workers'] if not w['retiring']]) == 1
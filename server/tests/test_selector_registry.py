@@ -0,0 +1,112 @@
+"""
+Tests unitarios para el módulo scraper/selector_registry.py
+Verifican el orden de prueba de selectores, las estadísticas por campo
+y la persistencia en JSON.
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+from scraper.selector_registry import SelectorRegistry
+
+SELECTORS = ["h1.viejo", "h1.intermedio", "h1.nuevo"]
+
+
+def lookup_only(valid):
+    """Simula find_element: solo el selector `valid` encuentra el elemento"""
+    calls = []
+
+    def lookup(selector):
+        calls.append(selector)
+        if selector != valid:
+            raise Exception("no such element")
+        return "Título"
+    return lookup, calls
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return SelectorRegistry(path=str(tmp_path / "selectors.json"))
+
+
+class TestSelectorRegistry:
+    """Tests de la memoria de selectores"""
+
+    def test_last_hit_tried_first(self, registry):
+        """Test de que tras un acierto el selector ganador se prueba primero"""
+        lookup, calls = lookup_only("h1.nuevo")
+
+        assert registry.find("video_title", SELECTORS, lookup) == ("Título", "h1.nuevo")
+        assert calls == SELECTORS
+
+        calls.clear()
+        registry.find("video_title", SELECTORS, lookup)
+        assert calls == ["h1.nuevo"]
+
+    def test_none_is_a_miss(self, registry):
+        """Test de que un lookup que devuelve None pasa al siguiente selector"""
+        value, selector = registry.find("video_author", SELECTORS, lambda s: "Canal" if s == "h1.intermedio" else None)
+
+        assert (value, selector) == ("Canal", "h1.intermedio")
+        assert registry.find("vacio", SELECTORS, lambda s: None) == (None, None)
+
+    def test_stats_show_layout_drift(self, registry):
+        """Test de estadísticas: acierto al primer intento y cambios de selector"""
+        registry.find("video_title", SELECTORS, lookup_only("h1.viejo")[0])
+        registry.find("video_title", SELECTORS, lookup_only("h1.viejo")[0])
+        registry.find("video_title", SELECTORS, lookup_only("h1.nuevo")[0])
+        registry.find("video_title", SELECTORS, lambda s: None)
+
+        stats = registry.get_stats()['fields']['video_title']
+        assert stats['lookups'] == 4
+        assert stats['hit_rate'] == 0.75
+        assert stats['first_try_rate'] == 0.5
+        assert stats['last_hit'] == "h1.nuevo"
+        assert stats['last_hit_changes'] == 1
+        assert stats['selectors'] == {"h1.viejo": 2, "h1.nuevo": 1}
+
+    def test_persisted_across_instances(self, registry):
+        """Test de que la memoria sobrevive a un reinicio"""
+        registry.find("video_title", SELECTORS, lookup_only("h1.intermedio")[0])
+        registry.save()
+
+        restored = SelectorRegistry(path=registry.path)
+        assert restored.ordered("video_title", SELECTORS)[0] == "h1.intermedio"
+        assert restored.get_stats()['fields']['video_title']['lookups'] == 1
+
+    def test_corrupt_file_ignored(self, tmp_path):
+        """Test de fichero JSON corrupto al arrancar"""
+        path = tmp_path / "selectors.json"
+        path.write_text("{no es json", encoding="utf-8")
+
+        registry = SelectorRegistry(path=str(path))
+        assert registry.ordered("video_title", SELECTORS) == SELECTORS
+
+    def test_worker_changes_merged(self, registry, tmp_path):
+        """Test de que la API suma los contadores de un worker y solo ella escribe el fichero"""
+        worker = SelectorRegistry(path=registry.path)
+        worker.readonly = True
+        worker.find("video_title", SELECTORS, lookup_only("h1.nuevo")[0])
+        worker.find("video_title", SELECTORS, lookup_only("h1.nuevo")[0])
+        worker.save()
+        assert list(tmp_path.iterdir()) == []
+
+        registry.find("video_title", SELECTORS, lookup_only("h1.viejo")[0])
+        registry.merge(worker.take_changes())
+        assert worker.take_changes() == {}
+        registry.save()
+
+        stats = SelectorRegistry(path=registry.path).get_stats()['fields']['video_title']
+        assert stats['lookups'] == 3
+        assert stats['selectors'] == {"h1.viejo": 1, "h1.nuevo": 2}
+        assert (stats['last_hit'], stats['last_hit_changes']) == ("h1.nuevo", 1)
+        assert [p.name for p in tmp_path.iterdir()] == ["selectors.json"]
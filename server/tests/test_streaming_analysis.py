@@ -0,0 +1,130 @@
+"""
+Tests del análisis incremental de toxicidad (ml/pipeline.py, StreamingAnalysis)
+Los hilos llegan por lotes durante el scraping y el resultado final debe ser
+el mismo que analizando todo al terminar.
+"""
+
+import sys
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv; el predictor real necesita torch)
+sys.modules.setdefault('dotenv', MagicMock())
+sys.modules.setdefault('server.ml.predictor', MagicMock())
+
+from ml.pipeline import ToxicityPipeline, StreamingAnalysis
+from ml.scheduler import InferenceScheduler
+from core.deadline import Deadline
+
+
+class FakePredictor:
+    """Predictor falso: tóxico si el texto empieza por 'toxic'"""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def predict_batch(self, texts, batch_size=None):
+        with self.lock:
+            self.calls.append(list(texts))
+        return [{'text': text, 'is_toxic': text.startswith("toxic"),
+                 'toxicity_confidence': 0.9 if text.startswith("toxic") else 0.1} for text in texts]
+
+    def get_model_info(self):
+        return {'model_loaded': True}
+
+
+def make_pipeline():
+    pipeline = ToxicityPipeline.__new__(ToxicityPipeline)
+    pipeline.logger = MagicMock()
+    pipeline.predictor = FakePredictor()
+    pipeline.scheduler = InferenceScheduler(pipeline.predictor, micro_batch_size=4)
+    return pipeline
+
+
+def thread(text, replies=()):
+    return {'author': '@a', 'comment': text, 'likes': 0,
+            'replies': [{'author': '@b', 'comment': reply, 'likes': 0} for reply in replies]}
+
+
+class TestStreamingAnalysis:
+    """Tests de la inferencia por lotes durante el scraping"""
+
+    def test_same_result_as_full_analysis(self):
+        """Test de que analizar por lotes da el mismo resumen que al final"""
+        threads = [thread("hola", ["toxic respuesta"]), thread("toxic 1"), thread("adiós", ["bien", "toxic 2"])]
+        pipeline = make_pipeline()
+        stream = StreamingAnalysis(pipeline)
+
+        stream.add_threads(threads[:2])
+        stream.add_threads(threads[2:])
+        analysis = stream.finish({'threads': threads})
+
+        assert stream.threads_streamed == 3
+        assert analysis['total_analyzed'] == 6
+        assert analysis['toxic_comments'] == 1
+        assert analysis['toxic_replies'] == 2
+        assert threads[2]['replies'][1]['toxicity_analysis']['metadata']['thread_index'] == 2
+        assert len(pipeline.predictor.calls) == 2
+
+    def test_missing_and_discarded_threads(self):
+        """Test de hilos no recibidos por lotes y de lotes que no están en el resultado final"""
+        discarded = [thread("toxic descartado")]
+        final = [thread("hola"), thread("toxic final")]
+        stream = StreamingAnalysis(make_pipeline())
+
+        stream.add_threads(discarded)
+        stream.add_threads(final[:1])
+        analysis = stream.finish({'threads': final})
+
+        assert analysis['total_analyzed'] == 2
+        assert analysis['total_toxic'] == 1
+        assert final[1]['toxicity_analysis']['metadata']['thread_index'] == 1
+
+    def test_no_threads(self):
+        """Test de vídeo sin comentarios"""
+        stream = StreamingAnalysis(make_pipeline())
+
+        assert stream.finish({'threads': []})['total_comments'] == 0
+
+    def test_deadline_leaves_threads_unanalyzed(self):
+        """Test de que los lotes que no terminan dentro del plazo se cancelan y el análisis queda parcial"""
+        pipeline = make_pipeline()
+        release = threading.Event()
+        predict_batch = pipeline.predictor.predict_batch
+        pipeline.predictor.predict_batch = lambda texts, batch_size=None: release.wait(5) and predict_batch(texts)
+        threads = [thread("hola"), thread("toxic 1"), thread("adiós")]
+        stream = StreamingAnalysis(pipeline)
+
+        stream.add_threads(threads[:1])
+        stream.add_threads(threads[1:])
+        analysis = stream.finish({'threads': threads}, Deadline(0.05))
+        release.set()
+
+        assert analysis['partial'] is True
+        assert analysis['unanalyzed_threads'] == 3
+        # El scheduler descarta el lote cancelado y sigue atendiendo trabajos nuevos
+        assert len(pipeline.scheduler.predict(["toxic después"], timeout=5)) == 1
+
+    def test_cancel_discards_pending_batches(self):
+        """Test de que al cancelar el trabajo los lotes pendientes no se ejecutan ni se aceptan nuevos"""
+        pipeline = make_pipeline()
+        release = threading.Event()
+        predict_batch = pipeline.predictor.predict_batch
+        pipeline.predictor.predict_batch = lambda texts, batch_size=None: release.wait(5) and predict_batch(texts)
+        stream = StreamingAnalysis(pipeline)
+
+        stream.add_threads([thread("bloquea el scheduler")])
+        stream.add_threads([thread("pendiente 1"), thread("pendiente 2")])
+        cancelled = stream.cancel()
+        stream.add_threads([thread("después de cancelar")])
+        release.set()
+
+        assert cancelled >= 1
+        assert stream.threads_streamed == 3
+        assert len(pipeline.scheduler.predict(["toxic después"], timeout=5)) == 1
+        assert ["pendiente 1", "pendiente 2"] not in pipeline.predictor.calls
@@ -0,0 +1,141 @@
+"""
+Tests unitarios para scraper/yt_parser.py y scraper/network_capture.py
+Usan respuestas de youtubei/v1/next guardadas en tests/fixtures.
+"""
+
+import sys
+import json
+import base64
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Agregar el directorio padre al path para poder importar
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Mock de dependencias externas antes de importar (config usa dotenv)
+sys.modules.setdefault('dotenv', MagicMock())
+
+from scraper.yt_parser import parse_next_response, build_threads
+from scraper.network_capture import NetworkCapture
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def load_fixture(name):
+    with open(FIXTURES / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def emojis_of(text):
+    return [char for char in text if char in ('🎉', '❤')]
+
+
+class TestParseNextResponse:
+    """Tests del parser de respuestas youtubei/v1/next"""
+
+    def test_comment_page(self):
+        """Test de hilos, likes y continuaciones en el formato nuevo (entity payloads)"""
+        parsed = parse_next_response(load_fixture("youtubei_next_comments.json"))
+
+        assert [c['comment_id'] for c in parsed['comments']] == ["UgxAAA111", "UgxBBB222", "UgxCCC333"]
+        first = parsed['comments'][0]
+        assert first['author'] == "@ana_garcia"
+        assert first['likes'] == 1200
+        assert first['reply_count'] == 3
+        assert first['parent_id'] is None
+        assert parsed['continuation'] == "COMMENTS_PAGE_2_TOKEN"
+        assert parsed['reply_continuations'] == {"UgxAAA111": "REPLIES_TOKEN_AAA"}
+
+    def test_replies_page(self):
+        """Test de respuestas y token de 'mostrar más respuestas'"""
+        parsed = parse_next_response(load_fixture("youtubei_next_replies.json"))
+
+        assert [c['parent_id'] for c in parsed['comments']] == ["UgxAAA111", "UgxAAA111"]
+        assert parsed['continuation'] == "MORE_REPLIES_AAA"
+
+    def test_legacy_renderer(self):
+        """Test del formato antiguo commentRenderer"""
+        parsed = parse_next_response(load_fixture("youtubei_next_legacy.json"))
+
+        first = parsed['comments'][0]
+        assert first['comment'] == "Formato antiguo"
+        assert first['likes'] == 2500
+        assert first['published_time'] == "hace 3 años"
+        assert parsed['comments'][1]['likes'] == 0
+        assert parsed['reply_continuations'] == {"UgzLEG001": "LEGACY_REPLIES_TOKEN"}
+        assert parsed['continuation'] == "LEGACY_PAGE_2"
+
+
+class TestBuildThreads:
+    """Tests de la agrupación en hilos con el formato del scraper"""
+
+    def _records(self):
+        records = parse_next_response(load_fixture("youtubei_next_comments.json"))['comments']
+        return records + parse_next_response(load_fixture("youtubei_next_replies.json"))['comments']
+
+    def test_threads_with_replies(self):
+        """Test de respuestas colgadas de su hilo y campos del scraper"""
+        threads = build_threads(self._records(), emojis_of)
+
+        assert len(threads) == 3
+        first = threads[0]
+        assert first['emojis'] == ['🎉']
+        assert first['has_replies'] is True
+        assert first['replies_count'] == 3
+        assert [r['author'] for r in first['replies']] == ["@pedro", "@marta"]
+        assert first['replies'][0]['emoji_count'] == 1
+        assert threads[1]['has_replies'] is False
+
+    def test_limits_and_duplicates(self):
+        """Test de límites de hilos/respuestas y de registros repetidos"""
+        records = self._records()
+        threads = build_threads(records + records, emojis_of, max_threads=2, max_replies=1)
+
+        assert len(threads) == 2
+        assert len(threads[0]['replies']) == 1
+
+
+class FakeDriver:
+    """Driver falso con performance log y Network.getResponseBody"""
+
+    def __init__(self, entries, bodies):
+        self.entries = entries
+        self.bodies = bodies
+
+    def get_log(self, log_type):
+        entries, self.entries = self.entries, []
+        return entries
+
+    def execute_cdp_cmd(self, command, params):
+        if command == 'Network.getResponseBody':
+            return self.bodies[params['requestId']]
+        return {}
+
+
+class TestNetworkCapture:
+    """Tests de la captura de respuestas por el performance log"""
+
+    def test_captures_finished_next_responses(self):
+        """Test de que solo se leen las respuestas del endpoint ya terminadas"""
+        body = json.dumps(load_fixture("youtubei_next_comments.json"))
+        driver = FakeDriver(load_fixture("performance_log.json"), {
+            "1000.1": {'body': base64.b64encode(body.encode()).decode(), 'base64Encoded': True}
+        })
+        capture = NetworkCapture(driver)
+
+        responses = capture.poll()
+
+        assert len(responses) == 1
+        assert responses[0]['trackingParams'] == "CAAQg2ciEwi"
+        # 1000.3 sigue pendiente hasta su loadingFinished
+        assert capture._pending == {"1000.3"}
+
+    def test_unreadable_body(self):
+        """Test de cuerpos que ya no están disponibles"""
+        driver = FakeDriver(load_fixture("performance_log.json"), {"1000.1": {'body': 'no es json'}})
+        capture = NetworkCapture(driver)
+
+        assert capture.poll() == []
+        assert capture.failed == 1